@@ -0,0 +1,106 @@
+"""
+Benchmark creating users one by one against UserRepository.bulk_create.
+
+The user table is created in a scratch schema, so the application tables are never touched.
+The one by one case creates and flushes each user like POST /api/users/ does, on a smaller
+batch since it is orders of magnitude slower. The bulk cases insert the whole batch with the
+unnest statements and with COPY. The schema is dropped at the end.
+
+Usage, from the backend directory, against a disposable database and with APP_DEBUG=false:
+
+    uv run python -m scripts.benchmarks.bulk_create --rows 100000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from src.core.settings import settings
+from src.domain.models import User
+from src.domain.models.user import UserCreate
+from src.domain.repositories import UserRepository
+from src.domain.repositories import user as user_repository_module
+
+SCHEMA = "bench_bulk_create"
+
+
+def build_users(rows: int, prefix: str) -> list[UserCreate]:
+    return [
+        UserCreate(
+            email=f"{prefix}_{index}@example.com",
+            name=f"User {index}",
+            google_id=f"{prefix}_google_{index}",
+        )
+        for index in range(rows)
+    ]
+
+
+async def timed(engine: AsyncEngine, name: str, users: list[UserCreate], bulk: bool) -> None:
+    """
+    Create the users in a single transaction and print the elapsed time.
+
+    Args:
+        engine: Engine with the search path set to the scratch schema
+        name: Name of the case in the report
+        users: Users to create
+        bulk: Whether to use bulk_create instead of one create per user
+    """
+    session_local = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with session_local() as session:
+        repository = UserRepository(session)
+
+        start = time.perf_counter()
+        if bulk:
+            created = sum(uuid is not None for uuid in await repository.bulk_create(users))
+        else:
+            for user in users:
+                await repository.create(user)
+            created = len(users)
+        await session.commit()
+        elapsed = time.perf_counter() - start
+
+    print(f"{name:<20}{created:>10} rows  {elapsed:>8.2f} s  {created / elapsed:>10.0f} rows/s")
+
+
+async def run(rows: int, single_rows: int) -> None:
+    engine = create_async_engine(
+        settings.db_dsn_async, connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+
+    async with engine.begin() as connection:
+        await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await connection.run_sync(SQLModel.metadata.create_all, tables=[User.__table__])
+
+    try:
+        await timed(engine, "one by one", build_users(single_rows, "single"), bulk=False)
+
+        user_repository_module.BULK_COPY_THRESHOLD = rows + 1
+        await timed(engine, "bulk unnest", build_users(rows, "unnest"), bulk=True)
+
+        user_repository_module.BULK_COPY_THRESHOLD = 1
+        await timed(engine, "bulk copy", build_users(rows, "copy"), bulk=True)
+
+        # Every row conflicts with the previous run, the cost of reporting the conflicts
+        await timed(engine, "bulk copy conflicts", build_users(rows, "copy"), bulk=True)
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows of the bulk batches")
+    parser.add_argument("--single-rows", type=int, default=2000, help="Rows created one by one")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.rows, args.single_rows))
+
+
+if __name__ == "__main__":
+    main()
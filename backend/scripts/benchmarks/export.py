@@ -0,0 +1,94 @@
+"""
+Benchmark the streamed user export on growing tables.
+
+The user table is created in a scratch schema and filled with UserRepository.bulk_create, so
+the application tables are never touched. For every table size the export is consumed like
+GET /api/users/export sends it, reporting the time to the first chunk, the total time and the
+peak of memory allocated by Python while streaming. The schema is dropped at the end.
+
+Usage, from the backend directory, against a disposable database and with APP_DEBUG=false:
+
+    uv run python -m scripts.benchmarks.export --rows 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from src.core.settings import settings
+from src.domain.models import User
+from src.domain.models.user import UserCreate
+from src.domain.repositories import UserPermissionRepository, UserRepository
+from src.web.services import UserService
+
+SCHEMA = "bench_export"
+
+
+async def run(sizes: list[int]) -> None:
+    engine = create_async_engine(
+        settings.db_dsn_async, connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    session_local = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async with engine.begin() as connection:
+        await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await connection.run_sync(SQLModel.metadata.create_all, tables=[User.__table__])
+
+    print(f"{'rows':>10}  {'first chunk':>12}  {'total':>9}  {'peak memory':>12}")
+    try:
+        rows = 0
+        for size in sorted(sizes):
+            async with session_local() as session:
+                await UserRepository(session).bulk_create(
+                    [
+                        UserCreate(
+                            email=f"user_{index}@example.com",
+                            name=f"User {index}",
+                            google_id=f"google_{index}",
+                        )
+                        for index in range(rows, size)
+                    ]
+                )
+                await session.commit()
+            rows = size
+
+            async with session_local() as session:
+                service = UserService(UserRepository(session), UserPermissionRepository(session))
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                first_chunk = None
+                async for _ in service.export_users():
+                    first_chunk = first_chunk or time.perf_counter() - start
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            print(
+                f"{rows:>10}  {(first_chunk or 0) * 1000:>9.1f} ms  {elapsed:>7.2f} s"
+                f"  {peak / 1024 / 1024:>9.1f} MB"
+            )
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000], help="Table sizes to export"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run(args.rows))
+
+
+if __name__ == "__main__":
+    main()
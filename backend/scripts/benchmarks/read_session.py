@@ -0,0 +1,72 @@
+"""
+Benchmark the read session against the default session on a read only request.
+
+Each case opens a session from the dependency, runs the healthz query and closes it, like a
+GET request would. Every statement asyncpg sends is counted with a query logger, so the
+BEGIN and COMMIT round trips saved by the read session show up next to the timings.
+
+Usage, from the backend directory and with APP_DEBUG=false so statements aren't echoed:
+
+    uv run python -m scripts.benchmarks.read_session --runs 2000
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+
+from sqlalchemy import event, select
+
+from scripts.benchmarks.utils import Timings, measure_async, print_report
+from src.core.db import async_engine
+from src.core.deps.db import get_db_read_session, get_db_session
+
+
+async def run(runs: int) -> tuple[list[Timings], dict[str, Counter]]:
+    statements: Counter = Counter()
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def log_queries(dbapi_connection, connection_record):
+        connection_record.driver_connection.add_query_logger(
+            lambda record: statements.update([record.query.split()[0].upper()])
+        )
+
+    timings = []
+    round_trips = {}
+    for name, dependency in (("session", get_db_session), ("read session", get_db_read_session)):
+
+        async def case():
+            async for session in dependency():
+                await session.execute(select(1))
+
+        # Warm up the pool so connecting isn't measured
+        for _ in range(50):
+            await case()
+
+        statements.clear()
+        timings.append(await measure_async(name, runs, case))
+        round_trips[name] = Counter(
+            {statement: count / runs for statement, count in statements.items()}
+        )
+
+    await async_engine.dispose()
+    return timings, round_trips
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=2000, help="Requests of each case")
+    args = parser.parse_args()
+
+    timings, round_trips = asyncio.run(run(args.runs))
+    print_report("Read only request", timings)
+
+    print("\nStatements sent per request")
+    for name, statements in round_trips.items():
+        sent = ", ".join(
+            f"{statement} {count:g}" for statement, count in sorted(statements.items())
+        )
+        print(f"{name:<16}{sent}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark the serialization of a 1000 rows list response.
+
+The same User rows are sent through a list route built like before, dumping every row and
+validating it again into UserPublic before FastAPI validates it against the response model,
+through SQLModel.model_validate from the row attributes, and like the routes now do, with
+UserService._parse_to_public and ModelResponse. The rows are built in memory, so no database
+is involved.
+
+Usage, from the backend directory:
+
+    uv run python -m scripts.benchmarks.serialization --rows 1000
+"""
+
+import argparse
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message
+
+from scripts.benchmarks.utils import Timings, measure_async, print_report
+from src.domain.models import User
+from src.domain.models.user import UserPublic
+from src.web.api.responses import ModelResponse
+from src.web.services import UserService
+
+
+def build_app(users: list[User]) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/dump-and-validate", response_model=list[UserPublic])
+    async def dump_and_validate():
+        return [UserPublic(**user.model_dump()) for user in users]
+
+    @app.get("/model-validate", response_model=list[UserPublic])
+    async def model_validate():
+        return [UserPublic.model_validate(user, from_attributes=True) for user in users]
+
+    @app.get("/model-response", response_model=list[UserPublic])
+    async def model_response():
+        service = UserService(user_repository=None, user_permission_repository=None)
+        return ModelResponse([await service._parse_to_public(user) for user in users])
+
+    return app
+
+
+async def call(app: ASGIApp, path: str) -> bytes:
+    """
+    Send a GET request straight to the ASGI app.
+
+    Args:
+        app: ASGI app
+        path: Request path
+
+    Returns:
+        The response body
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "server": ("test", 80),
+        "client": ("test", 1234),
+        "headers": [],
+    }
+    body = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+
+async def run(runs: int, rows: int) -> list[Timings]:
+    users = [
+        User(
+            id=index,
+            email=f"user_{index}@example.com",
+            name=f"User {index}",
+            google_id=f"google_{index}",
+        )
+        for index in range(rows)
+    ]
+    app = build_app(users)
+
+    timings = []
+    expected = None
+    for path in ("/dump-and-validate", "/model-validate", "/model-response"):
+        body = await call(app, path)
+        # Every path must answer the same document
+        expected = expected or body
+        assert body == expected, f"{path} answered a different body"
+
+        async def case():
+            await call(app, path)
+
+        timings.append(await measure_async(path.strip("/"), runs, case))
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=200, help="Requests of each case")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows of the list response")
+    args = parser.parse_args()
+
+    timings = asyncio.run(run(args.runs, args.rows))
+    print_report(f"List response of {args.rows} users", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark the per request overhead of the signature middleware.
+
+The same signed requests are sent straight to the ASGI callable of a minimal app wrapped in
+no middleware, in the former BaseHTTPMiddleware implementation and in the current pure ASGI
+SignatureMiddleware. No server, network or database is involved, so the difference between
+the cases is the middleware overhead.
+
+Usage, from the backend directory:
+
+    uv run python -m scripts.benchmarks.signature_middleware --runs 5000
+
+The end to end p99 is measured with the existing locust scenarios, run once against a server
+built from each implementation, comparing the "99%" column of reports/locust_stats_stats.csv:
+
+    uv run locust -f scripts/locust/locustfile.py --headless --config scripts/locust/locust.conf
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware import Middleware
+from fastapi.responses import ORJSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message
+
+from scripts.benchmarks.utils import Timings, measure_async, print_report
+from src.core.settings import settings
+from src.web.api.signing import generate_signature, signing
+from src.web.main import SignatureMiddleware
+
+
+class BaseHTTPSignatureMiddleware(BaseHTTPMiddleware):
+    """The signature middleware as it was implemented on top of BaseHTTPMiddleware."""
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            await signing(request)
+        except HTTPException as error:
+            return ORJSONResponse(
+                status_code=error.status_code,
+                content={"detail": error.detail},
+            )
+        return await call_next(request)
+
+
+def build_app(middleware: list[Middleware]) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse, middleware=middleware)
+
+    @app.get("/items")
+    async def list_items():
+        return [{"id": index, "name": f"item {index}"} for index in range(10)]
+
+    @app.post("/items")
+    async def create_item(item: dict):
+        return item
+
+    return app
+
+
+async def call(app: ASGIApp, method: str, body: bytes) -> int:
+    """
+    Send a signed request straight to the ASGI app.
+
+    Args:
+        app: ASGI app
+        method: HTTP method
+        body: Raw request body
+
+    Returns:
+        The response status code
+    """
+    timestamp = str(datetime.now(timezone.utc).timestamp() * 1000)
+    signature = generate_signature(method, body.decode(), timestamp, settings.secret_key)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": "/items",
+        "raw_path": b"/items",
+        "root_path": "",
+        "query_string": b"",
+        "server": ("test", 80),
+        "client": ("test", 1234),
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"x-signature", signature.encode()),
+            (b"x-timestamp", timestamp.encode()),
+        ],
+    }
+    messages: list[Message] = [{"type": "http.request", "body": body, "more_body": False}]
+    status_code = 0
+
+    async def receive() -> Message:
+        if messages:
+            return messages.pop()
+        # Like a real server, there is nothing else to receive while the client waits
+        await asyncio.Future()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def run(runs: int, body_size: int) -> list[Timings]:
+    apps = {
+        "no middleware": build_app([]),
+        "BaseHTTPMiddleware": build_app([Middleware(BaseHTTPSignatureMiddleware)]),
+        "pure ASGI": build_app([Middleware(SignatureMiddleware)]),
+    }
+    body = json.dumps({"payload": "x" * body_size}, separators=(",", ":")).encode()
+
+    timings = []
+    for method, request_body in (("GET", b""), ("POST", body)):
+        for name, app in apps.items():
+
+            async def case():
+                assert await call(app, method, request_body) == 200
+
+            # Warm up the app and the signature code paths
+            for _ in range(100):
+                await case()
+
+            timings.append(await measure_async(f"{method} {name}", runs, case))
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5000, help="Requests of each case")
+    parser.add_argument("--body-size", type=int, default=1024, help="POST payload size")
+    args = parser.parse_args()
+
+    timings = asyncio.run(run(args.runs, args.body_size))
+    print_report("Signature middleware overhead per request", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark the userpermission lookups before and after the lookup indexes.
+
+The tables are created in a scratch schema and seeded with generate_series, so the
+application tables are never touched. The schema is dropped at the end.
+
+Usage, from the backend directory and against a disposable database:
+
+    uv run python -m scripts.benchmarks.user_permission_indexes --rows 1000000
+"""
+
+import argparse
+import random
+
+from sqlalchemy import Connection, create_engine, text
+from sqlmodel import SQLModel
+
+from scripts.benchmarks.utils import Timings, measure, print_report
+from src.core.settings import settings
+
+# ruff: noqa: F403
+# sonarignore: python:S2208
+from src.domain.models import *
+
+SCHEMA = "bench_user_permission_indexes"
+LOOKUP_INDEXES = {
+    "ix_userpermission_user_id_permission_id": (
+        "CREATE UNIQUE INDEX ix_userpermission_user_id_permission_id "
+        "ON userpermission (user_id, permission_id)"
+    ),
+    "ix_userpermission_permission_id_user_id": (
+        "CREATE INDEX ix_userpermission_permission_id_user_id "
+        "ON userpermission (permission_id, user_id)"
+    ),
+}
+QUERIES = {
+    "get_by_user_and_permission": (
+        "SELECT id FROM userpermission WHERE user_id = :user_id AND permission_id = :permission_id"
+    ),
+    "get_user_permissions": (
+        "SELECT permission.* FROM permission "
+        "JOIN userpermission ON permission.id = userpermission.permission_id "
+        "WHERE userpermission.user_id = :user_id"
+    ),
+    "get_permission_users": (
+        'SELECT "user".* FROM "user" '
+        'JOIN userpermission ON "user".id = userpermission.user_id '
+        "WHERE userpermission.permission_id = :permission_id"
+    ),
+}
+
+
+def seed(connection: Connection, users: int, permissions: int, per_user: int) -> None:
+    """
+    Create the tables without the lookup indexes and fill them.
+
+    Args:
+        connection: Connection with the search path set to the scratch schema
+        users: Number of users
+        permissions: Number of permissions
+        per_user: Number of permissions assigned to each user
+    """
+    SQLModel.metadata.create_all(connection)
+    for index in LOOKUP_INDEXES:
+        connection.execute(text(f"DROP INDEX {index}"))
+
+    connection.execute(
+        text(
+            "INSERT INTO permission (id, uuid, name, description) "
+            "SELECT p, gen_random_uuid(), 'permission_' || p, 'Benchmark permission' "
+            "FROM generate_series(1, :permissions) AS p"
+        ),
+        {"permissions": permissions},
+    )
+    connection.execute(
+        text(
+            'INSERT INTO "user" (id, uuid, email, name, google_id, is_admin, is_active) '
+            "SELECT u, gen_random_uuid(), 'user_' || u || '@example.com', 'User ' || u, "
+            "'google_' || u, false, true "
+            "FROM generate_series(1, :users) AS u"
+        ),
+        {"users": users},
+    )
+    # 13 and the permission count are coprime for the defaults, so the pairs are distinct
+    connection.execute(
+        text(
+            "INSERT INTO userpermission (id, uuid, user_id, permission_id) "
+            "SELECT row_number() OVER (), gen_random_uuid(), "
+            "u, ((u * 7 + k * 13) % :permissions) + 1 "
+            "FROM generate_series(1, :users) AS u, generate_series(0, :per_user - 1) AS k"
+        ),
+        {"users": users, "permissions": permissions, "per_user": per_user},
+    )
+    connection.execute(text("ANALYZE"))
+
+
+def run_queries(
+    connection: Connection, label: str, users: int, permissions: int, runs: int
+) -> list[Timings]:
+    """
+    Time every lookup query with random parameters.
+
+    Args:
+        connection: Connection with the search path set to the scratch schema
+        label: Label appended to the case names
+        users: Number of seeded users
+        permissions: Number of seeded permissions
+        runs: Runs of each query
+
+    Returns:
+        The timings of every query
+    """
+    timings = []
+    for name, query in QUERIES.items():
+        statement = text(query)
+
+        def case():
+            params = {
+                "user_id": random.randint(1, users),
+                "permission_id": random.randint(1, permissions),
+            }
+            connection.execute(statement, params).all()
+
+        plan = connection.execute(
+            text(f"EXPLAIN {query}"), {"user_id": 1, "permission_id": 1}
+        ).all()
+        print(f"[{label}] {name}: {' / '.join(row[0].strip() for row in plan[:2])}")
+
+        timings.append(measure(f"{name} ({label})", runs, case))
+
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Assignment rows to seed")
+    parser.add_argument("--permissions", type=int, default=200, help="Permissions to seed")
+    parser.add_argument("--per-user", type=int, default=10, help="Permissions of each user")
+    parser.add_argument("--runs", type=int, default=200, help="Runs of each query")
+    args = parser.parse_args()
+
+    users = args.rows // args.per_user
+    engine = create_engine(settings.db_dsn_sync)
+
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+
+        try:
+            seed(connection, users, args.permissions, args.per_user)
+            connection.commit()
+
+            timings = run_queries(connection, "before", users, args.permissions, args.runs)
+
+            for create_index in LOOKUP_INDEXES.values():
+                connection.execute(text(create_index))
+            connection.execute(text("ANALYZE userpermission"))
+            connection.commit()
+
+            timings += run_queries(connection, "after", users, args.permissions, args.runs)
+        finally:
+            connection.rollback()
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            connection.commit()
+
+    engine.dispose()
+    print_report(f"userpermission lookups with {users * args.per_user} assignments", timings)
+
+
+if __name__ == "__main__":
+    main()
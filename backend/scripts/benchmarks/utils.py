@@ -0,0 +1,96 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The benchmarks are meant to be run by hand against a disposable database, they are not part
+of the test suite.
+"""
+
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+
+@dataclass
+class Timings:
+    """Latencies, in milliseconds, of the runs of a single benchmark case."""
+
+    name: str
+    samples: list[float]
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    def percentile(self, percentile: int) -> float:
+        """
+        Get a latency percentile.
+
+        Args:
+            percentile: Percentile between 1 and 99
+
+        Returns:
+            The latency, in milliseconds
+        """
+        return statistics.quantiles(self.samples, n=100, method="inclusive")[percentile - 1]
+
+
+def measure(name: str, runs: int, case: Callable[[], object]) -> Timings:
+    """
+    Time a synchronous benchmark case.
+
+    Args:
+        name: Name of the case in the report
+        runs: How many times the case is run
+        case: Function running the case once
+
+    Returns:
+        The timings of every run
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        case()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return Timings(name=name, samples=samples)
+
+
+async def measure_async(name: str, runs: int, case: Callable[[], Awaitable[object]]) -> Timings:
+    """
+    Time an asynchronous benchmark case.
+
+    Args:
+        name: Name of the case in the report
+        runs: How many times the case is run
+        case: Coroutine function running the case once
+
+    Returns:
+        The timings of every run
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await case()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return Timings(name=name, samples=samples)
+
+
+def print_report(title: str, timings: list[Timings]) -> None:
+    """
+    Print the timings as a table.
+
+    Args:
+        title: Title printed above the table
+        timings: Timings of every case
+    """
+    width = max(len(timing.name) for timing in timings)
+
+    print(f"\n{title}")
+    print(f"{'case':<{width}}  {'mean ms':>10}  {'p50 ms':>10}  {'p99 ms':>10}")
+    for timing in timings:
+        print(
+            f"{timing.name:<{width}}  {timing.mean:>10.3f}  "
+            f"{timing.percentile(50):>10.3f}  {timing.percentile(99):>10.3f}"
+        )
@@ -0,0 +1,91 @@
+import sqlalchemy as sa
+from alembic import op
+from typing import Sequence
+
+
+"""userpermission lookup indexes
+
+Revision ID: 3b8d2f61c9a4
+Revises: 5f30f65d13b7
+Create Date: 2025-10-20 10:12:31.417305
+
+"""
+
+# revision identifiers, used by Alembic.
+revision: str = "3b8d2f61c9a4"
+down_revision: str | None = "5f30f65d13b7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+UNIQUE_INDEX = "ix_userpermission_user_id_permission_id"
+LOOKUP_INDEX = "ix_userpermission_permission_id_user_id"
+UNIQUE_INDEX_ATTEMPTS = 3
+
+
+def _delete_duplicates() -> None:
+    # Nothing prevented duplicated assignments so far, keep the oldest one of each pair
+    # so the unique index can be built
+    op.execute(
+        sa.text(
+            "DELETE FROM userpermission AS duplicate "
+            "USING userpermission AS kept "
+            "WHERE duplicate.user_id = kept.user_id "
+            "AND duplicate.permission_id = kept.permission_id "
+            "AND duplicate.id > kept.id"
+        )
+    )
+
+
+def _drop_invalid_index(name: str) -> None:
+    """Drop the index if a failed concurrent build left it behind as INVALID."""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+            "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+        ),
+        {"name": name},
+    )
+    if invalid.scalar() is not None:
+        op.drop_index(name, table_name="userpermission", postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY does not lock writes but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        # Left by a failed build of an earlier run, CREATE would fail with "already exists"
+        for name in (UNIQUE_INDEX, LOOKUP_INDEX):
+            _drop_invalid_index(name)
+
+        # The app keeps assigning while the index is built and may add a duplicate after the
+        # DELETE committed, the build then fails and is retried once they are deleted again
+        for attempt in range(1, UNIQUE_INDEX_ATTEMPTS + 1):
+            _delete_duplicates()
+            try:
+                op.create_index(
+                    UNIQUE_INDEX,
+                    "userpermission",
+                    ["user_id", "permission_id"],
+                    unique=True,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+                break
+            except sa.exc.IntegrityError:
+                _drop_invalid_index(UNIQUE_INDEX)
+                if attempt == UNIQUE_INDEX_ATTEMPTS:
+                    raise
+
+        op.create_index(
+            LOOKUP_INDEX,
+            "userpermission",
+            ["permission_id", "user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(LOOKUP_INDEX, table_name="userpermission", postgresql_concurrently=True)
+        op.drop_index(UNIQUE_INDEX, table_name="userpermission", postgresql_concurrently=True)
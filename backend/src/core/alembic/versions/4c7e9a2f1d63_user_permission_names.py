@@ -0,0 +1,130 @@
+import sqlalchemy as sa
+from alembic import op
+from typing import Sequence
+
+from sqlalchemy.dialects import postgresql
+
+"""user permission names
+
+Revision ID: 4c7e9a2f1d63
+Revises: 8e4c1a7d2b95
+Create Date: 2025-10-29 14:12:37.508116
+
+"""
+
+# revision identifiers, used by Alembic.
+revision: str = "4c7e9a2f1d63"
+down_revision: str | None = "8e4c1a7d2b95"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Copy of src.domain.models.user_permission.PERMISSION_NAMES_DDL as of this revision
+PERMISSION_NAMES_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION refresh_user_permission_names(user_ids integer[])
+    RETURNS void LANGUAGE plpgsql AS $$
+    BEGIN
+        -- Locked first, the UPDATE then sees the assignments committed in the meantime. NO KEY
+        -- UPDATE doesn't conflict with the KEY SHARE locks the userpermission foreign key takes
+        PERFORM 1 FROM "user" WHERE id = ANY(user_ids) ORDER BY id FOR NO KEY UPDATE;
+
+        UPDATE "user" SET permission_names = ARRAY(
+            SELECT permission.name
+            FROM userpermission
+            JOIN permission ON permission.id = userpermission.permission_id
+            WHERE userpermission.user_id = "user".id
+            ORDER BY permission.name
+        )
+        WHERE id = ANY(user_ids);
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION userpermission_refresh_permission_names()
+    RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM refresh_user_permission_names(ARRAY(SELECT DISTINCT user_id FROM new_rows));
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM refresh_user_permission_names(ARRAY(SELECT DISTINCT user_id FROM old_rows));
+        ELSE
+            PERFORM refresh_user_permission_names(ARRAY(
+                SELECT user_id FROM old_rows UNION SELECT user_id FROM new_rows
+            ));
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION permission_refresh_permission_names()
+    RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM refresh_user_permission_names(ARRAY(
+            SELECT user_id FROM userpermission WHERE permission_id = NEW.id
+        ));
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE TRIGGER userpermission_inserted_permission_names
+    AFTER INSERT ON userpermission REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION userpermission_refresh_permission_names()
+    """,
+    """
+    CREATE TRIGGER userpermission_updated_permission_names
+    AFTER UPDATE ON userpermission REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION userpermission_refresh_permission_names()
+    """,
+    """
+    CREATE TRIGGER userpermission_deleted_permission_names
+    AFTER DELETE ON userpermission REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION userpermission_refresh_permission_names()
+    """,
+    """
+    CREATE TRIGGER permission_renamed_permission_names
+    AFTER UPDATE OF name ON permission
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION permission_refresh_permission_names()
+    """,
+]
+
+
+def upgrade() -> None:
+    # A constant default only touches the catalog, the table isn't rewritten
+    op.add_column(
+        "user",
+        sa.Column(
+            "permission_names",
+            postgresql.ARRAY(sa.String()),
+            server_default=sa.text("'{}'"),
+            nullable=False,
+        ),
+    )
+
+    # Triggers first, the assignments changed while backfilling are kept up to date by them
+    for statement in PERMISSION_NAMES_DDL:
+        op.execute(sa.text(statement))
+
+    op.execute(
+        sa.text(
+            'UPDATE "user" SET permission_names = assigned.names '
+            "FROM ("
+            "SELECT userpermission.user_id, array_agg(permission.name ORDER BY permission.name) "
+            "AS names FROM userpermission "
+            "JOIN permission ON permission.id = userpermission.permission_id "
+            "GROUP BY userpermission.user_id"
+            ") AS assigned "
+            'WHERE "user".id = assigned.user_id'
+        )
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DROP TRIGGER permission_renamed_permission_names ON permission"))
+    for event in ("inserted", "updated", "deleted"):
+        op.execute(
+            sa.text(f"DROP TRIGGER userpermission_{event}_permission_names ON userpermission")
+        )
+    op.execute(sa.text("DROP FUNCTION permission_refresh_permission_names()"))
+    op.execute(sa.text("DROP FUNCTION userpermission_refresh_permission_names()"))
+    op.execute(sa.text("DROP FUNCTION refresh_user_permission_names(integer[])"))
+    op.drop_column("user", "permission_names")
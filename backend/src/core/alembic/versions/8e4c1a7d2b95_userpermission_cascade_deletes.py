@@ -0,0 +1,51 @@
+import sqlalchemy as sa
+from alembic import op
+from typing import Sequence
+
+
+"""userpermission cascade deletes
+
+Revision ID: 8e4c1a7d2b95
+Revises: 3b8d2f61c9a4
+Create Date: 2025-10-27 09:41:08.215734
+
+"""
+
+# revision identifiers, used by Alembic.
+revision: str = "8e4c1a7d2b95"
+down_revision: str | None = "3b8d2f61c9a4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+FOREIGN_KEYS = {
+    "userpermission_user_id_fkey": ("user_id", '"user"'),
+    "userpermission_permission_id_fkey": ("permission_id", "permission"),
+}
+
+
+def _replace_foreign_keys(on_delete: str) -> None:
+    # Each step commits on its own, migrations otherwise share one transaction and the lock
+    # taken to swap a constraint would be held until every one of them is done.
+    # NOT VALID skips checking the existing rows, so the table is locked only briefly
+    for name, (column, referred) in FOREIGN_KEYS.items():
+        with op.get_context().autocommit_block():
+            op.execute(
+                sa.text(
+                    f"ALTER TABLE userpermission DROP CONSTRAINT {name}, "
+                    f"ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {referred} (id) "
+                    f"{on_delete} NOT VALID"
+                )
+            )
+
+    # Validating only takes a lock that lets reads and writes go on
+    for name in FOREIGN_KEYS:
+        with op.get_context().autocommit_block():
+            op.execute(sa.text(f"ALTER TABLE userpermission VALIDATE CONSTRAINT {name}"))
+
+
+def upgrade() -> None:
+    _replace_foreign_keys("ON DELETE CASCADE")
+
+
+def downgrade() -> None:
+    _replace_foreign_keys("")
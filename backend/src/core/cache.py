@@ -0,0 +1,122 @@
+"""In-process caches local to each worker."""
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Protocol
+
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.settings import settings
+from src.core.transaction import queue_on_commit
+
+CACHE_HITS = Counter(
+    "cache_hits_total",
+    "Number of cache lookups answered from the cache",
+    ["cache"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+CACHE_MISSES = Counter(
+    "cache_misses_total",
+    "Number of cache lookups that had to go to the source",
+    ["cache"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total",
+    "Number of cache entries dropped because they expired or the cache was full",
+    ["cache", "reason"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+
+
+class TTLCache[K: Hashable, V]:
+    """LRU cache whose entries expire ``ttl`` seconds after being set.
+
+    It is not thread safe, it is meant to be used from the event loop of a single worker.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+        self._hits = CACHE_HITS.labels(cache=name)
+        self._misses = CACHE_MISSES.labels(cache=name)
+        self._expired = CACHE_EVICTIONS.labels(cache=name, reason="expired")
+        self._evicted = CACHE_EVICTIONS.labels(cache=name, reason="size")
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        item = self._data.get(key)
+        if item is None:
+            self._misses.inc()
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._expired.inc()
+            self._misses.inc()
+            return None
+
+        self._data.move_to_end(key)
+        self._hits.inc()
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Set the value, expiring after ``ttl`` seconds or the cache's own ttl if not given."""
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evicted.inc()
+
+    def delete(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class DeletableCache(Protocol):
+    def delete(self, key: Any) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+def delete_on_commit(
+    session: AsyncSession | Session, cache: DeletableCache, key: Hashable | None = None
+) -> None:
+    """Drop the key, or every entry when None, right away and again once the session commits.
+
+    Until the write is committed, a concurrent read still sees the old rows and may cache them
+    again, the second delete drops what it cached.
+    """
+    _delete(cache, key)
+    queue_on_commit(session, "after_commit", _delete_committed, (cache, key))
+
+
+def _delete(cache: DeletableCache, key: Hashable | None):
+    if key is None:
+        cache.clear()
+    else:
+        cache.delete(key)
+
+
+def _delete_committed(session: Session, deletes: list[tuple[DeletableCache, Hashable | None]]):
+    for cache, key in deletes:
+        _delete(cache, key)
@@ -0,0 +1,217 @@
+"""Cache backends the services read through, local to the worker or shared over the network."""
+
+import asyncio
+from collections.abc import Sequence
+from typing import Protocol
+
+from prometheus_client import Counter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.cache import TTLCache
+from src.core.settings import settings
+from src.core.transaction import queue_on_commit
+
+CACHE_BACKEND_ERRORS = Counter(
+    "cache_backend_errors_total",
+    "Number of cache requests that failed and were answered as misses",
+    ["cache"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+
+
+class CacheBackend(Protocol):
+    """Key value store of serialized values with a TTL.
+
+    A backend never fails a read: when the store can't be reached the lookups are misses and
+    the writes are dropped, the callers fall back to the database.
+    """
+
+    name: str
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class MemoryBackend:
+    """CacheBackend over an in-process LRU, every worker has its own copy of the values."""
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        # Every entry is set with its own ttl, the cache's one is never used
+        self.cache: TTLCache[str, bytes] = TTLCache(name=name, maxsize=maxsize, ttl=1)
+
+    async def get(self, key: str) -> bytes | None:
+        return self.cache.get(key)
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]:
+        return [self.cache.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+    async def close(self) -> None:
+        pass
+
+
+class RespError(Exception):
+    """Error reply of the server."""
+
+
+class RespBackend:
+    """CacheBackend over a key value server speaking RESP, the Redis protocol.
+
+    Values are shared by every worker. Commands go one at a time over a single connection,
+    opened on the first command and again after a failure. A command taking longer than
+    ``timeout`` seconds is given up, and the connection with it.
+    """
+
+    def __init__(self, name: str, host: str, port: int, timeout: float, prefix: str = ""):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.prefix = prefix
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+        self._errors = CACHE_BACKEND_ERRORS.labels(cache=name)
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            return await self.execute("GET", self.prefix + key)
+        except (OSError, RespError):
+            return None
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+
+        try:
+            return await self.execute("MGET", *(self.prefix + key for key in keys))
+        except (OSError, RespError):
+            return [None] * len(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        try:
+            await self.execute("SET", self.prefix + key, value, "PX", int(ttl * 1000))
+        except (OSError, RespError):
+            pass
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+
+        try:
+            await self.execute("DEL", *(self.prefix + key for key in keys))
+        except (OSError, RespError):
+            pass
+
+    async def close(self) -> None:
+        self._disconnect()
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def execute(self, *args: str | bytes | int):
+        """Send a command and return its reply, closing the connection if it fails."""
+        async with self._lock:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if self._writer is None:
+                        self._reader, self._writer = await asyncio.open_connection(
+                            self.host, self.port
+                        )
+
+                    self._writer.write(encode_command(args))
+                    await self._writer.drain()
+                    return await read_reply(self._reader)  # type: ignore
+            except RespError:
+                # An error reply leaves the connection usable
+                self._errors.inc()
+                raise
+            except (OSError, EOFError, ValueError) as error:
+                self._errors.inc()
+                self._disconnect()
+                if isinstance(error, OSError):
+                    raise
+                if isinstance(error, EOFError):
+                    raise ConnectionError("Cache server closed the connection") from error
+                # A length or integer that doesn't parse, the rest of the stream can't be read
+                raise ConnectionError("Cache server sent an invalid reply") from error
+            except asyncio.CancelledError:
+                # The reply would be read by the next command otherwise
+                self._disconnect()
+                raise
+
+
+# Deletes started once a session committed, referenced until they are done
+_committed_deletes: set[asyncio.Task[None]] = set()
+
+
+async def delete_keys_on_commit(
+    session: AsyncSession | Session, backend: CacheBackend, *keys: str
+) -> None:
+    """Delete the keys right away and again once the session commits.
+
+    Until the write is committed, a concurrent read still sees the old rows and may cache them
+    again, the second delete drops what it cached. It runs as a task of its own, the commit
+    doesn't wait for it.
+    """
+    await backend.delete(*keys)
+    queue_on_commit(session, "after_commit", _delete_committed, (backend, keys))
+
+
+def _delete_committed(session: Session, deletes: list[tuple[CacheBackend, tuple[str, ...]]]):
+    for backend, keys in deletes:
+        task = asyncio.get_running_loop().create_task(backend.delete(*keys))
+        _committed_deletes.add(task)
+        task.add_done_callback(_committed_deletes.discard)
+
+
+def encode_command(args: Sequence[str | bytes | int]) -> bytes:
+    """Encode a command as an array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        value = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%b\r\n" % (len(value), value))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Read a single reply, bulk strings as bytes and arrays as lists."""
+    line = await reader.readuntil(b"\r\n")
+    kind, value = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return value.decode()
+    if kind == b"-":
+        raise RespError(value.decode())
+    if kind == b":":
+        return int(value)
+    if kind == b"$":
+        length = int(value)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(value)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+
+    raise ConnectionError(f"Unexpected reply {line!r}")
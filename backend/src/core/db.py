@@ -1,6 +1,14 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import time
+from typing import Any
+
+from sqlalchemy import Connection, Engine, event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction
 
 from .settings import settings
+from .transaction import queue_on_commit
 
 async_engine = create_async_engine(
     settings.db_dsn_async,
@@ -12,3 +20,150 @@ async_engine = create_async_engine(
     pool_pre_ping=True,  # ensure the connection is alive before using it
 )
 AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+# Reads don't need a transaction, in autocommit mode no BEGIN nor COMMIT is sent to the database
+async_read_engine = async_engine.execution_options(isolation_level="AUTOCOMMIT")
+
+replica_engines = [
+    create_async_engine(
+        dsn,
+        echo=settings.debug,
+        pool_size=settings.db_replica_pool_size,
+        max_overflow=0,
+        # A busy replica is given up quickly for another one or the primary
+        pool_timeout=settings.db_replica_pool_timeout,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        isolation_level="AUTOCOMMIT",
+    )
+    for dsn in settings.db_replica_dsns_async
+]
+
+
+class ReplicaSet:
+    """Read replicas to pick from, skipping for a while the ones that failed to connect.
+
+    None is picked, so the primary is read from, while every replica is down or for a while
+    after a write was committed, see pin_primary.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], strategy: str, retry_after: float):
+        self.engines = engines
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self._down_until: dict[Engine, float] = {}
+        self._primary_until = 0.0
+        self._next = 0
+
+    def choose(self, exclude: set[Engine] | frozenset[Engine] = frozenset()) -> Engine | None:
+        now = time.monotonic()
+        if self._primary_until > now:
+            return None
+
+        healthy = [
+            engine.sync_engine
+            for engine in self.engines
+            if self._down_until.get(engine.sync_engine, 0) <= now
+            and engine.sync_engine not in exclude
+        ]
+        if not healthy:
+            return None
+
+        if self.strategy == "least_connections":
+            return min(healthy, key=lambda engine: engine.pool.checkedout())  # type: ignore
+
+        self._next += 1
+        return healthy[self._next % len(healthy)]
+
+    def mark_down(self, engine: Engine):
+        self._down_until[engine] = time.monotonic() + self.retry_after
+
+    def pin_primary(self, seconds: float):
+        """Read from the primary for the next seconds, until the replicas caught up."""
+        self._primary_until = max(self._primary_until, time.monotonic() + seconds)
+
+
+class ReadSession(Session):
+    """Session sending its statements to a read replica when there is a healthy one.
+
+    The replica is picked on the first statement and kept until the session is closed. A
+    connection is checked out of its pool when it is picked. A replica that can't be connected
+    to is skipped for a while, one whose pool stays exhausted is skipped by this session only,
+    and another one is picked. The session falls back to its own bind, the primary, when none
+    is left.
+    """
+
+    def __init__(self, *args: Any, replicas: ReplicaSet | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._replica: Engine | None = None
+
+    def get_bind(self, mapper: Any = None, **kwargs: Any) -> Engine | Connection:
+        primary = super().get_bind(mapper, **kwargs)
+        if self.replicas is None:
+            return primary
+
+        busy: set[Engine] = set()
+        while self._replica is None:
+            replica = self.replicas.choose(exclude=busy)
+            if replica is None:
+                self._replica = primary
+                break
+
+            # The connection goes back to the pool, where the first statement checks it out
+            try:
+                with replica.connect():
+                    self._replica = replica
+            except PoolTimeoutError:
+                busy.add(replica)
+            except (DBAPIError, OSError, TimeoutError):
+                self.replicas.mark_down(replica)
+        return self._replica
+
+
+read_replicas = (
+    ReplicaSet(
+        replica_engines,
+        strategy=settings.db_replica_strategy,
+        retry_after=settings.db_replica_retry_after,
+    )
+    if replica_engines
+    else None
+)
+
+
+def _pin_primary(session: Session, writes: list[None]):
+    if read_replicas is not None:
+        read_replicas.pin_primary(settings.db_pin_primary_after_write)
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session: Session, flush_context: UOWTransaction):
+    if settings.db_pin_primary_after_write > 0 and not isinstance(session, ReadSession):
+        queue_on_commit(session, "after_commit", _pin_primary, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state: ORMExecuteState):
+    session = orm_execute_state.session
+    if (
+        settings.db_pin_primary_after_write > 0
+        and not isinstance(session, ReadSession)
+        and (
+            orm_execute_state.is_insert
+            or orm_execute_state.is_update
+            or orm_execute_state.is_delete
+        )
+    ):
+        queue_on_commit(session, "after_commit", _pin_primary, None)
+
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    sync_session_class=ReadSession,
+    expire_on_commit=False,
+    replicas=read_replicas,
+)
+
+# Reads whose results are cached, a lagging replica would cache rows an invalidation dropped
+AsyncPrimaryReadSessionLocal = async_sessionmaker(bind=async_read_engine, expire_on_commit=False)
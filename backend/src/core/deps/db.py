@@ -1,8 +1,9 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.db import AsyncSessionLocal
+from src.core.db import AsyncPrimaryReadSessionLocal, AsyncReadSessionLocal, AsyncSessionLocal
 
 """Dependency for getting a database session."""
 
@@ -16,3 +17,37 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_db_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session in autocommit mode, for requests that only read. Writes are not rolled back."""
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+async def get_db_primary_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session in autocommit mode on the primary, for reads whose results are cached.
+
+    The caches are invalidated once the primary commits, a replica lagging behind would hand
+    the old rows back to be cached again until they expire.
+    """
+    async with AsyncPrimaryReadSessionLocal() as session:
+        yield session
+
+
+@asynccontextmanager
+async def db_stream_session() -> AsyncIterator[AsyncSession]:
+    """
+    Session owned by a streamed response instead of by the request.
+
+    The exit code of dependencies with yield may run before a StreamingResponse is sent, so a
+    stream opens and closes its session itself. The transaction the server side cursors need is
+    rolled back when the stream ends, the session is only meant for reads.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+def get_db_stream_session_factory() -> Callable[[], AbstractAsyncContextManager[AsyncSession]]:
+    return db_stream_session
@@ -0,0 +1,200 @@
+"""Cache invalidation across workers, over Postgres LISTEN/NOTIFY."""
+
+import asyncio
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from typing import Any, Protocol
+
+import asyncpg
+import orjson
+from prometheus_client import Counter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.core.settings import settings
+from src.core.transaction import queue_on_commit
+
+INVALIDATIONS_SENT = Counter(
+    "cache_invalidations_sent_total",
+    "Number of cache invalidations notified to the other workers",
+    ["cache"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+INVALIDATIONS_APPLIED = Counter(
+    "cache_invalidations_applied_total",
+    "Number of cache invalidations received and applied, after coalescing",
+    ["cache"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+LISTENER_RECONNECTS = Counter(
+    "cache_invalidation_reconnects_total",
+    "Number of times the invalidation listener had to connect again",
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+
+# Key invalidating every entry of a cache
+ALL = "*"
+
+# Notification payloads must stay under 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+
+class InvalidatableCache(Protocol):
+    name: str
+
+    def delete(self, key: Any) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+def payloads(invalidations: Iterable[tuple[str, str]]) -> Iterator[str]:
+    """Split (cache, key) pairs in as few JSON payloads as fit in a notification."""
+    batch: list[tuple[str, str]] = []
+    size = 2
+    for invalidation in sorted(invalidations):
+        invalidation_size = len(orjson.dumps(invalidation)) + 1
+        if batch and size + invalidation_size > MAX_PAYLOAD_BYTES:
+            yield orjson.dumps(batch).decode()
+            batch, size = [], 2
+
+        batch.append(invalidation)
+        size += invalidation_size
+
+    if batch:
+        yield orjson.dumps(batch).decode()
+
+
+class InvalidationBus:
+    """Broadcasts the invalidations of in-process caches to every worker.
+
+    Invalidations are queued on the session of the write and sent with pg_notify right before
+    it commits, all of a transaction in as few notifications as possible. Postgres delivers
+    them only once the transaction is committed, so no worker reloads a value before it
+    changed, and drops them on rollback.
+
+    Each worker LISTENs on a dedicated connection and applies what it receives ``debounce``
+    seconds later, so a burst of notifications is coalesced into a single pass over the caches.
+    Notifications sent while the connection is down are lost, the caches are cleared whenever
+    it is established again.
+    """
+
+    def __init__(self, dsn: str, channel: str, debounce: float, retry_after: float):
+        self.dsn = dsn
+        self.channel = channel
+        self.debounce = debounce
+        self.retry_after = retry_after
+        self._caches: dict[str, tuple[InvalidatableCache, Callable[[str], Hashable]]] = {}
+        self._pending: set[tuple[str, str]] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task | None = None
+
+    def register(self, cache: InvalidatableCache, parse_key: Callable[[str], Hashable] = str):
+        """Apply the invalidations of the cache name, keys are parsed back from strings."""
+        self._caches[cache.name] = (cache, parse_key)
+
+    def publish(self, session: AsyncSession | Session, cache: str, key: Hashable | None = None):
+        """Notify every worker, once the session commits, that the key is stale.
+
+        Args:
+            session: Session of the write that made the key stale
+            cache: Name of the cache
+            key: Stale key, None when every entry of the cache is stale
+        """
+        invalidation = (self.channel, cache, ALL if key is None else str(key))
+        queue_on_commit(session, "before_commit", _send_invalidations, invalidation)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def receive(self, payload: str):
+        """Queue the invalidations of a notification, applied once the debounce elapses."""
+        try:
+            invalidations = {(cache, key) for cache, key in orjson.loads(payload)}
+        except (orjson.JSONDecodeError, TypeError, ValueError):
+            return
+
+        self._pending |= invalidations
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.debounce, self.flush)
+
+    def flush(self):
+        self._flush_handle = None
+        pending, self._pending = self._pending, set()
+
+        cleared = {cache for cache, key in pending if key == ALL}
+        for name in cleared & self._caches.keys():
+            self._caches[name][0].clear()
+            INVALIDATIONS_APPLIED.labels(cache=name).inc()
+
+        for name, key in pending:
+            if name in cleared or name not in self._caches:
+                continue
+
+            cache, parse_key = self._caches[name]
+            try:
+                cache.delete(parse_key(key))
+            except ValueError:
+                continue
+            INVALIDATIONS_APPLIED.labels(cache=name).inc()
+
+    def _clear_all(self):
+        for cache, _ in self._caches.values():
+            cache.clear()
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str):
+        self.receive(payload)
+
+    async def _listen(self):
+        while True:
+            try:
+                await self._listen_once()
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                pass
+
+            LISTENER_RECONNECTS.inc()
+            await asyncio.sleep(self.retry_after)
+
+    async def _listen_once(self):
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            await connection.add_listener(self.channel, self._on_notification)
+
+            self._clear_all()
+            await closed.wait()
+        finally:
+            if not connection.is_closed():
+                await connection.close()
+
+
+def _send_invalidations(session: Session, invalidations: list[tuple[str, str, str]]):
+    channels: dict[str, set[tuple[str, str]]] = {}
+    for channel, cache, key in invalidations:
+        channels.setdefault(channel, set()).add((cache, key))
+
+    for channel, pending in channels.items():
+        for payload in payloads(pending):
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": channel, "payload": payload},
+            )
+
+        for cache, _ in pending:
+            INVALIDATIONS_SENT.labels(cache=cache).inc()
@@ -0,0 +1,104 @@
+"""Request scoped batching of lookups by key."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+
+
+class DataLoader[K: Hashable, V]:
+    """Coalesces the loads issued in the same event loop tick into a single batch call.
+
+    Loaded values are memoized for the lifetime of the loader, which is meant to be as long as
+    a request, so it never serves values from another request. Keys the batch call didn't find
+    are answered with None and not memoized, a later load looks them up again. Values returned
+    for keys nobody asked for, like the uuid of a row loaded by id, are memoized too.
+
+    The batches run as tasks of the loader, close it when the request ends so none outlives the
+    session it queries.
+    """
+
+    def __init__(self, batch_load: Callable[[Sequence[K]], Awaitable[dict[K, V]]]):
+        self.batch_load = batch_load
+        self._futures: dict[K, asyncio.Future[V | None]] = {}
+        self._queue: list[K] = []
+        self._dispatch_handle: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._futures[key] = loop.create_future()
+            self._queue.append(key)
+
+            # Dispatched once every task already scheduled had the chance to queue its keys
+            if len(self._queue) == 1:
+                self._dispatch_handle = loop.call_soon(self._dispatch)
+
+        return await future
+
+    def prime(self, key: K, value: V) -> None:
+        """Memoize a value obtained some other way, replacing any known one."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._futures[key] = future
+
+    def clear(self) -> None:
+        """Forget every memoized value, loads already in flight still complete."""
+        self._futures = {key: future for key, future in self._futures.items() if not future.done()}
+
+    def close(self) -> None:
+        """Cancel the batches queued or in flight, and the loads waiting on them."""
+        if self._dispatch_handle is not None:
+            self._dispatch_handle.cancel()
+            self._dispatch_handle = None
+        self._queue = []
+
+        for task in self._tasks:
+            task.cancel()
+
+        # A task cancelled before it started never runs, its loads are cancelled here
+        futures, self._futures = self._futures, {}
+        for future in futures.values():
+            future.cancel()
+
+    def _dispatch(self) -> None:
+        self._dispatch_handle = None
+        keys, self._queue = self._queue, []
+
+        # Referenced until done, the event loop only keeps weak references to its tasks
+        task = asyncio.get_running_loop().create_task(self._load_batch(keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, keys: list[K]) -> None:
+        futures = [self._futures[key] for key in keys]
+        try:
+            values = await self.batch_load(keys)
+        except BaseException as error:
+            # Cancelled or not, the loads waiting on the batch must not be left pending
+            for key, future in zip(keys, futures):
+                self._forget(key, future)
+                if future.done():
+                    continue
+                if isinstance(error, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(error)
+            if not isinstance(error, Exception):
+                raise
+            return
+
+        for key, future in zip(keys, futures):
+            value = values.get(key)
+            if value is None:
+                self._forget(key, future)
+            if not future.done():
+                future.set_result(value)
+
+        for key, value in values.items():
+            if key not in self._futures:
+                self.prime(key, value)
+
+    def _forget(self, key: K, future: asyncio.Future[V | None]) -> None:
+        if self._futures.get(key) is future:
+            del self._futures[key]
@@ -0,0 +1,180 @@
+"""Replay protection for signed requests."""
+
+import hashlib
+import sys
+from typing import Protocol
+
+from prometheus_client import Counter, Gauge
+
+from src.core.cache_backends import RespBackend, RespError
+from src.core.settings import settings
+
+REPLAY_CACHE_ENTRIES = Gauge(
+    "replay_cache_entries",
+    "Number of request signatures kept to detect replays",
+    ["store"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+REPLAY_CACHE_BYTES = Gauge(
+    "replay_cache_bytes",
+    "Approximate memory used by the request signatures kept to detect replays",
+    ["store"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+REPLAY_CACHE_EVICTIONS = Counter(
+    "replay_cache_evictions_total",
+    "Number of request signatures dropped because their window expired or the store was full",
+    ["store", "reason"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+REPLAYED_REQUESTS = Counter(
+    "replayed_requests_total",
+    "Number of signed requests rejected because their signature was already seen",
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+
+
+class NonceStore(Protocol):
+    """Set of seen nonces split in time buckets, so whole windows are dropped at once."""
+
+    async def add(self, bucket: int, nonce: bytes) -> bool:
+        """Record the nonce in the bucket, returning False if it was already there."""
+        ...
+
+    async def drop_before(self, bucket: int) -> None:
+        """Forget every bucket older than the given one."""
+        ...
+
+    async def close(self) -> None: ...
+
+
+class LocalNonceStore:
+    """In-memory NonceStore local to the worker, keeping at most ``maxsize`` nonces.
+
+    When full, the oldest bucket is dropped first, those are the nonces closest to being
+    rejected by the timestamp check anyway.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._buckets: dict[int, set[bytes]] = {}
+        self._size = 0
+        self._nonce_bytes = 0
+
+        self._expired = REPLAY_CACHE_EVICTIONS.labels(store=name, reason="expired")
+        self._evicted = REPLAY_CACHE_EVICTIONS.labels(store=name, reason="size")
+        REPLAY_CACHE_ENTRIES.labels(store=name).set_function(self.__len__)
+        REPLAY_CACHE_BYTES.labels(store=name).set_function(self.memory_usage)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def memory_usage(self) -> int:
+        # Only a handful of buckets are alive, the nonces are accounted for as they come and go
+        return self._nonce_bytes + sum(sys.getsizeof(nonces) for nonces in self._buckets.values())
+
+    async def add(self, bucket: int, nonce: bytes) -> bool:
+        nonces = self._buckets.setdefault(bucket, set())
+        if nonce in nonces:
+            return False
+
+        nonces.add(nonce)
+        self._size += 1
+        self._nonce_bytes += sys.getsizeof(nonce)
+
+        while self._size > self.maxsize:
+            oldest = min(self._buckets)
+            self._evicted.inc(self._drop(oldest))
+
+        return True
+
+    async def drop_before(self, bucket: int) -> None:
+        for old in [old for old in self._buckets if old < bucket]:
+            self._expired.inc(self._drop(old))
+
+    async def close(self) -> None:
+        pass
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._size = 0
+        self._nonce_bytes = 0
+
+    def _drop(self, bucket: int) -> int:
+        nonces = self._buckets.pop(bucket)
+        self._size -= len(nonces)
+        self._nonce_bytes -= sum(sys.getsizeof(nonce) for nonce in nonces)
+        return len(nonces)
+
+
+class RespNonceStore:
+    """NonceStore shared by every worker, as keys set with NX on a RESP key value server.
+
+    Each nonce expires ``ttl`` seconds after being added, there is nothing to drop. When the
+    server can't be reached the nonces go to the ``fallback`` store, so the worker keeps
+    rejecting at least the replays it saw itself.
+    """
+
+    def __init__(self, backend: RespBackend, ttl: float, fallback: NonceStore):
+        self.backend = backend
+        self.ttl = ttl
+        self.fallback = fallback
+
+    async def add(self, bucket: int, nonce: bytes) -> bool:
+        key = f"{self.backend.prefix}nonce:{bucket}:{nonce.hex()}"
+        try:
+            reply = await self.backend.execute("SET", key, b"1", "PX", int(self.ttl * 1000), "NX")
+        except (OSError, RespError):
+            return await self.fallback.add(bucket, nonce)
+        # Null when the key already exists
+        return reply is not None
+
+    async def drop_before(self, bucket: int) -> None:
+        await self.fallback.drop_before(bucket)
+
+    async def close(self) -> None:
+        await self.backend.close()
+        await self.fallback.close()
+
+
+class ReplayGuard:
+    """Rejects signatures already seen while their timestamp is still accepted.
+
+    Signatures are bucketed by their timestamp in windows as wide as ``window`` milliseconds,
+    the signing threshold, so a bucket can be dropped as soon as every timestamp in it is
+    older than the threshold. Only the buckets of the last two or three windows are kept.
+    """
+
+    def __init__(self, store: NonceStore, window: int):
+        self.store = store
+        self.window = window
+
+    async def check(self, request: str, signature: str, timestamp: str, now: float) -> bool:
+        """Record the signature of the request, returning False if it is a replay.
+
+        The signature covers the method, body and timestamp but not the path, so two bodyless
+        requests signed in the same millisecond share it. The nonce is keyed on the request too.
+
+        Args:
+            request: Method, path and query of the request
+            signature: Hex request signature, already verified
+            timestamp: Request timestamp in milliseconds, already checked against the window
+            now: Current time in milliseconds
+
+        Returns:
+            Whether the signature is seen for the first time
+        """
+        await self.store.drop_before(int((now - self.window) // self.window))
+
+        bucket = int(float(timestamp) // self.window)
+        nonce = hashlib.sha256(f"{request}|{signature}".encode()).digest()
+        if await self.store.add(bucket, nonce):
+            return True
+
+        REPLAYED_REQUESTS.inc()
+        return False
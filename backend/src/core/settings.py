@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field, PostgresDsn, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -21,10 +23,61 @@ class Settings(BaseSettings):
     db_port: int = Field(default=5432, title="Database port")
     db_password: str = Field(default="password", title="Database password")
     db_pool_size: int = Field(default=10, title="Database pool size")
+    db_replica_hosts: str = Field(
+        default="", title="Comma separated read replica hosts, as host or host:port"
+    )
+    db_replica_pool_size: int = Field(default=10, title="Pool size of each read replica")
+    db_replica_strategy: Literal["round_robin", "least_connections"] = Field(
+        default="round_robin", title="How a read replica is picked for a session"
+    )
+    db_replica_retry_after: int = Field(
+        default=30, title="Seconds before a failed read replica is tried again"
+    )
+    db_replica_pool_timeout: float = Field(
+        default=1, title="Seconds to wait for a replica connection before reading elsewhere"
+    )
+    db_pin_primary_after_write: float = Field(
+        default=0, title="Seconds reads stay on the primary after the worker commits a write"
+    )
 
     # Api
     timestamp_signing_threshold: int = Field(default=120000, title="Timestamp signing threshold")
     secret_key: str = Field(default="secret", title="Secret key for signing")
+    signature_spool_size: int = Field(
+        default=1024 * 1024, title="Size above which signed bodies are spooled to disk"
+    )
+    replay_cache_size: int = Field(
+        default=500000, title="Max request signatures kept to detect replays"
+    )
+    replay_store: Literal["memory", "resp"] = Field(
+        default="memory", title="Where request signatures are kept, per worker or shared"
+    )
+
+    # Cache
+    permission_cache_size: int = Field(default=10000, title="Permission cache max entries")
+    permission_cache_ttl: int = Field(default=60, title="Permission cache TTL in seconds")
+    permission_bitsets_ttl: int = Field(
+        default=60, title="Permission bitsets snapshot TTL in seconds, 0 to not keep it"
+    )
+    lookup_cache_backend: Literal["memory", "resp"] = Field(
+        default="memory", title="Where user and permission lookups are cached"
+    )
+    lookup_cache_size: int = Field(default=10000, title="Lookup cache max entries, in memory")
+    lookup_cache_ttl: int = Field(default=60, title="Lookup cache TTL in seconds")
+    cache_host: str = Field(default="localhost", title="Host of the RESP cache server")
+    cache_port: int = Field(default=6379, title="Port of the RESP cache server")
+    cache_timeout: float = Field(
+        default=0.1, title="Seconds before a cache request is given up for the database"
+    )
+    invalidation_channel: str = Field(
+        default="cache_invalidation", title="Postgres channel cache invalidations are sent on"
+    )
+    invalidation_debounce: float = Field(
+        default=0.05, title="Seconds received invalidations are coalesced for before applied"
+    )
+    invalidation_retry_after: int = Field(
+        default=5, title="Seconds before the invalidation listener connects again"
+    )
 
     # App
     debug: bool = Field(default=True, title="Debug mode")
@@ -59,5 +112,25 @@ class Settings(BaseSettings):
             )
         )
 
+    @computed_field
+    @property
+    def db_replica_dsns_async(self) -> list[str]:
+        dsns = []
+        for replica in filter(None, (host.strip() for host in self.db_replica_hosts.split(","))):
+            host, _, port = replica.partition(":")
+            dsns.append(
+                str(
+                    PostgresDsn.build(
+                        scheme="postgresql+asyncpg",
+                        username=self.db_user,
+                        password=self.db_password,
+                        host=host,
+                        port=int(port) if port else self.db_port,
+                        path=self.db_name,
+                    )
+                )
+            )
+        return dsns
+
 
 settings = Settings()
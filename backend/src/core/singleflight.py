@@ -0,0 +1,66 @@
+"""Coalescing of concurrent identical calls, local to each worker."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+from prometheus_client import Counter
+
+from src.core.settings import settings
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Number of calls, by whether they ran or shared the result of one in flight",
+    ["flight", "outcome"],
+    namespace=settings.namespace,
+    subsystem=settings.name,
+)
+
+
+class SingleFlight[K: Hashable, V]:
+    """Runs a single call per key at a time, concurrent callers of the key share its result.
+
+    Nothing is kept once the call completes, the next caller runs it again. An error is raised
+    to every caller waiting on it. When the caller running it is cancelled, like on a client
+    disconnect, one of the waiting callers runs it instead.
+
+    It is not thread safe, it is meant to be used from the event loop of a single worker.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: dict[K, asyncio.Future[V]] = {}
+
+        self._led = SINGLEFLIGHT_CALLS.labels(flight=name, outcome="led")
+        self._shared = SINGLEFLIGHT_CALLS.labels(flight=name, outcome="shared")
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: K, call: Callable[[], Awaitable[V]]) -> V:
+        while (flight := self._flights.get(key)) is not None:
+            self._shared.inc()
+            try:
+                # Shielded so a waiting caller being cancelled doesn't cancel the others
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        self._led.inc()
+        try:
+            result = await call()
+        except Exception as error:
+            flight.set_exception(error)
+            # Retrieved here, asyncio would log it when nobody else was waiting
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            # Cancelled, the callers waiting on it start over
+            if not flight.done():
+                flight.cancel()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
@@ -0,0 +1,51 @@
+"""Work deferred to the end of the transaction of a session."""
+
+from collections.abc import Callable
+from typing import Any, Literal
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+_SESSION_KEY = "queued_on_commit"
+
+type Phase = Literal["before_commit", "after_commit"]
+
+
+def queue_on_commit[T](
+    session: AsyncSession | Session,
+    phase: Phase,
+    run: Callable[[Session, list[T]], None],
+    item: T,
+) -> None:
+    """Queue the item for ``run``, called right before or right after the session commits.
+
+    Every item queued for the same ``run`` in the transaction is passed to it in a single call,
+    in the order they were queued. They are dropped when the outermost transaction rolls back,
+    a rolled back savepoint keeps them.
+    """
+    sync_session = session.sync_session if isinstance(session, AsyncSession) else session
+    queues = sync_session.info.setdefault(_SESSION_KEY, {}).setdefault(phase, {})
+    queues.setdefault(run, []).append(item)
+
+
+def _run(session: Session, phase: Phase):
+    queues = session.info.get(_SESSION_KEY, {}).pop(phase, {})
+    for run, items in queues.items():
+        run(session, items)
+
+
+@event.listens_for(Session, "before_commit")
+def _run_before_commit(session: Session):
+    _run(session, "before_commit")
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit(session: Session):
+    _run(session, "after_commit")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_queued(session: Session, previous_transaction: Any):
+    if previous_transaction.parent is None:
+        session.info.pop(_SESSION_KEY, None)
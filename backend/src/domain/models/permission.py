@@ -25,3 +25,10 @@ class PermissionUpdate(SQLModel):
 
 class PermissionPublic(PermissionBase):
     uuid: UUID = Field()
+
+
+class PermissionBatch(SQLModel):
+    permissions: list[PermissionPublic] = Field(description="Permissions found, in request order")
+    missing: list[UUID] = Field(
+        description="Requested UUIDs without a permission, in request order"
+    )
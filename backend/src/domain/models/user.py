@@ -1,5 +1,7 @@
 from uuid import UUID
 
+from sqlalchemy import Column, String, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import Field, SQLModel
 from uuid6 import uuid7
 
@@ -15,6 +17,12 @@ class UserBase(SQLModel):
 class User(UserBase, table=True):
     id: int = Field(primary_key=True)
     uuid: UUID = Field(default_factory=uuid7, index=True, unique=True)
+    # Names of the permissions held, sorted. Written only by the triggers of userpermission and
+    # permission, in the transaction of the change, see user_permission.PERMISSION_NAMES_DDL
+    permission_names: list[str] = Field(
+        default_factory=list,
+        sa_column=Column(ARRAY(String), nullable=False, server_default=text("'{}'")),
+    )
 
 
 class UserCreate(UserBase):
@@ -34,3 +42,21 @@ class UserPublic(UserBase):
 
 class UserWithPermissions(UserPublic):
     permissions: list[str] = Field(default_factory=list, description="List of permission names")
+
+
+class UserBulkConflict(SQLModel):
+    index: int = Field(description="Position of the row in the request")
+    email: str = Field(title="User email")
+    google_id: str = Field(title="Google OAuth ID")
+
+
+class UserBulkCreateResult(SQLModel):
+    created: list[UUID] = Field(description="UUIDs of the created users, in request order")
+    conflicts: list[UserBulkConflict] = Field(
+        description="Rows skipped because their email or Google ID is already taken"
+    )
+
+
+class UserBatch(SQLModel):
+    users: list[UserPublic] = Field(description="Users found, in request order")
+    missing: list[UUID] = Field(description="Requested UUIDs without a user, in request order")
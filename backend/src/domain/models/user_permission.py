@@ -1,5 +1,7 @@
+from enum import StrEnum
 from uuid import UUID
 
+from sqlalchemy import DDL, Index, event
 from sqlmodel import Field, SQLModel
 from uuid6 import uuid7
 
@@ -10,10 +12,96 @@ class UserPermissionBase(SQLModel):
 
 
 class UserPermission(UserPermissionBase, table=True):
+    __table_args__ = (
+        Index("ix_userpermission_user_id_permission_id", "user_id", "permission_id", unique=True),
+        Index("ix_userpermission_permission_id_user_id", "permission_id", "user_id"),
+    )
+
     id: int = Field(primary_key=True)
     uuid: UUID = Field(default_factory=uuid7, index=True, unique=True)
-    user_id: int = Field(foreign_key="user.id", title="User ID")
-    permission_id: int = Field(foreign_key="permission.id", title="Permission ID")
+    # Assignments go away with their user or permission, in the same DELETE statement
+    user_id: int = Field(foreign_key="user.id", ondelete="CASCADE", title="User ID")
+    permission_id: int = Field(
+        foreign_key="permission.id", ondelete="CASCADE", title="Permission ID"
+    )
+
+
+# Keep user.permission_names up to date, in the transaction of every change to the assignments
+# or to the permission names. Statement level triggers refresh each affected user once, whatever
+# the number of assignments changed by the statement. Renames fire per permission, and only
+# when the name changed, a column list can't be combined with transition tables.
+# Created by migration 4c7e9a2f1d63 too.
+PERMISSION_NAMES_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION refresh_user_permission_names(user_ids integer[])
+    RETURNS void LANGUAGE plpgsql AS $$
+    BEGIN
+        -- Locked first, the UPDATE then sees the assignments committed in the meantime. NO KEY
+        -- UPDATE doesn't conflict with the KEY SHARE locks the userpermission foreign key takes
+        PERFORM 1 FROM "user" WHERE id = ANY(user_ids) ORDER BY id FOR NO KEY UPDATE;
+
+        UPDATE "user" SET permission_names = ARRAY(
+            SELECT permission.name
+            FROM userpermission
+            JOIN permission ON permission.id = userpermission.permission_id
+            WHERE userpermission.user_id = "user".id
+            ORDER BY permission.name
+        )
+        WHERE id = ANY(user_ids);
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION userpermission_refresh_permission_names()
+    RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM refresh_user_permission_names(ARRAY(SELECT DISTINCT user_id FROM new_rows));
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM refresh_user_permission_names(ARRAY(SELECT DISTINCT user_id FROM old_rows));
+        ELSE
+            PERFORM refresh_user_permission_names(ARRAY(
+                SELECT user_id FROM old_rows UNION SELECT user_id FROM new_rows
+            ));
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION permission_refresh_permission_names()
+    RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM refresh_user_permission_names(ARRAY(
+            SELECT user_id FROM userpermission WHERE permission_id = NEW.id
+        ));
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE TRIGGER userpermission_inserted_permission_names
+    AFTER INSERT ON userpermission REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION userpermission_refresh_permission_names()
+    """,
+    """
+    CREATE TRIGGER userpermission_updated_permission_names
+    AFTER UPDATE ON userpermission REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION userpermission_refresh_permission_names()
+    """,
+    """
+    CREATE TRIGGER userpermission_deleted_permission_names
+    AFTER DELETE ON userpermission REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION userpermission_refresh_permission_names()
+    """,
+    """
+    CREATE TRIGGER permission_renamed_permission_names
+    AFTER UPDATE OF name ON permission
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION permission_refresh_permission_names()
+    """,
+]
+
+for statement in PERMISSION_NAMES_DDL:
+    # userpermission is created last, once the user and permission tables exist
+    event.listen(UserPermission.__table__, "after_create", DDL(statement))
 
 
 class UserPermissionCreate(UserPermissionBase):
@@ -24,3 +112,30 @@ class UserPermissionPublic(SQLModel):
     uuid: UUID = Field()
     user_uuid: UUID = Field(title="User UUID")
     permission_uuid: UUID = Field(title="Permission UUID")
+
+
+class UserPermissionCheck(SQLModel):
+    user_uuid: UUID = Field(title="User UUID")
+    permission_name: str = Field(title="Permission name")
+
+
+class UserPermissionCheckResult(UserPermissionCheck):
+    has_permission: bool = Field(title="Whether the user holds the permission")
+
+
+class UserPermissionPair(SQLModel):
+    user_uuid: UUID = Field(title="User UUID")
+    permission_uuid: UUID = Field(title="Permission UUID")
+
+
+class UserPermissionOutcome(StrEnum):
+    ASSIGNED = "assigned"
+    ALREADY_ASSIGNED = "already_assigned"
+    REVOKED = "revoked"
+    NOT_ASSIGNED = "not_assigned"
+    USER_NOT_FOUND = "user_not_found"
+    PERMISSION_NOT_FOUND = "permission_not_found"
+
+
+class UserPermissionPairResult(UserPermissionPair):
+    outcome: UserPermissionOutcome = Field(title="What happened to the pair")
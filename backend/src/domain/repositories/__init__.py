@@ -7,8 +7,14 @@ real world, like user.
 It concerns only in operating with the data, not how it is stored or presented.
 """
 
-__all__ = ["UserRepository", "PermissionRepository", "UserPermissionRepository"]
+__all__ = [
+    "UserRepository",
+    "PermissionRepository",
+    "UserPermissionRepository",
+    "PermissionBitsetRepository",
+]
 
 from .user import UserRepository
 from .permission import PermissionRepository
 from .user_permission import UserPermissionRepository
+from .permission_bitset import PermissionBitsetRepository
@@ -1,17 +1,26 @@
+from collections.abc import Sequence
 from uuid import UUID
 
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy import Row, Uuid, any_, bindparam, delete
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import or_, select
 
+from src.core.loader import DataLoader
 from src.domain.models import Permission
 from src.domain.models.permission import PermissionCreate, PermissionUpdate
 from src.domain.repositories.exceptions import NoPermissionFound
+from src.domain.repositories.statements import update_by_uuid_statement
+
+# Columns selected by the row variants, the public fields and the id cursors are built from
+ROW_COLUMNS = (Permission.id, Permission.uuid, Permission.name, Permission.description)
 
 
 class PermissionRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        # Lives as long as the repository, that is as long as the request and its session
+        self.loader: DataLoader[int | UUID, Permission] = DataLoader(self._load)
 
     async def create(self, permission_create: PermissionCreate) -> Permission:
         permission = Permission(**permission_create.model_dump(exclude_unset=True))
@@ -22,18 +31,49 @@ class PermissionRepository:
         return permission
 
     async def get(self, permission_id: int | UUID) -> Permission:
-        statement = select(Permission)
+        """Get a permission by id or uuid, batched with the other gets of the same loop tick."""
+        permission = await self.loader.load(permission_id)
+        if permission is None:
+            raise NoPermissionFound("Permission not found")
+        return permission
+
+    async def _load(self, keys: Sequence[int | UUID]) -> dict[int | UUID, Permission]:
+        """Load the permissions of a batch of ids and uuids in a single query."""
+        ids = [key for key in keys if isinstance(key, int)]
+        uuids = [key for key in keys if not isinstance(key, int)]
+        statement = select(Permission).where(
+            or_(Permission.id.in_(ids), Permission.uuid.in_(uuids))  # type: ignore
+        )
+
+        result = await self.session.execute(statement)
+        permissions = result.scalars().all()
+        return {
+            key: permission
+            for permission in permissions
+            for key in (permission.id, permission.uuid)
+        }
+
+    async def get_many(self, permission_uuids: Sequence[UUID]) -> list[Row]:
+        """Get the ROW_COLUMNS of the permissions with any of the uuids, in no particular order."""
+        if not permission_uuids:
+            return []
+
+        statement = select(*ROW_COLUMNS).where(
+            Permission.uuid == any_(bindparam("uuids", list(permission_uuids), type_=ARRAY(Uuid)))
+        )
 
-        if isinstance(permission_id, int):
-            statement = statement.where(Permission.id == permission_id)
-        else:
-            statement = statement.where(Permission.uuid == permission_id)
+        result = await self.session.execute(statement)
+        return list(result.all())
+
+    async def get_id(self, permission_uuid: UUID) -> int:
+        """Get only the id of the permission, to filter by it without loading the whole row."""
+        statement = select(Permission.id).where(Permission.uuid == permission_uuid)
+        result = await self.session.execute(statement)
 
-        try:
-            result = await self.session.execute(statement)
-            return result.scalar_one()
-        except NoResultFound as error:
-            raise NoPermissionFound("Permission not found") from error
+        permission_id = result.scalar_one_or_none()
+        if permission_id is None:
+            raise NoPermissionFound("Permission not found")
+        return permission_id
 
     async def get_by_name(self, name: str) -> Permission | None:
         statement = select(Permission).where(Permission.name == name)
@@ -51,12 +91,64 @@ class PermissionRepository:
         await self.session.flush()
         return permission
 
+    async def update_by_uuid(
+        self, permission_uuid: UUID, permission_update: PermissionUpdate
+    ) -> Permission:
+        """Update only the fields set on permission_update in a single statement."""
+        values = permission_update.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get(permission_uuid)
+
+        statement = update_by_uuid_statement(Permission, tuple(sorted(values)))
+        params = {f"value_{field}": value for field, value in values.items()}
+        result = await self.session.execute(statement, {"match_uuid": permission_uuid, **params})
+
+        permission = result.scalar_one_or_none()
+        if permission is None:
+            raise NoPermissionFound("Permission not found")
+        return permission
+
     async def delete(self, permission: Permission) -> None:
         await self.session.delete(permission)
         await self.session.flush()
+        self.loader.clear()
+
+    async def delete_by_uuid(self, permission_uuid: UUID) -> None:
+        """Delete the permission, and its assignments by cascade, without loading it first."""
+        statement = (
+            delete(Permission)
+            .where(Permission.uuid == permission_uuid)  # type: ignore
+            .returning(Permission.id)  # type: ignore
+        )
+        result = await self.session.execute(statement)
+
+        if result.scalar_one_or_none() is None:
+            raise NoPermissionFound("Permission not found")
+        self.loader.clear()
 
     async def list_all(self, skip: int = 0, limit: int = 100) -> list[Permission]:
-        statement = select(Permission).offset(skip).limit(limit)
+        statement = select(Permission).order_by(Permission.id).offset(skip).limit(limit)  # type: ignore
 
         result = await self.session.execute(statement)
         return list(result.scalars().all())
+
+    async def list_all_rows(self, skip: int = 0, limit: int = 100) -> list[Row]:
+        """Like list_all, as plain rows of ROW_COLUMNS instead of identity mapped permissions."""
+        statement = (
+            select(*ROW_COLUMNS).order_by(Permission.id).offset(skip).limit(limit)  # type: ignore
+        )
+
+        result = await self.session.execute(statement)
+        return list(result.all())
+
+    async def list_after_rows(self, after_id: int | None = None, limit: int = 100) -> list[Row]:
+        """List in id order starting after the given id, the cost doesn't grow with the page.
+
+        Plain rows of ROW_COLUMNS are returned instead of identity mapped permissions.
+        """
+        statement = select(*ROW_COLUMNS).order_by(Permission.id).limit(limit)  # type: ignore
+        if after_id is not None:
+            statement = statement.where(Permission.id > after_id)
+
+        result = await self.session.execute(statement)
+        return list(result.all())
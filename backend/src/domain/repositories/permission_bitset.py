@@ -0,0 +1,194 @@
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from uuid import UUID
+
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from src.domain.models import Permission, User, UserPermission
+
+
+def encode_bitset(bits: int) -> bytes:
+    """Serialize a bitset in as few bytes as it takes, to cache or store it."""
+    return bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+
+
+def decode_bitset(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Positions of the set bits, in increasing order.
+
+    Scans the bytes of the bitset, so the cost follows its size and not the number of set bits
+    times its size, like shifting the int would.
+    """
+    for index, byte in enumerate(encode_bitset(bits)):
+        while byte:
+            lowest = byte & -byte
+            yield index * 8 + lowest.bit_length() - 1
+            byte ^= lowest
+
+
+class PermissionBitsets:
+    """
+    Snapshot of the grants of every user, as bitsets.
+
+    Each permission has a dense bit position and the grants of a user are an int with the bits
+    of their permissions set, so checking one is a bit test. Each user has a dense number too
+    and the holders of a permission are an int with the bits of their numbers set, so the users
+    holding a set of permissions are found with bitwise ands over machine words instead of a
+    loop over the users.
+
+    Positions and numbers are only meaningful within the snapshot. Admins hold every
+    permission when checked, the holders of a permission are only the users it was granted to.
+    """
+
+    def __init__(
+        self,
+        permission_names: Sequence[str],
+        grants: Mapping[UUID, Iterable[int]],
+        permission_uuids: Sequence[UUID] = (),
+        admins: Iterable[UUID] = (),
+    ):
+        """
+        Args:
+            permission_names: Names of the permissions, in the order of their bit position
+            grants: Bit positions of the permissions held, by user uuid
+            permission_uuids: Uuids of the permissions, in the order of their bit position
+            admins: Uuids of the admins, each of them must be in grants too
+        """
+        self.permission_names = list(permission_names)
+        self.positions = {name: position for position, name in enumerate(self.permission_names)}
+        self._names_by_uuid = dict(zip(permission_uuids, self.permission_names))
+        self.admins = frozenset(admins)
+
+        self.user_uuids = list(grants)
+        self._numbers = {uuid: number for number, uuid in enumerate(self.user_uuids)}
+
+        self.user_bits: list[int] = []
+        holders = [bytearray((len(self.user_uuids) + 7) // 8) for _ in self.permission_names]
+        for number, positions in enumerate(grants.values()):
+            bits = 0
+            for position in positions:
+                bits |= 1 << position
+                holders[position][number // 8] |= 1 << number % 8
+            self.user_bits.append(bits)
+
+        # Built from bytes, setting the bits of the ints one by one copies them every time
+        self.permission_bits = [int.from_bytes(holder, "little") for holder in holders]
+
+    def __len__(self) -> int:
+        return len(self.user_uuids)
+
+    def __contains__(self, user_uuid: UUID) -> bool:
+        return user_uuid in self._numbers
+
+    def permission_name(self, permission_uuid: UUID) -> str | None:
+        """Name of the permission, None if it isn't part of the snapshot."""
+        return self._names_by_uuid.get(permission_uuid)
+
+    def mask(self, permission_names: Iterable[str]) -> int | None:
+        """Bitset of the permissions, None if any of them is unknown."""
+        bits = 0
+        for name in permission_names:
+            position = self.positions.get(name)
+            if position is None:
+                return None
+            bits |= 1 << position
+        return bits
+
+    def user_bitset(self, user_uuid: UUID) -> int:
+        """Grants of the user, empty for a user without any."""
+        number = self._numbers.get(user_uuid)
+        return 0 if number is None else self.user_bits[number]
+
+    def user_permission_names(self, user_uuid: UUID) -> list[str]:
+        return [
+            self.permission_names[position] for position in iter_bits(self.user_bitset(user_uuid))
+        ]
+
+    def has_permission(self, user_uuid: UUID, permission_name: str) -> bool:
+        if user_uuid in self.admins:
+            return True
+
+        position = self.positions.get(permission_name)
+        if position is None:
+            return False
+        return bool(self.user_bitset(user_uuid) >> position & 1)
+
+    def has_permissions(self, user_uuid: UUID, permission_names: Iterable[str]) -> bool:
+        """Whether the user holds every one of the permissions."""
+        if user_uuid in self.admins:
+            return True
+
+        mask = self.mask(permission_names)
+        return mask is not None and self.user_bitset(user_uuid) & mask == mask
+
+    def holders(self, permission_names: Iterable[str]) -> int:
+        """Bitset of the numbers of the users holding every one of the permissions.
+
+        Empty when no permission is given, rather than every user of the snapshot.
+        """
+        permission_names = list(permission_names)
+        if not permission_names:
+            return 0
+
+        holders = (1 << len(self.user_uuids)) - 1
+        for name in permission_names:
+            position = self.positions.get(name)
+            if position is None:
+                return 0
+            holders &= self.permission_bits[position]
+        return holders
+
+    def users_with(self, *permission_names: str) -> list[UUID]:
+        """Uuids of the users holding every one of the permissions."""
+        return [self.user_uuids[number] for number in iter_bits(self.holders(permission_names))]
+
+    def count_users_with(self, *permission_names: str) -> int:
+        return self.holders(permission_names).bit_count()
+
+
+class PermissionBitsetRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def load(self) -> PermissionBitsets:
+        """
+        Load the grants of every user as bitsets, in two queries.
+
+        Permissions are given their bit position by their rank by id, only the admins and the
+        users holding any permission are loaded.
+        """
+        statement = select(Permission.id, Permission.uuid, Permission.name).order_by(
+            Permission.id  # type: ignore
+        )
+        permissions = (await self.session.execute(statement)).all()
+        positions = {permission.id: position for position, permission in enumerate(permissions)}
+
+        statement = (
+            select(User.uuid, User.is_admin, func.array_agg(UserPermission.permission_id))
+            .outerjoin(UserPermission, UserPermission.user_id == User.id)  # type: ignore
+            .where(or_(User.is_admin, UserPermission.user_id.is_not(None)))  # type: ignore
+            .group_by(User.id)
+            .order_by(User.id)
+        )
+        rows = (await self.session.execute(statement)).all()
+
+        # An admin without grants aggregates a NULL, and a permission created after the first
+        # query has no position, both are left out
+        grants = {
+            uuid: [
+                positions[permission_id]
+                for permission_id in permission_ids
+                if permission_id in positions
+            ]
+            for uuid, _, permission_ids in rows
+        }
+        return PermissionBitsets(
+            [permission.name for permission in permissions],
+            grants,
+            permission_uuids=[permission.uuid for permission in permissions],
+            admins=[uuid for uuid, is_admin, _ in rows if is_admin],
+        )
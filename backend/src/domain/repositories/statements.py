@@ -0,0 +1,30 @@
+"""Statements shared by the repositories, built once per shape and reused."""
+
+from functools import lru_cache
+
+from sqlalchemy import Update, bindparam, update
+from sqlmodel import SQLModel
+
+
+@lru_cache(maxsize=128)
+def update_by_uuid_statement(model: type[SQLModel], fields: tuple[str, ...]) -> Update:
+    """
+    UPDATE of the given fields of the row with a uuid, returning the updated entity.
+
+    The values are bound at execution, ``match_uuid`` for the row and ``value_<field>`` for
+    each field, so a single statement is built for every set of fields.
+
+    Args:
+        model: Table model with a uuid column
+        fields: Names of the columns to set, in a stable order
+
+    Returns:
+        The statement, to execute with populate_existing so loaded objects are refreshed
+    """
+    return (
+        update(model)
+        .where(model.uuid == bindparam("match_uuid"))  # type: ignore
+        .values({field: bindparam(f"value_{field}") for field in fields})
+        .returning(model)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
@@ -1,17 +1,48 @@
+from collections.abc import AsyncIterator, Sequence
 from uuid import UUID
 
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy import Boolean, Row, String, Uuid, any_, bindparam, delete, func, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import or_, select
+from uuid6 import uuid7
 
+from src.core.loader import DataLoader
 from src.domain.models import User
 from src.domain.models.user import UserCreate, UserUpdate
 from src.domain.repositories.exceptions import NoUserFound
+from src.domain.repositories.statements import update_by_uuid_statement
+
+# Columns selected by the row variants, the public fields and the id cursors are built from
+ROW_COLUMNS = (
+    User.id,
+    User.uuid,
+    User.email,
+    User.name,
+    User.google_id,
+    User.is_admin,
+    User.is_active,
+)
+
+# Columns written by bulk_create, with the type of their array parameter
+BULK_COLUMNS = {
+    "uuid": Uuid,
+    "email": String,
+    "name": String,
+    "google_id": String,
+    "is_admin": Boolean,
+    "is_active": Boolean,
+}
+# Rows inserted by each unnest statement, and batch size from which COPY is used instead
+BULK_CHUNK_SIZE = 10000
+BULK_COPY_THRESHOLD = 50000
 
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        # Lives as long as the repository, that is as long as the request and its session
+        self.loader: DataLoader[int | UUID, User] = DataLoader(self._load)
 
     async def create(self, user_create: UserCreate) -> User:
         user = User(**user_create.model_dump(exclude_unset=True))
@@ -21,19 +52,130 @@ class UserRepository:
 
         return user
 
-    async def get(self, user_id: int | UUID) -> User:
-        statement = select(User)
+    async def bulk_create(self, user_creates: Sequence[UserCreate]) -> list[UUID | None]:
+        """
+        Create many users in a handful of statements, skipping the conflicting ones.
+
+        A row conflicts when its email or google id is already taken, by an existing user or an
+        earlier row of the batch.
+
+        Args:
+            user_creates: Users to create
+
+        Returns:
+            The uuid of each created user in the order of the input, None for the skipped rows
+        """
+        rows = [
+            (uuid7(), user.email, user.name, user.google_id, user.is_admin, user.is_active)
+            for user in user_creates
+        ]
 
-        if isinstance(user_id, int):
-            statement = statement.where(User.id == user_id)
+        if len(rows) >= BULK_COPY_THRESHOLD:
+            inserted = await self._copy_insert(rows)
         else:
-            statement = statement.where(User.uuid == user_id)
+            inserted = set()
+            for start in range(0, len(rows), BULK_CHUNK_SIZE):
+                inserted |= await self._unnest_insert(rows[start : start + BULK_CHUNK_SIZE])
+
+        return [row[0] if row[0] in inserted else None for row in rows]
+
+    async def _unnest_insert(self, rows: list[tuple]) -> set[UUID]:
+        """Insert the rows as one array parameter per column, whatever the number of rows."""
+        source = (
+            func.unnest(
+                *(
+                    bindparam(column, list(values), type_=ARRAY(column_type))
+                    for (column, column_type), values in zip(BULK_COLUMNS.items(), zip(*rows))
+                )
+            )
+            .table_valued(*BULK_COLUMNS, with_ordinality="position")
+            .render_derived()
+        )
+        # Inserted in input order, so the first of the rows repeating a value is kept
+        rows_select = select(*(source.c[column] for column in BULK_COLUMNS)).order_by(
+            source.c.position
+        )
+        statement = (
+            insert(User.__table__)  # type: ignore
+            .from_select(list(BULK_COLUMNS), rows_select)
+            .on_conflict_do_nothing()
+            .returning(User.__table__.c.uuid)  # type: ignore
+        )
+
+        result = await self.session.execute(statement)
+        return set(result.scalars().all())
+
+    async def _copy_insert(self, rows: list[tuple]) -> set[UUID]:
+        """Stream the rows with COPY into a temporary table, then insert them from there."""
+        columns = ", ".join(BULK_COLUMNS)
+        await self.session.execute(
+            text(
+                "CREATE TEMPORARY TABLE user_import (position bigint, uuid uuid, "
+                "email varchar, name varchar, google_id varchar, is_admin boolean, "
+                "is_active boolean) ON COMMIT DROP"
+            )
+        )
+
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(  # type: ignore
+            "user_import",
+            records=[(position, *row) for position, row in enumerate(rows)],
+            columns=["position", *BULK_COLUMNS],
+        )
+
+        result = await self.session.execute(
+            text(
+                f'INSERT INTO "user" ({columns}) '
+                f"SELECT {columns} FROM user_import ORDER BY position "
+                "ON CONFLICT DO NOTHING RETURNING uuid"
+            )
+        )
+        inserted = set(result.scalars().all())
+
+        await self.session.execute(text("DROP TABLE user_import"))
+        return inserted
+
+    async def get(self, user_id: int | UUID) -> User:
+        """Get a user by id or uuid, batched with the other gets of the same loop tick."""
+        user = await self.loader.load(user_id)
+        if user is None:
+            raise NoUserFound("User not found")
+        return user
+
+    async def _load(self, keys: Sequence[int | UUID]) -> dict[int | UUID, User]:
+        """Load the users of a batch of ids and uuids in a single query."""
+        ids = [key for key in keys if isinstance(key, int)]
+        uuids = [key for key in keys if not isinstance(key, int)]
+        statement = select(User).where(
+            or_(User.id.in_(ids), User.uuid.in_(uuids))  # type: ignore
+        )
+
+        result = await self.session.execute(statement)
+        users = result.scalars().all()
+        return {key: user for user in users for key in (user.id, user.uuid)}
+
+    async def get_many(self, user_uuids: Sequence[UUID]) -> list[Row]:
+        """Get the ROW_COLUMNS of the users with any of the uuids, in no particular order."""
+        if not user_uuids:
+            return []
+
+        statement = select(*ROW_COLUMNS).where(
+            User.uuid == any_(bindparam("uuids", list(user_uuids), type_=ARRAY(Uuid)))
+        )
+
+        result = await self.session.execute(statement)
+        return list(result.all())
+
+    async def get_row_with_permission_names(self, user_uuid: UUID) -> Row:
+        """Get the ROW_COLUMNS and the permission names of the user, in a single lookup."""
+        statement = select(*ROW_COLUMNS, User.permission_names).where(User.uuid == user_uuid)
 
-        try:
-            result = await self.session.execute(statement)
-            return result.scalar_one()
-        except NoResultFound as error:
-            raise NoUserFound("User not found") from error
+        result = await self.session.execute(statement)
+        row = result.one_or_none()
+        if row is None:
+            raise NoUserFound("User not found")
+        return row
 
     async def get_by_google_id(self, google_id: str) -> User | None:
         statement = select(User).where(User.google_id == google_id)
@@ -55,18 +197,86 @@ class UserRepository:
         await self.session.flush()
         return user
 
+    async def update_by_uuid(self, user_uuid: UUID, user_update: UserUpdate) -> User:
+        """Update only the fields set on user_update in a single statement, without loading."""
+        values = user_update.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get(user_uuid)
+
+        statement = update_by_uuid_statement(User, tuple(sorted(values)))
+        params = {f"value_{field}": value for field, value in values.items()}
+        result = await self.session.execute(statement, {"match_uuid": user_uuid, **params})
+
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise NoUserFound("User not found")
+        return user
+
     async def delete(self, user: User) -> None:
         await self.session.delete(user)
         await self.session.flush()
+        self.loader.clear()
+
+    async def delete_by_uuid(self, user_uuid: UUID) -> None:
+        """Delete the user, and its permissions by cascade, without loading it first."""
+        statement = delete(User).where(User.uuid == user_uuid).returning(User.id)  # type: ignore
+        result = await self.session.execute(statement)
+
+        if result.scalar_one_or_none() is None:
+            raise NoUserFound("User not found")
+        self.loader.clear()
 
     async def list_all(self, skip: int = 0, limit: int = 100) -> list[User]:
-        statement = select(User).offset(skip).limit(limit)
+        statement = select(User).order_by(User.id).offset(skip).limit(limit)  # type: ignore
 
         result = await self.session.execute(statement)
         return list(result.scalars().all())
 
+    async def list_all_rows(self, skip: int = 0, limit: int = 100) -> list[Row]:
+        """Like list_all, as plain rows of ROW_COLUMNS instead of identity mapped users."""
+        statement = select(*ROW_COLUMNS).order_by(User.id).offset(skip).limit(limit)  # type: ignore
+
+        result = await self.session.execute(statement)
+        return list(result.all())
+
+    async def list_after_rows(self, after_id: int | None = None, limit: int = 100) -> list[Row]:
+        """List in id order starting after the given id, the cost doesn't grow with the page.
+
+        Plain rows of ROW_COLUMNS are returned instead of identity mapped users.
+        """
+        statement = select(*ROW_COLUMNS).order_by(User.id).limit(limit)  # type: ignore
+        if after_id is not None:
+            statement = statement.where(User.id > after_id)
+
+        result = await self.session.execute(statement)
+        return list(result.all())
+
+    async def stream_rows(self, batch_size: int = 1000) -> AsyncIterator[Sequence[Row]]:
+        """
+        Iterate over every user in id order, as batches of ROW_COLUMNS rows.
+
+        The rows are fetched from a server side cursor as the batches are consumed, so memory
+        doesn't grow with the table. The session must be in a transaction, not in autocommit.
+        """
+        statement = (
+            select(*ROW_COLUMNS)
+            .order_by(User.id)  # type: ignore
+            .execution_options(yield_per=batch_size)
+        )
+
+        result = await self.session.stream(statement)
+        async for batch in result.partitions():
+            yield batch
+
     async def get_admins(self) -> list[User]:
         statement = select(User).where(User.is_admin == True)  # noqa: E712
 
         result = await self.session.execute(statement)
         return list(result.scalars().all())
+
+    async def get_admin_rows(self) -> list[Row]:
+        """Like get_admins, as plain rows of ROW_COLUMNS instead of identity mapped users."""
+        statement = select(*ROW_COLUMNS).where(User.is_admin == True)  # noqa: E712
+
+        result = await self.session.execute(statement)
+        return list(result.all())
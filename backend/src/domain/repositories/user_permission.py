@@ -1,12 +1,20 @@
+from collections.abc import Sequence
 from uuid import UUID
 
+from sqlalchemy import CTE, String, Uuid, any_, bindparam, delete, false, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
+from sqlmodel import or_, select
+from uuid6 import uuid7
 
 from src.domain.models import UserPermission, User, Permission
-from src.domain.models.user_permission import UserPermissionCreate
-from src.domain.repositories.exceptions import NoUserPermissionFound
+from src.domain.models.user_permission import UserPermissionCreate, UserPermissionOutcome
+from src.domain.repositories.exceptions import (
+    NoPermissionFound,
+    NoUserFound,
+    NoUserPermissionFound,
+)
 
 
 class UserPermissionRepository:
@@ -59,6 +67,16 @@ class UserPermissionRepository:
         result = await self.session.execute(statement)
         return list(result.scalars().all())
 
+    async def get_user_permission_names_by_uuid(self, user_uuid: UUID) -> list[str]:
+        """Get only the names of the permissions of the user, sorted, from the user row."""
+        statement = select(User.permission_names).where(User.uuid == user_uuid)
+
+        result = await self.session.execute(statement)
+        permission_names = result.scalar_one_or_none()
+        if permission_names is None:
+            raise NoUserFound("User not found")
+        return permission_names
+
     async def get_permission_users(self, permission: Permission) -> list[User]:
         statement = (
             select(User)
@@ -69,6 +87,260 @@ class UserPermissionRepository:
         result = await self.session.execute(statement)
         return list(result.scalars().all())
 
+    async def get_permission_user_uuids(self, permission_id: int) -> list[UUID]:
+        """Get only the uuids of the users holding the permission, without loading the rows."""
+        statement = (
+            select(User.uuid)
+            .join(UserPermission, User.id == UserPermission.user_id)  # type: ignore
+            .where(UserPermission.permission_id == permission_id)
+        )
+
+        result = await self.session.execute(statement)
+        return list(result.scalars().all())
+
+    async def has_permission(self, user_uuid: UUID, permission_name: str) -> bool:
+        """Check if the user is an admin or holds the permission, from the user row alone."""
+        granted = literal(permission_name, String) == any_(User.permission_names)
+        statement = select(or_(User.is_admin, granted)).where(User.uuid == user_uuid)
+
+        result = await self.session.execute(statement)
+        has_permission = result.scalar_one_or_none()
+        if has_permission is None:
+            raise NoUserFound("User not found")
+
+        return has_permission
+
+    async def has_permissions(self, checks: Sequence[tuple[UUID, str]]) -> list[bool]:
+        """
+        Check many (user uuid, permission name) pairs in a single query.
+
+        The answers follow the order of the checks, unknown users do not hold any permission.
+        """
+        if not checks:
+            return []
+
+        user_uuids, permission_names = zip(*checks)
+        pairs = (
+            func.unnest(
+                bindparam("user_uuids", list(user_uuids), type_=ARRAY(Uuid)),
+                bindparam("permission_names", list(permission_names), type_=ARRAY(String)),
+            )
+            .table_valued("user_uuid", "permission_name", with_ordinality="position")
+            .render_derived()
+        )
+        granted = pairs.c.permission_name == any_(User.permission_names)
+        statement = (
+            select(func.coalesce(or_(User.is_admin, granted), false()))
+            .select_from(pairs)
+            .outerjoin(User, User.uuid == pairs.c.user_uuid)  # type: ignore
+            .order_by(pairs.c.position)
+        )
+
+        result = await self.session.execute(statement)
+        return list(result.scalars().all())
+
+    async def assign(self, user_uuid: UUID, permission_uuid: UUID) -> bool:
+        """
+        Assign the permission to the user in a single statement, resolving both uuids in it.
+
+        The unique (user_id, permission_id) index makes concurrent assigns of the same pair
+        insert it only once.
+
+        Returns:
+            True if assigned, False if the user already held the permission
+
+        Raises:
+            NoUserFound: If there's no user with the uuid
+            NoPermissionFound: If there's no permission with the uuid
+        """
+        table = UserPermission.__table__
+        inserted = (
+            insert(table)  # type: ignore
+            .from_select(
+                ["uuid", "user_id", "permission_id"],
+                select(literal(uuid7(), Uuid), User.id, Permission.id).where(
+                    User.uuid == user_uuid, Permission.uuid == permission_uuid
+                ),
+            )
+            .on_conflict_do_nothing()
+            .returning(table.c.id)  # type: ignore
+            .cte("inserted")
+        )
+
+        return await self._changed(inserted, user_uuid, permission_uuid)
+
+    async def revoke(self, user_uuid: UUID, permission_uuid: UUID) -> bool:
+        """
+        Revoke the permission from the user in a single statement, resolving both uuids in it.
+
+        Returns:
+            True if revoked, False if the user didn't hold the permission
+
+        Raises:
+            NoUserFound: If there's no user with the uuid
+            NoPermissionFound: If there's no permission with the uuid
+        """
+        table = UserPermission.__table__
+        deleted = (
+            delete(table)  # type: ignore
+            .where(
+                table.c.user_id == User.id,  # type: ignore
+                table.c.permission_id == Permission.id,  # type: ignore
+                User.uuid == user_uuid,
+                Permission.uuid == permission_uuid,
+            )
+            .returning(table.c.id)  # type: ignore
+            .cte("deleted")
+        )
+
+        return await self._changed(deleted, user_uuid, permission_uuid)
+
+    async def _changed(self, changed: CTE, user_uuid: UUID, permission_uuid: UUID) -> bool:
+        """Run the data modifying CTE, telling an unknown user or permission from a no-op."""
+        statement = select(
+            select(User.id).where(User.uuid == user_uuid).exists(),
+            select(Permission.id).where(Permission.uuid == permission_uuid).exists(),
+            select(changed.c.id).exists(),
+        )
+
+        result = await self.session.execute(statement)
+        user_found, permission_found, changed_row = result.one()
+        if not user_found:
+            raise NoUserFound("User not found")
+        if not permission_found:
+            raise NoPermissionFound("Permission not found")
+
+        return changed_row
+
+    async def bulk_assign(self, pairs: Sequence[tuple[UUID, UUID]]) -> list[UserPermissionOutcome]:
+        """
+        Assign many (user uuid, permission uuid) pairs in a single statement.
+
+        The uuids are resolved to ids and the pairs inserted in the same statement, the ones
+        already assigned, or repeated earlier in the batch, are skipped by the unique index.
+
+        Returns:
+            The outcome of each pair, in the order of the input
+        """
+        if not pairs:
+            return []
+
+        table = UserPermission.__table__
+        resolved = self._resolve_pairs(pairs, uuids=[uuid7() for _ in pairs])
+        inserted = (
+            insert(table)  # type: ignore
+            .from_select(
+                ["uuid", "user_id", "permission_id"],
+                select(resolved.c.uuid, resolved.c.user_id, resolved.c.permission_id)
+                .where(resolved.c.user_id.is_not(None), resolved.c.permission_id.is_not(None))
+                .order_by(resolved.c.position),
+            )
+            .on_conflict_do_nothing()
+            .returning(table.c.uuid)  # type: ignore
+            .cte("inserted")
+        )
+        statement = (
+            select(
+                resolved.c.user_id.is_(None),
+                resolved.c.permission_id.is_(None),
+                inserted.c.uuid.is_not(None),
+            )
+            .select_from(resolved)
+            .outerjoin(inserted, inserted.c.uuid == resolved.c.uuid)
+            .order_by(resolved.c.position)
+        )
+
+        result = await self.session.execute(statement)
+        return [
+            self._outcome(
+                *row, UserPermissionOutcome.ASSIGNED, UserPermissionOutcome.ALREADY_ASSIGNED
+            )
+            for row in result.all()
+        ]
+
+    async def bulk_revoke(self, pairs: Sequence[tuple[UUID, UUID]]) -> list[UserPermissionOutcome]:
+        """
+        Revoke many (user uuid, permission uuid) pairs in a single DELETE ... USING statement.
+
+        Returns:
+            The outcome of each pair, in the order of the input
+        """
+        if not pairs:
+            return []
+
+        table = UserPermission.__table__
+        resolved = self._resolve_pairs(pairs)
+        deleted = (
+            delete(table)  # type: ignore
+            .where(
+                table.c.user_id == resolved.c.user_id,  # type: ignore
+                table.c.permission_id == resolved.c.permission_id,  # type: ignore
+            )
+            .returning(resolved.c.position)
+            .cte("deleted")
+        )
+        statement = (
+            select(
+                resolved.c.user_id.is_(None),
+                resolved.c.permission_id.is_(None),
+                deleted.c.position.is_not(None),
+            )
+            .select_from(resolved)
+            .outerjoin(deleted, deleted.c.position == resolved.c.position)
+            .order_by(resolved.c.position)
+        )
+
+        result = await self.session.execute(statement)
+        return [
+            self._outcome(*row, UserPermissionOutcome.REVOKED, UserPermissionOutcome.NOT_ASSIGNED)
+            for row in result.all()
+        ]
+
+    def _resolve_pairs(
+        self, pairs: Sequence[tuple[UUID, UUID]], uuids: list[UUID] | None = None
+    ) -> CTE:
+        """The pairs with their position, user id and permission id, NULL when not found."""
+        user_uuids, permission_uuids = zip(*pairs)
+        arrays = [
+            bindparam("user_uuids", list(user_uuids), type_=ARRAY(Uuid)),
+            bindparam("permission_uuids", list(permission_uuids), type_=ARRAY(Uuid)),
+        ]
+        columns = ["user_uuid", "permission_uuid"]
+        if uuids is not None:
+            arrays.append(bindparam("uuids", uuids, type_=ARRAY(Uuid)))
+            columns.append("uuid")
+
+        source = (
+            func.unnest(*arrays)
+            .table_valued(*columns, with_ordinality="position")
+            .render_derived()
+        )
+        return (
+            select(
+                *source.c,
+                User.id.label("user_id"),  # type: ignore
+                Permission.id.label("permission_id"),  # type: ignore
+            )
+            .select_from(source)
+            .outerjoin(User, User.uuid == source.c.user_uuid)  # type: ignore
+            .outerjoin(Permission, Permission.uuid == source.c.permission_uuid)  # type: ignore
+            .cte("resolved")
+        )
+
+    @staticmethod
+    def _outcome(
+        no_user: bool,
+        no_permission: bool,
+        changed: bool,
+        done: UserPermissionOutcome,
+        unchanged: UserPermissionOutcome,
+    ) -> UserPermissionOutcome:
+        if no_user:
+            return UserPermissionOutcome.USER_NOT_FOUND
+        if no_permission:
+            return UserPermissionOutcome.PERMISSION_NOT_FOUND
+        return done if changed else unchanged
+
     async def delete_user_permission(self, user: User, permission: Permission) -> None:
         user_permission = await self.get_by_user_and_permission(user, permission)
         if user_permission:
@@ -0,0 +1,17 @@
+"""Response classes of the api routes."""
+
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+
+class ModelResponse(JSONResponse):
+    """JSON response rendered straight from pydantic models by their own serializer.
+
+    A route returning it skips FastAPI's validation against its `response_model`, which is
+    then only used by the docs, so the content must already be made of the public models.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from sqlmodel import select
 
-from src.web.deps import SessionDep
+from src.web.deps import ReadSessionDep
 
 router = APIRouter()
 
@@ -12,7 +12,7 @@ def hello(name: str = "World"):
 
 
 @router.get("/healthz")
-async def health_check(session: SessionDep):
+async def health_check(session: ReadSessionDep):
     """Healthcheck API Operation."""
     result = (await session.execute(select(1))).first()
 
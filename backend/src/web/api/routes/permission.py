@@ -1,14 +1,30 @@
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Body, HTTPException, Query, status
 from sqlalchemy.exc import IntegrityError
 
-from src.domain.models.permission import PermissionCreate, PermissionPublic, PermissionUpdate
+from src.domain.models.permission import (
+    PermissionBatch,
+    PermissionCreate,
+    PermissionPublic,
+    PermissionUpdate,
+)
+from src.domain.models.user_permission import UserPermissionPair, UserPermissionPairResult
 from src.domain.repositories.exceptions import NoPermissionFound, NoUserFound
-from src.web.deps import PermissionServiceDep
+from src.web.api.responses import ModelResponse
+from src.web.deps import (
+    PermissionPrimaryReadServiceDep,
+    PermissionReadServiceDep,
+    PermissionServiceDep,
+)
+from src.web.services.pagination import InvalidCursor
 
 router = APIRouter()
 
+MAX_BULK_PAIRS = 10000
+MAX_BATCH_UUIDS = 1000
+
 
 @router.post(
     "/",
@@ -30,6 +46,40 @@ async def create_permission(permission_create: PermissionCreate, service: Permis
         ) from error
 
 
+@router.get(
+    "/batch",
+    summary="Get many permissions",
+    description=(
+        "Get the permissions with the given UUIDs in a single request, repeating the `uuids` "
+        "query parameter. Permissions follow the request order, UUIDs without a permission are "
+        "listed in `missing`"
+    ),
+    tags=["permissions"],
+    response_model=PermissionBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def get_permissions(
+    service: PermissionReadServiceDep,
+    uuids: list[UUID] = Query(max_length=MAX_BATCH_UUIDS, description="UUIDs of the permissions"),
+):
+    return ModelResponse(await service.get_permissions(uuids))
+
+
+@router.post(
+    "/batch",
+    summary="Get many permissions from a body",
+    description="Same as `GET /batch`, with the UUIDs in the body for lists too long for a URL",
+    tags=["permissions"],
+    response_model=PermissionBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def post_get_permissions(
+    uuids: Annotated[list[UUID], Body(max_length=MAX_BATCH_UUIDS)],
+    service: PermissionReadServiceDep,
+):
+    return ModelResponse(await service.get_permissions(uuids))
+
+
 @router.get(
     "/{uuid}",
     summary="Get a permission",
@@ -41,7 +91,7 @@ async def create_permission(permission_create: PermissionCreate, service: Permis
         status.HTTP_404_NOT_FOUND: {"description": "Permission not found"},
     },
 )
-async def get_permission(uuid: UUID, service: PermissionServiceDep):
+async def get_permission(uuid: UUID, service: PermissionPrimaryReadServiceDep):
     try:
         return await service.get_permission(uuid)
     except NoPermissionFound as error:
@@ -59,7 +109,7 @@ async def get_permission(uuid: UUID, service: PermissionServiceDep):
         status.HTTP_404_NOT_FOUND: {"description": "Permission not found"},
     },
 )
-async def get_permission_by_name(name: str, service: PermissionServiceDep):
+async def get_permission_by_name(name: str, service: PermissionPrimaryReadServiceDep):
     permission = await service.get_permission_by_name(name)
     if not permission:
         raise HTTPException(status_code=404, detail="Permission not found")
@@ -111,17 +161,70 @@ async def delete_permission(uuid: UUID, service: PermissionServiceDep):
 @router.get(
     "/",
     summary="List permissions",
-    description="List all permissions with pagination",
+    description=(
+        "List all permissions with pagination. Pass `after` to page with a cursor instead of an "
+        "offset, an empty `after` starts from the first page. The cursor of the next page, if "
+        "any, is returned in the `X-Next-Cursor` header"
+    ),
     tags=["permissions"],
     response_model=list[PermissionPublic],
     status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid cursor"},
+    },
 )
 async def list_permissions(
-    service: PermissionServiceDep,
+    service: PermissionReadServiceDep,
     skip: int = Query(0, ge=0, description="Number of permissions to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of permissions to return"),
+    after: str | None = Query(None, description="Cursor of the page to start after"),
+):
+    if after is None:
+        return ModelResponse(await service.list_permissions(skip, limit))
+
+    try:
+        permissions, next_cursor = await service.list_permissions_after(after, limit)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from error
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return ModelResponse(permissions, headers=headers)
+
+
+@router.post(
+    "/assign/bulk",
+    summary="Assign many permissions",
+    description=(
+        "Assign a batch of (user, permission) pairs in a single transaction. Outcomes follow "
+        "the request order, unknown users or permissions are reported instead of failing"
+    ),
+    tags=["permissions"],
+    response_model=list[UserPermissionPairResult],
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_assign_permissions(
+    pairs: Annotated[list[UserPermissionPair], Body(max_length=MAX_BULK_PAIRS)],
+    service: PermissionServiceDep,
+):
+    return ModelResponse(await service.bulk_assign_permissions(pairs))
+
+
+@router.delete(
+    "/revoke/bulk",
+    summary="Revoke many permissions",
+    description=(
+        "Revoke a batch of (user, permission) pairs in a single transaction. Outcomes follow "
+        "the request order, unknown users or permissions are reported instead of failing"
+    ),
+    tags=["permissions"],
+    response_model=list[UserPermissionPairResult],
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_revoke_permissions(
+    pairs: Annotated[list[UserPermissionPair], Body(max_length=MAX_BULK_PAIRS)],
+    service: PermissionServiceDep,
 ):
-    return await service.list_permissions(skip, limit)
+    return ModelResponse(await service.bulk_revoke_permissions(pairs))
 
 
 @router.post(
@@ -180,7 +283,7 @@ async def revoke_permission_from_user(
         status.HTTP_404_NOT_FOUND: {"description": "Permission not found"},
     },
 )
-async def get_permission_users(permission_uuid: UUID, service: PermissionServiceDep):
+async def get_permission_users(permission_uuid: UUID, service: PermissionPrimaryReadServiceDep):
     try:
         user_uuids = await service.get_permission_users(permission_uuid)
         return {"users": user_uuids}
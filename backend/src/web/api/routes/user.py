@@ -1,14 +1,35 @@
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, status
+from fastapi import APIRouter, Body, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.exc import IntegrityError
 
-from src.domain.models.user import UserCreate, UserPublic, UserUpdate, UserWithPermissions
+from src.domain.models.user import (
+    UserBatch,
+    UserBulkCreateResult,
+    UserCreate,
+    UserPublic,
+    UserUpdate,
+    UserWithPermissions,
+)
+from src.domain.models.user_permission import UserPermissionCheck
 from src.domain.repositories.exceptions import NoUserFound
-from src.web.deps import UserServiceDep
+from src.web.api.responses import ModelResponse
+from src.web.deps import (
+    UserPrimaryReadServiceDep,
+    UserReadServiceDep,
+    UserServiceDep,
+    UserStreamServiceFactoryDep,
+)
+from src.web.services.pagination import InvalidCursor
 
 router = APIRouter()
 
+MAX_PERMISSION_CHECKS = 1000
+MAX_BULK_USERS = 100000
+MAX_BATCH_UUIDS = 1000
+
 
 @router.post(
     "/",
@@ -30,6 +51,80 @@ async def create_user(user_create: UserCreate, service: UserServiceDep):
         ) from error
 
 
+@router.post(
+    "/bulk",
+    summary="Create many users",
+    description=(
+        "Create a batch of users at once. Rows whose email or Google ID is already taken, by an "
+        "existing user or an earlier row, are skipped and reported as conflicts"
+    ),
+    tags=["users"],
+    response_model=UserBulkCreateResult,
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_create_users(
+    user_creates: Annotated[list[UserCreate], Body(max_length=MAX_BULK_USERS)],
+    service: UserServiceDep,
+):
+    return ModelResponse(await service.bulk_create_users(user_creates))
+
+
+@router.get(
+    "/export",
+    summary="Export users",
+    description=(
+        "Stream every user as newline delimited JSON, one user per line in creation order. The "
+        "users are read from a server side cursor and sent as they arrive"
+    ),
+    tags=["users"],
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}},
+    },
+)
+async def export_users(service_factory: UserStreamServiceFactoryDep):
+    async def lines():
+        async with service_factory() as service:
+            async for chunk in service.export_users():
+                yield chunk
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/batch",
+    summary="Get many users",
+    description=(
+        "Get the users with the given UUIDs in a single request, repeating the `uuids` query "
+        "parameter. Users follow the request order, UUIDs without a user are listed in `missing`"
+    ),
+    tags=["users"],
+    response_model=UserBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def get_users(
+    service: UserReadServiceDep,
+    uuids: list[UUID] = Query(max_length=MAX_BATCH_UUIDS, description="UUIDs of the users"),
+):
+    return ModelResponse(await service.get_users(uuids))
+
+
+@router.post(
+    "/batch",
+    summary="Get many users from a body",
+    description="Same as `GET /batch`, with the UUIDs in the body for lists too long for a URL",
+    tags=["users"],
+    response_model=UserBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def post_get_users(
+    uuids: Annotated[list[UUID], Body(max_length=MAX_BATCH_UUIDS)],
+    service: UserReadServiceDep,
+):
+    return ModelResponse(await service.get_users(uuids))
+
+
 @router.get(
     "/{uuid}",
     summary="Get a user",
@@ -41,7 +136,7 @@ async def create_user(user_create: UserCreate, service: UserServiceDep):
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
     },
 )
-async def get_user(uuid: UUID, service: UserServiceDep):
+async def get_user(uuid: UUID, service: UserPrimaryReadServiceDep):
     try:
         return await service.get_user(uuid)
     except NoUserFound as error:
@@ -59,7 +154,7 @@ async def get_user(uuid: UUID, service: UserServiceDep):
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
     },
 )
-async def get_user_with_permissions(uuid: UUID, service: UserServiceDep):
+async def get_user_with_permissions(uuid: UUID, service: UserReadServiceDep):
     try:
         return await service.get_user_with_permissions(uuid)
     except NoUserFound as error:
@@ -77,7 +172,7 @@ async def get_user_with_permissions(uuid: UUID, service: UserServiceDep):
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
     },
 )
-async def get_user_by_google_id(google_id: str, service: UserServiceDep):
+async def get_user_by_google_id(google_id: str, service: UserPrimaryReadServiceDep):
     user = await service.get_user_by_google_id(google_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -95,7 +190,7 @@ async def get_user_by_google_id(google_id: str, service: UserServiceDep):
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
     },
 )
-async def get_user_by_email(email: str, service: UserServiceDep):
+async def get_user_by_email(email: str, service: UserPrimaryReadServiceDep):
     user = await service.get_user_by_email(email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -145,17 +240,34 @@ async def delete_user(uuid: UUID, service: UserServiceDep):
 @router.get(
     "/",
     summary="List users",
-    description="List all users with pagination",
+    description=(
+        "List all users with pagination. Pass `after` to page with a cursor instead of an "
+        "offset, an empty `after` starts from the first page. The cursor of the next page, if "
+        "any, is returned in the `X-Next-Cursor` header"
+    ),
     tags=["users"],
     response_model=list[UserPublic],
     status_code=status.HTTP_200_OK,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"description": "Invalid cursor"},
+    },
 )
 async def list_users(
-    service: UserServiceDep,
+    service: UserReadServiceDep,
     skip: int = Query(0, ge=0, description="Number of users to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of users to return"),
+    after: str | None = Query(None, description="Cursor of the page to start after"),
 ):
-    return await service.list_users(skip, limit)
+    if after is None:
+        return ModelResponse(await service.list_users(skip, limit))
+
+    try:
+        users, next_cursor = await service.list_users_after(after, limit)
+    except InvalidCursor as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)) from error
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return ModelResponse(users, headers=headers)
 
 
 @router.get(
@@ -166,8 +278,8 @@ async def list_users(
     response_model=list[UserPublic],
     status_code=status.HTTP_200_OK,
 )
-async def list_admin_users(service: UserServiceDep):
-    return await service.get_admins()
+async def list_admin_users(service: UserReadServiceDep):
+    return ModelResponse(await service.get_admins())
 
 
 @router.get(
@@ -177,7 +289,9 @@ async def list_admin_users(service: UserServiceDep):
     tags=["users"],
     status_code=status.HTTP_200_OK,
 )
-async def check_user_permission(uuid: UUID, permission_name: str, service: UserServiceDep):
+async def check_user_permission(
+    uuid: UUID, permission_name: str, service: UserPrimaryReadServiceDep
+):
     try:
         has_permission = await service.check_user_has_permission(uuid, permission_name)
         return {"has_permission": has_permission}
@@ -185,6 +299,21 @@ async def check_user_permission(uuid: UUID, permission_name: str, service: UserS
         raise HTTPException(status_code=404, detail=str(error)) from error
 
 
+@router.post(
+    "/permissions/check",
+    summary="Check many user permissions",
+    description="Check a batch of (user, permission) pairs, answers follow the request order",
+    tags=["users"],
+    status_code=status.HTTP_200_OK,
+)
+async def check_user_permissions(
+    checks: Annotated[list[UserPermissionCheck], Body(max_length=MAX_PERMISSION_CHECKS)],
+    service: UserPrimaryReadServiceDep,
+):
+    results = await service.check_user_permissions(checks)
+    return {"results": results}
+
+
 @router.get(
     "/{uuid}/permissions",
     summary="Get user permissions list",
@@ -192,7 +321,7 @@ async def check_user_permission(uuid: UUID, permission_name: str, service: UserS
     tags=["users"],
     status_code=status.HTTP_200_OK,
 )
-async def get_user_permissions(uuid: UUID, service: UserServiceDep):
+async def get_user_permissions(uuid: UUID, service: UserReadServiceDep):
     try:
         permissions = await service.get_user_permissions(uuid)
         return {"permissions": permissions}
@@ -4,13 +4,33 @@ from datetime import datetime, timezone
 
 from fastapi import HTTPException, Request
 
+from src.core.cache_backends import RespBackend
+from src.core.replay import LocalNonceStore, ReplayGuard, RespNonceStore
 from src.core.settings import settings
 
+local_nonces = LocalNonceStore(name="signatures", maxsize=settings.replay_cache_size)
+
+# Signatures seen by this worker, or by every worker on the shared cache server. A timestamp
+# is accepted for a window on either side of now, so a nonce is kept for three windows
+replay_guard = ReplayGuard(
+    RespNonceStore(
+        RespBackend(
+            name="signatures",
+            host=settings.cache_host,
+            port=settings.cache_port,
+            timeout=settings.cache_timeout,
+            prefix=f"{settings.namespace}:{settings.name}:",
+        ),
+        ttl=3 * settings.timestamp_signing_threshold / 1000,
+        fallback=local_nonces,
+    )
+    if settings.replay_store == "resp"
+    else local_nonces,
+    window=settings.timestamp_signing_threshold,
+)
 
-async def _signing(request: Request):
-    signature = request.headers.get("x-signature")
-    timestamp = request.headers.get("x-timestamp")
 
+def check_signature_headers(signature: str | None, timestamp: str | None) -> tuple[str, str]:
     if not signature or not timestamp:
         raise HTTPException(status_code=401, detail="Missing signature or timestamp")
 
@@ -18,14 +38,62 @@ async def _signing(request: Request):
     if abs(current_time - float(timestamp)) > settings.timestamp_signing_threshold:
         raise HTTPException(status_code=401, detail="Timestamp expired")
 
-    body = await request.body()
+    return signature, timestamp
+
+
+class SignatureVerifier:
+    """
+    Incremental version of generate_signature, fed with the body chunks as they arrive.
+
+    The HMAC is computed over the same `{method}|{body}|{timestamp}` bytes, so the body never
+    has to be joined, decoded or copied into the payload string.
+    """
+
+    def __init__(self, method: str, timestamp: str, secret_key: str):
+        self._hmac = hmac.new(secret_key.encode(), f"{method}|".encode(), hashlib.sha256)
+        self._suffix = f"|{timestamp}".encode()
+
+    def update(self, chunk: bytes):
+        self._hmac.update(chunk)
+
+    def verify(self, signature: str):
+        calculated = self._hmac.copy()
+        calculated.update(self._suffix)
+
+        if not hmac.compare_digest(calculated.hexdigest().encode(), signature.encode()):
+            raise HTTPException(status_code=401, detail="Invalid signature")
 
-    calculated_signature = generate_signature(
-        request.method, body.decode(), timestamp, settings.secret_key
+
+def check_signature_body(method: str, body: bytes, signature: str, timestamp: str):
+    verifier = SignatureVerifier(method, timestamp, settings.secret_key)
+    verifier.update(body)
+    verifier.verify(signature)
+
+
+def request_target(method: str, path: str, query_string: bytes) -> str:
+    """The request line, identifying requests whose signatures can be the same."""
+    query = query_string.decode("latin-1")
+    return f"{method} {path}?{query}" if query else f"{method} {path}"
+
+
+async def check_signature_replay(request: str, signature: str, timestamp: str):
+    current_time = datetime.now(timezone.utc).timestamp() * 1000
+    if not await replay_guard.check(request, signature, timestamp, current_time):
+        raise HTTPException(status_code=401, detail="Replayed request")
+
+
+async def _signing(request: Request):
+    signature, timestamp = check_signature_headers(
+        request.headers.get("x-signature"), request.headers.get("x-timestamp")
     )
 
-    if calculated_signature != signature:
-        raise HTTPException(status_code=401, detail="Invalid signature")
+    body = await request.body()
+    check_signature_body(request.method, body, signature, timestamp)
+    await check_signature_replay(
+        request_target(request.method, request.url.path, request.scope["query_string"]),
+        signature,
+        timestamp,
+    )
 
 
 async def signing(request: Request):
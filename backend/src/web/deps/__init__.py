@@ -1,12 +1,40 @@
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager
 from typing import Annotated
 
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.deps.db import get_db_session
-from src.web.deps.services import get_user_service, get_permission_service
+from src.core.deps.db import get_db_primary_read_session, get_db_read_session, get_db_session
+from src.web.deps.services import (
+    get_user_service,
+    get_permission_service,
+    get_user_read_service,
+    get_permission_read_service,
+    get_user_primary_read_service,
+    get_permission_primary_read_service,
+    get_user_stream_service_factory,
+)
 from src.web.services import UserService, PermissionService
 
 SessionDep = Annotated[AsyncSession, Depends(get_db_session)]
 UserServiceDep = Annotated[UserService, Depends(get_user_service)]
 PermissionServiceDep = Annotated[PermissionService, Depends(get_permission_service)]
+
+# Dependencies for requests that only read, their session never sends BEGIN nor COMMIT
+ReadSessionDep = Annotated[AsyncSession, Depends(get_db_read_session)]
+UserReadServiceDep = Annotated[UserService, Depends(get_user_read_service)]
+PermissionReadServiceDep = Annotated[PermissionService, Depends(get_permission_read_service)]
+
+# Reads that fill the caches, kept on the primary so they never cache rows a replica lags on
+PrimaryReadSessionDep = Annotated[AsyncSession, Depends(get_db_primary_read_session)]
+UserPrimaryReadServiceDep = Annotated[UserService, Depends(get_user_primary_read_service)]
+PermissionPrimaryReadServiceDep = Annotated[
+    PermissionService, Depends(get_permission_primary_read_service)
+]
+
+# Streamed responses outlive the request dependencies, they open their session themselves
+UserStreamServiceFactoryDep = Annotated[
+    Callable[[], AbstractAsyncContextManager[UserService]],
+    Depends(get_user_stream_service_factory),
+]
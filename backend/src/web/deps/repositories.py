@@ -1,19 +1,59 @@
+from collections.abc import AsyncIterator
+
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.deps.db import get_db_session
+from src.core.deps.db import get_db_read_session, get_db_session
 from src.domain.repositories import UserRepository, PermissionRepository, UserPermissionRepository
 
 
-def get_user_repository(db: AsyncSession = Depends(get_db_session)) -> UserRepository:
-    return UserRepository(db)
+async def get_user_repository(
+    db: AsyncSession = Depends(get_db_session),
+) -> AsyncIterator[UserRepository]:
+    repository = UserRepository(db)
+    try:
+        yield repository
+    finally:
+        repository.loader.close()
 
 
-def get_permission_repository(db: AsyncSession = Depends(get_db_session)) -> PermissionRepository:
-    return PermissionRepository(db)
+async def get_permission_repository(
+    db: AsyncSession = Depends(get_db_session),
+) -> AsyncIterator[PermissionRepository]:
+    repository = PermissionRepository(db)
+    try:
+        yield repository
+    finally:
+        repository.loader.close()
 
 
 def get_user_permission_repository(
     db: AsyncSession = Depends(get_db_session),
 ) -> UserPermissionRepository:
     return UserPermissionRepository(db)
+
+
+async def get_user_read_repository(
+    db: AsyncSession = Depends(get_db_read_session),
+) -> AsyncIterator[UserRepository]:
+    repository = UserRepository(db)
+    try:
+        yield repository
+    finally:
+        repository.loader.close()
+
+
+async def get_permission_read_repository(
+    db: AsyncSession = Depends(get_db_read_session),
+) -> AsyncIterator[PermissionRepository]:
+    repository = PermissionRepository(db)
+    try:
+        yield repository
+    finally:
+        repository.loader.close()
+
+
+def get_user_permission_read_repository(
+    db: AsyncSession = Depends(get_db_read_session),
+) -> UserPermissionRepository:
+    return UserPermissionRepository(db)
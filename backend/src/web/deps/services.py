@@ -1,10 +1,18 @@
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.core.deps.db import get_db_primary_read_session, get_db_stream_session_factory
 from src.domain.repositories import UserRepository, PermissionRepository, UserPermissionRepository
 from src.web.deps.repositories import (
     get_user_repository,
     get_permission_repository,
     get_user_permission_repository,
+    get_user_read_repository,
+    get_permission_read_repository,
+    get_user_permission_read_repository,
 )
 from src.web.services import UserService, PermissionService
 
@@ -28,3 +36,81 @@ def get_permission_service(
         user_repository=user_repository,
         user_permission_repository=user_permission_repository,
     )
+
+
+def get_user_read_service(
+    user_repository: UserRepository = Depends(get_user_read_repository),
+    user_permission_repository: UserPermissionRepository = Depends(
+        get_user_permission_read_repository
+    ),
+) -> UserService:
+    return UserService(
+        user_repository=user_repository, user_permission_repository=user_permission_repository
+    )
+
+
+def get_permission_read_service(
+    permission_repository: PermissionRepository = Depends(get_permission_read_repository),
+    user_repository: UserRepository = Depends(get_user_read_repository),
+    user_permission_repository: UserPermissionRepository = Depends(
+        get_user_permission_read_repository
+    ),
+) -> PermissionService:
+    return PermissionService(
+        permission_repository=permission_repository,
+        user_repository=user_repository,
+        user_permission_repository=user_permission_repository,
+    )
+
+
+async def get_user_primary_read_service(
+    db: AsyncSession = Depends(get_db_primary_read_session),
+) -> AsyncIterator[UserService]:
+    """User service reading from the primary, for the reads that fill the caches."""
+    user_repository = UserRepository(db)
+    try:
+        yield UserService(
+            user_repository=user_repository,
+            user_permission_repository=UserPermissionRepository(db),
+        )
+    finally:
+        user_repository.loader.close()
+
+
+async def get_permission_primary_read_service(
+    db: AsyncSession = Depends(get_db_primary_read_session),
+) -> AsyncIterator[PermissionService]:
+    """Permission service reading from the primary, for the reads that fill the caches."""
+    permission_repository = PermissionRepository(db)
+    user_repository = UserRepository(db)
+    try:
+        yield PermissionService(
+            permission_repository=permission_repository,
+            user_repository=user_repository,
+            user_permission_repository=UserPermissionRepository(db),
+        )
+    finally:
+        permission_repository.loader.close()
+        user_repository.loader.close()
+
+
+def get_user_stream_service_factory(
+    session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]] = Depends(
+        get_db_stream_session_factory
+    ),
+) -> Callable[[], AbstractAsyncContextManager[UserService]]:
+    """Factory of user services whose session lives as long as a streamed response."""
+
+    @asynccontextmanager
+    async def user_stream_service() -> AsyncIterator[UserService]:
+        async with session_factory() as session:
+            user_repository = UserRepository(session)
+            try:
+                yield UserService(
+                    user_repository=user_repository,
+                    user_permission_repository=UserPermissionRepository(session),
+                )
+            finally:
+                user_repository.loader.close()
+
+    return user_stream_service
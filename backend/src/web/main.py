@@ -1,39 +1,165 @@
+from collections.abc import Callable
 from contextlib import asynccontextmanager
+from tempfile import SpooledTemporaryFile
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware import Middleware
 from fastapi.responses import ORJSONResponse
 from prometheus_fastapi_instrumentator import Instrumentator
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.core.db import async_engine
 from src.core.settings import settings
 from src.web.api import api_router
-from src.web.api.signing import signing
+from src.web.api.signing import (
+    SignatureVerifier,
+    check_signature_headers,
+    check_signature_replay,
+    replay_guard,
+    request_target,
+)
+from src.web.services.cache import invalidation_bus, lookup_cache
 
 EXCLUDED_PATHS = {"/docs", "/redoc", "/openapi.json", "/metrics"}
 
 
-class SignatureMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path in EXCLUDED_PATHS:
-            return await call_next(request)
+class SignedBody:
+    """
+    Request body read by the SignatureMiddleware, to be replayed to the app.
+
+    A body sent in a single message, which covers every bodyless request, is kept as is.
+    Bodies split across several messages are spooled, so only up to `signature_spool_size`
+    bytes stay in memory whatever the size of the body.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self):
+        self._chunk = b""
+        self._spool: SpooledTemporaryFile | None = None
+        self._size = 0
+        self._replaying = False
+
+    async def write(self, chunk: bytes):
+        if self._spool is None and not self._size:
+            self._chunk = chunk
+        else:
+            if self._spool is None:
+                self._spool = SpooledTemporaryFile(max_size=settings.signature_spool_size)
+                self._spool.write(self._chunk)
+                self._chunk = b""
+            await self._run(self._spool.write, chunk)
+
+        self._size += len(chunk)
+
+    async def read(self) -> Message:
+        """Get the next http.request message of the replayed body."""
+        if self._spool is None:
+            chunk, self._chunk = self._chunk, b""
+            return {"type": "http.request", "body": chunk, "more_body": False}
+
+        if not self._replaying:
+            self._spool.seek(0)
+            self._replaying = True
+        chunk = await self._run(self._spool.read, self.CHUNK_SIZE)
+        return {
+            "type": "http.request",
+            "body": chunk,
+            "more_body": self._spool.tell() < self._size,
+        }
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+
+    async def _run(self, function: Callable, *args):
+        # Once rolled over to disk, file operations are moved off the event loop
+        if self._spool is not None and getattr(self._spool, "_rolled", False):
+            return await run_in_threadpool(function, *args)
+        return function(*args)
+
 
+class SignatureMiddleware:
+    """
+    Pure ASGI middleware checking the request signature before calling the app.
+
+    The body is read once from the ASGI receive channel, feeding the signature HMAC chunk by
+    chunk, and then replayed to the app, so neither the request nor the response goes through
+    the extra streams of BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        body = SignedBody()
         try:
-            await signing(request)
-        except HTTPException as error:
-            return ORJSONResponse(
-                status_code=error.status_code,
-                content={"detail": error.detail},
-            )
-        response = await call_next(request)
-        return response
+            try:
+                headers = Headers(scope=scope)
+                signature, timestamp = check_signature_headers(
+                    headers.get("x-signature"), headers.get("x-timestamp")
+                )
+
+                verifier = SignatureVerifier(scope["method"], timestamp, settings.secret_key)
+                await self._read_body(receive, verifier, body)
+                verifier.verify(signature)
+                await check_signature_replay(
+                    request_target(scope["method"], scope["path"], scope["query_string"]),
+                    signature,
+                    timestamp,
+                )
+            except HTTPException as error:
+                response = ORJSONResponse(
+                    status_code=error.status_code,
+                    content={"detail": error.detail},
+                )
+                await response(scope, receive, send)
+                return
+
+            body_replayed = False
+
+            async def replay_body() -> Message:
+                nonlocal body_replayed
+                if body_replayed:
+                    # Anything after the body, like http.disconnect, comes from the server
+                    return await receive()
+
+                message = await body.read()
+                body_replayed = not message["more_body"]
+                return message
+
+            await self.app(scope, replay_body, send)
+        finally:
+            body.close()
+
+    @staticmethod
+    async def _read_body(receive: Receive, verifier: SignatureVerifier, body: SignedBody):
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise HTTPException(status_code=400, detail="Client disconnected")
+
+            chunk = message.get("body", b"")
+            verifier.update(chunk)
+            await body.write(chunk)
+            more_body = message.get("more_body", False)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     prometheus_inst.expose(app)
+    await invalidation_bus.start()
     yield
+    await invalidation_bus.stop()
+    await lookup_cache.close()
+    await replay_guard.store.close()
     # Cleanup idle connections
     await async_engine.dispose()
 
@@ -0,0 +1,140 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.cache import TTLCache, delete_on_commit
+from src.core.cache_backends import (
+    CacheBackend,
+    MemoryBackend,
+    RespBackend,
+    delete_keys_on_commit,
+)
+from src.core.invalidation import InvalidationBus
+from src.core.settings import settings
+from src.core.singleflight import SingleFlight
+from src.domain.repositories.permission_bitset import PermissionBitsets
+
+# Answers to permission checks, by user UUID and then by permission name
+user_permissions_cache: TTLCache[UUID, dict[str, bool]] = TTLCache(
+    name="user_permissions",
+    maxsize=settings.permission_cache_size,
+    ttl=settings.permission_cache_ttl,
+)
+
+# The grants of every user as bitsets, a single snapshot kept under PERMISSION_BITSETS_KEY
+permission_bitsets_cache: TTLCache[str, PermissionBitsets] = TTLCache(
+    name="permission_bitsets", maxsize=1, ttl=settings.permission_bitsets_ttl
+)
+PERMISSION_BITSETS_KEY = "all"
+
+# Users and permissions looked up by uuid, and pointers to their uuid from the other lookups
+lookup_cache: CacheBackend = (
+    RespBackend(
+        name="lookups",
+        host=settings.cache_host,
+        port=settings.cache_port,
+        timeout=settings.cache_timeout,
+        prefix=f"{settings.namespace}:{settings.name}:",
+    )
+    if settings.lookup_cache_backend == "resp"
+    else MemoryBackend(name="lookups", maxsize=settings.lookup_cache_size)
+)
+LOOKUP_CACHE_TTL = settings.lookup_cache_ttl
+
+
+def user_key(uuid: UUID) -> str:
+    return f"user:{uuid}"
+
+
+def user_google_id_key(google_id: str) -> str:
+    return f"user:google_id:{google_id}"
+
+
+def user_email_key(email: str) -> str:
+    return f"user:email:{email}"
+
+
+def permission_key(uuid: UUID) -> str:
+    return f"permission:{uuid}"
+
+
+def permission_name_key(name: str) -> str:
+    return f"permission:name:{name}"
+
+
+# Hot reads in flight, concurrent identical ones wait for the first instead of querying again
+read_flights: SingleFlight[tuple[str, UUID | None], list] = SingleFlight(name="reads")
+bitset_flights: SingleFlight[str, PermissionBitsets] = SingleFlight(name="permission_bitsets")
+
+# Invalidations of the caches above, sent to and received from the other workers
+invalidation_bus = InvalidationBus(
+    dsn=make_url(settings.db_dsn_async)
+    .set(drivername="postgresql")
+    .render_as_string(hide_password=False),
+    channel=settings.invalidation_channel,
+    debounce=settings.invalidation_debounce,
+    retry_after=settings.invalidation_retry_after,
+)
+invalidation_bus.register(user_permissions_cache, parse_key=UUID)
+invalidation_bus.register(permission_bitsets_cache)
+if isinstance(lookup_cache, MemoryBackend):
+    invalidation_bus.register(lookup_cache.cache)
+
+
+def invalidate_permissions(
+    session: AsyncSession,
+    cache: TTLCache[UUID, dict[str, bool]],
+    bus: InvalidationBus,
+    user_uuid: UUID | None = None,
+    bitsets_cache: TTLCache[str, PermissionBitsets] = permission_bitsets_cache,
+) -> None:
+    """Drop the cached checks of the user, or of everyone, here and on the other workers.
+
+    The bitsets snapshot holds the grants of everyone, any change makes it stale as a whole.
+    """
+    delete_on_commit(session, cache, user_uuid)
+    bus.publish(session, cache.name, user_uuid)
+    delete_on_commit(session, bitsets_cache)
+    bus.publish(session, bitsets_cache.name)
+
+
+async def get_cached[T: BaseModel](backend: CacheBackend, model: type[T], key: str) -> T | None:
+    data = await backend.get(key)
+    return model.model_validate_json(data) if data is not None else None
+
+
+async def get_cached_by[T: BaseModel](
+    backend: CacheBackend, model: type[T], pointer_key: str, field: str, value: str
+) -> T | None:
+    """Follow a pointer to the cached model, as long as it still has the looked up value."""
+    pointer = await backend.get(pointer_key)
+    if pointer is None:
+        return None
+
+    try:
+        cached = await get_cached(backend, model, pointer.decode())
+    except ValueError:
+        return None
+    # The pointer outlives a change of the value, it is only checked against the model
+    if cached is None or getattr(cached, field) != value:
+        return None
+    return cached
+
+
+async def cache_lookup(
+    backend: CacheBackend, key: str, public: BaseModel, *pointer_keys: str
+) -> None:
+    """Cache the model under its key, and the key under each of the pointer keys."""
+    await backend.set(key, public.model_dump_json().encode(), LOOKUP_CACHE_TTL)
+    for pointer_key in pointer_keys:
+        await backend.set(pointer_key, key.encode(), LOOKUP_CACHE_TTL)
+
+
+async def invalidate_lookup(
+    session: AsyncSession, backend: CacheBackend, bus: InvalidationBus, key: str
+) -> None:
+    """Drop the cached model, here or on the shared cache, and on the other workers."""
+    await delete_keys_on_commit(session, backend, key)
+    bus.publish(session, backend.name, key)
@@ -0,0 +1,34 @@
+import base64
+import binascii
+
+# Ids are int4 serials, any other value can't be the id of a row
+MAX_ID = 2**31 - 1
+
+
+class InvalidCursor(ValueError):
+    """Exception raised when a pagination cursor can't be decoded."""
+
+    pass
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row of a page into an opaque cursor."""
+    return base64.urlsafe_b64encode(str(last_id).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor built by encode_cursor back into the id of the last row."""
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + padding).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError) as error:
+        raise InvalidCursor("Invalid cursor") from error
+
+    # int() would also take signs, underscores, whitespace and non ASCII digits
+    if not (decoded.isascii() and decoded.isdigit()):
+        raise InvalidCursor("Invalid cursor")
+
+    last_id = int(decoded)
+    if not 1 <= last_id <= MAX_ID:
+        raise InvalidCursor("Invalid cursor")
+    return last_id
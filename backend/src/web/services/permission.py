@@ -1,9 +1,47 @@
 from uuid import UUID
 
+from sqlalchemy import Row
+
+from src.core.cache import TTLCache
+from src.core.cache_backends import CacheBackend
+from src.core.invalidation import InvalidationBus
+from src.core.singleflight import SingleFlight
 from src.domain.models import Permission
-from src.domain.models.permission import PermissionCreate, PermissionPublic, PermissionUpdate
-from src.domain.models.user_permission import UserPermissionCreate
-from src.domain.repositories import PermissionRepository, UserRepository, UserPermissionRepository
+from src.domain.models.permission import (
+    PermissionBatch,
+    PermissionCreate,
+    PermissionPublic,
+    PermissionUpdate,
+)
+from src.domain.models.user_permission import (
+    UserPermissionOutcome,
+    UserPermissionPair,
+    UserPermissionPairResult,
+)
+from src.domain.repositories import (
+    PermissionBitsetRepository,
+    PermissionRepository,
+    UserRepository,
+    UserPermissionRepository,
+)
+from src.domain.repositories.permission_bitset import PermissionBitsets
+from src.web.services.cache import (
+    PERMISSION_BITSETS_KEY,
+    bitset_flights,
+    cache_lookup,
+    get_cached,
+    get_cached_by,
+    invalidate_lookup,
+    invalidate_permissions,
+    invalidation_bus,
+    lookup_cache,
+    permission_bitsets_cache,
+    permission_key,
+    permission_name_key,
+    read_flights,
+    user_permissions_cache,
+)
+from src.web.services.pagination import decode_cursor, encode_cursor
 
 
 class PermissionService:
@@ -12,75 +50,216 @@ class PermissionService:
         permission_repository: PermissionRepository,
         user_repository: UserRepository,
         user_permission_repository: UserPermissionRepository,
+        permission_cache: TTLCache[UUID, dict[str, bool]] = user_permissions_cache,
+        invalidation_bus: InvalidationBus = invalidation_bus,
+        lookup_cache: CacheBackend = lookup_cache,
+        read_flights: SingleFlight[tuple[str, UUID | None], list] = read_flights,
+        bitsets_cache: TTLCache[str, PermissionBitsets] = permission_bitsets_cache,
+        bitset_flights: SingleFlight[str, PermissionBitsets] = bitset_flights,
     ):
         self.permission_repository = permission_repository
         self.user_repository = user_repository
         self.user_permission_repository = user_permission_repository
+        self.permission_cache = permission_cache
+        self.invalidation_bus = invalidation_bus
+        self.lookup_cache = lookup_cache
+        self.read_flights = read_flights
+        self.bitsets_cache = bitsets_cache
+        self.bitset_flights = bitset_flights
+        # Reads the same tables as the assignments, in the same session
+        self.permission_bitset_repository = PermissionBitsetRepository(
+            user_permission_repository.session
+        )
 
-    async def _parse_to_public(self, permission: Permission) -> PermissionPublic:
-        return PermissionPublic(**permission.model_dump())
+    async def _parse_to_public(self, permission: Permission | Row) -> PermissionPublic:
+        # Validated once, straight from the row attributes, like UserService does
+        return PermissionPublic.__pydantic_validator__.validate_python(
+            permission, from_attributes=True
+        )
 
     async def create_permission(self, permission_create: PermissionCreate) -> PermissionPublic:
         permission = await self.permission_repository.create(permission_create)
         return await self._parse_to_public(permission)
 
     async def get_permission(self, uuid: UUID) -> PermissionPublic:
-        permission = await self.permission_repository.get(uuid)
-        return await self._parse_to_public(permission)
+        cached = await get_cached(self.lookup_cache, PermissionPublic, permission_key(uuid))
+        if cached is not None:
+            return cached
+
+        permission = await self._parse_to_public(await self.permission_repository.get(uuid))
+        await cache_lookup(self.lookup_cache, permission_key(permission.uuid), permission)
+        return permission
+
+    async def get_permissions(self, uuids: list[UUID]) -> PermissionBatch:
+        """Get many permissions in a single query, keeping the request order and listing misses."""
+        requested = list(dict.fromkeys(uuids))
+        rows = {row.uuid: row for row in await self.permission_repository.get_many(requested)}
+
+        return PermissionBatch(
+            permissions=[
+                await self._parse_to_public(rows[uuid]) for uuid in requested if uuid in rows
+            ],
+            missing=[uuid for uuid in requested if uuid not in rows],
+        )
 
     async def get_permission_by_name(self, name: str) -> PermissionPublic | None:
+        pointer_key = permission_name_key(name)
+        cached = await get_cached_by(
+            self.lookup_cache, PermissionPublic, pointer_key, "name", name
+        )
+        if cached is not None:
+            return cached
+
         permission = await self.permission_repository.get_by_name(name)
         if permission:
-            return await self._parse_to_public(permission)
+            public = await self._parse_to_public(permission)
+            await cache_lookup(self.lookup_cache, permission_key(public.uuid), public, pointer_key)
+            return public
         return None
 
     async def update_permission(
         self, uuid: UUID, permission_update: PermissionUpdate
     ) -> PermissionPublic:
-        permission = await self.permission_repository.get(uuid)
-        permission = await self.permission_repository.update(permission, permission_update)
+        permission = await self.permission_repository.update_by_uuid(uuid, permission_update)
+        # Cached checks are keyed by permission name, a rename may affect any user
+        invalidate_permissions(
+            self.user_permission_repository.session,
+            self.permission_cache,
+            self.invalidation_bus,
+            bitsets_cache=self.bitsets_cache,
+        )
+        await invalidate_lookup(
+            self.permission_repository.session,
+            self.lookup_cache,
+            self.invalidation_bus,
+            permission_key(uuid),
+        )
         return await self._parse_to_public(permission)
 
     async def delete_permission(self, uuid: UUID) -> None:
-        permission = await self.permission_repository.get(uuid)
-        await self.permission_repository.delete(permission)
+        await self.permission_repository.delete_by_uuid(uuid)
+        invalidate_permissions(
+            self.user_permission_repository.session,
+            self.permission_cache,
+            self.invalidation_bus,
+            bitsets_cache=self.bitsets_cache,
+        )
+        await invalidate_lookup(
+            self.permission_repository.session,
+            self.lookup_cache,
+            self.invalidation_bus,
+            permission_key(uuid),
+        )
 
     async def list_permissions(self, skip: int = 0, limit: int = 100) -> list[PermissionPublic]:
-        permissions = await self.permission_repository.list_all(skip, limit)
+        permissions = await self.permission_repository.list_all_rows(skip, limit)
         return [await self._parse_to_public(permission) for permission in permissions]
 
-    async def assign_permission_to_user(self, user_uuid: UUID, permission_uuid: UUID) -> bool:
-        """Assign a permission to a user. Returns True if assigned, False if already exists."""
-        user = await self.user_repository.get(user_uuid)
-        permission = await self.permission_repository.get(permission_uuid)
+    async def list_permissions_after(
+        self, after: str | None = None, limit: int = 100
+    ) -> tuple[list[PermissionPublic], str | None]:
+        """List a page of permissions after the cursor, returns them and the next cursor."""
+        after_id = decode_cursor(after) if after else None
+        permissions = await self.permission_repository.list_after_rows(after_id, limit)
 
-        # Check if already assigned
-        existing = await self.user_permission_repository.get_by_user_and_permission(
-            user, permission
-        )
-        if existing:
-            return False
+        next_cursor = encode_cursor(permissions[-1].id) if len(permissions) == limit else None
+        return [await self._parse_to_public(permission) for permission in permissions], next_cursor
 
-        user_permission_create = UserPermissionCreate(user_id=user.id, permission_id=permission.id)
-        await self.user_permission_repository.create(user_permission_create)
-        return True
+    async def assign_permission_to_user(self, user_uuid: UUID, permission_uuid: UUID) -> bool:
+        """Assign a permission to a user. Returns True if assigned, False if already exists."""
+        assigned = await self.user_permission_repository.assign(user_uuid, permission_uuid)
+        if assigned:
+            invalidate_permissions(
+                self.user_permission_repository.session,
+                self.permission_cache,
+                self.invalidation_bus,
+                user_uuid,
+                bitsets_cache=self.bitsets_cache,
+            )
+        return assigned
 
     async def revoke_permission_from_user(self, user_uuid: UUID, permission_uuid: UUID) -> bool:
         """Revoke a permission from a user. Returns True if revoked, False if not found."""
-        user = await self.user_repository.get(user_uuid)
-        permission = await self.permission_repository.get(permission_uuid)
+        revoked = await self.user_permission_repository.revoke(user_uuid, permission_uuid)
+        if revoked:
+            invalidate_permissions(
+                self.user_permission_repository.session,
+                self.permission_cache,
+                self.invalidation_bus,
+                user_uuid,
+                bitsets_cache=self.bitsets_cache,
+            )
+        return revoked
+
+    async def bulk_assign_permissions(
+        self, pairs: list[UserPermissionPair]
+    ) -> list[UserPermissionPairResult]:
+        """Assign many permissions to users at once, outcomes follow the request order."""
+        outcomes = await self.user_permission_repository.bulk_assign(
+            [(pair.user_uuid, pair.permission_uuid) for pair in pairs]
+        )
+        return self._pair_results(pairs, outcomes, UserPermissionOutcome.ASSIGNED)
 
-        existing = await self.user_permission_repository.get_by_user_and_permission(
-            user, permission
+    async def bulk_revoke_permissions(
+        self, pairs: list[UserPermissionPair]
+    ) -> list[UserPermissionPairResult]:
+        """Revoke many permissions from users at once, outcomes follow the request order."""
+        outcomes = await self.user_permission_repository.bulk_revoke(
+            [(pair.user_uuid, pair.permission_uuid) for pair in pairs]
         )
-        if not existing:
-            return False
+        return self._pair_results(pairs, outcomes, UserPermissionOutcome.REVOKED)
 
-        await self.user_permission_repository.delete_user_permission(user, permission)
-        return True
+    def _pair_results(
+        self,
+        pairs: list[UserPermissionPair],
+        outcomes: list[UserPermissionOutcome],
+        changed: UserPermissionOutcome,
+    ) -> list[UserPermissionPairResult]:
+        for pair, outcome in zip(pairs, outcomes):
+            if outcome == changed:
+                invalidate_permissions(
+                    self.user_permission_repository.session,
+                    self.permission_cache,
+                    self.invalidation_bus,
+                    pair.user_uuid,
+                    bitsets_cache=self.bitsets_cache,
+                )
+
+        return [
+            UserPermissionPairResult(
+                user_uuid=pair.user_uuid, permission_uuid=pair.permission_uuid, outcome=outcome
+            )
+            for pair, outcome in zip(pairs, outcomes)
+        ]
 
     async def get_permission_users(self, permission_uuid: UUID) -> list[str]:
         """Get list of user UUIDs that have this permission."""
-        permission = await self.permission_repository.get(permission_uuid)
-        users = await self.user_permission_repository.get_permission_users(permission)
-        return [str(user.uuid) for user in users]
+        return await self.read_flights.do(
+            ("permission_users", permission_uuid),
+            lambda: self._get_permission_users(permission_uuid),
+        )
+
+    async def _get_permission_users(self, permission_uuid: UUID) -> list[str]:
+        bitsets = await self._get_bitsets()
+        if bitsets is not None:
+            permission_name = bitsets.permission_name(permission_uuid)
+            if permission_name is not None:
+                return [str(user_uuid) for user_uuid in bitsets.users_with(permission_name)]
+
+        # Not in the snapshot, the permission was created after it was loaded or doesn't exist
+        permission_id = await self.permission_repository.get_id(permission_uuid)
+        user_uuids = await self.user_permission_repository.get_permission_user_uuids(permission_id)
+        return [str(user_uuid) for user_uuid in user_uuids]
+
+    async def _get_bitsets(self) -> PermissionBitsets | None:
+        """The snapshot of every grant, loaded once stale, None when it isn't kept."""
+        if self.bitsets_cache.maxsize <= 0 or self.bitsets_cache.ttl <= 0:
+            return None
+
+        bitsets = self.bitsets_cache.get(PERMISSION_BITSETS_KEY)
+        if bitsets is None:
+            bitsets = await self.bitset_flights.do(
+                PERMISSION_BITSETS_KEY, self.permission_bitset_repository.load
+            )
+            self.bitsets_cache.set(PERMISSION_BITSETS_KEY, bitsets)
+        return bitsets
@@ -1,78 +1,268 @@
+from collections.abc import AsyncIterator
 from uuid import UUID
 
+import orjson
+from sqlalchemy import Row
+
+from src.core.cache import TTLCache
+from src.core.cache_backends import CacheBackend
+from src.core.invalidation import InvalidationBus
+from src.core.singleflight import SingleFlight
 from src.domain.models import User
-from src.domain.models.user import UserCreate, UserPublic, UserUpdate, UserWithPermissions
+from src.domain.models.user import (
+    UserBatch,
+    UserBulkConflict,
+    UserBulkCreateResult,
+    UserCreate,
+    UserPublic,
+    UserUpdate,
+    UserWithPermissions,
+)
+from src.domain.models.user_permission import UserPermissionCheck, UserPermissionCheckResult
 from src.domain.repositories import UserRepository, UserPermissionRepository
+from src.domain.repositories.permission_bitset import PermissionBitsets
+from src.web.services.cache import (
+    PERMISSION_BITSETS_KEY,
+    cache_lookup,
+    get_cached,
+    get_cached_by,
+    invalidate_lookup,
+    invalidate_permissions,
+    invalidation_bus,
+    lookup_cache,
+    permission_bitsets_cache,
+    read_flights,
+    user_email_key,
+    user_google_id_key,
+    user_key,
+    user_permissions_cache,
+)
+from src.web.services.pagination import decode_cursor, encode_cursor
+
+MAX_CACHED_CHECKS_PER_USER = 256
 
 
 class UserService:
     def __init__(
-        self, user_repository: UserRepository, user_permission_repository: UserPermissionRepository
+        self,
+        user_repository: UserRepository,
+        user_permission_repository: UserPermissionRepository,
+        permission_cache: TTLCache[UUID, dict[str, bool]] = user_permissions_cache,
+        invalidation_bus: InvalidationBus = invalidation_bus,
+        lookup_cache: CacheBackend = lookup_cache,
+        read_flights: SingleFlight[tuple[str, UUID | None], list] = read_flights,
+        bitsets_cache: TTLCache[str, PermissionBitsets] = permission_bitsets_cache,
     ):
         self.user_repository = user_repository
         self.user_permission_repository = user_permission_repository
+        self.permission_cache = permission_cache
+        self.invalidation_bus = invalidation_bus
+        self.lookup_cache = lookup_cache
+        self.read_flights = read_flights
+        self.bitsets_cache = bitsets_cache
 
-    async def _parse_to_public(self, user: User) -> UserPublic:
-        return UserPublic(**user.model_dump())
-
-    async def _parse_to_public_with_permissions(self, user: User) -> UserWithPermissions:
-        permissions = await self.user_permission_repository.get_user_permissions(user)
-        permission_names = [p.name for p in permissions]
+    async def _parse_to_public(self, user: User | Row) -> UserPublic:
+        # Validated once, straight from the row attributes. SQLModel.model_validate copies the
+        # row in Python first and costs as much as dumping and validating it again
+        return UserPublic.__pydantic_validator__.validate_python(user, from_attributes=True)
 
-        return UserWithPermissions(**user.model_dump(), permissions=permission_names)
+    async def _parse_to_public_with_permissions(self, user: Row) -> UserWithPermissions:
+        return UserWithPermissions.model_validate(
+            user, from_attributes=True, update={"permissions": user.permission_names}
+        )
 
     async def create_user(self, user_create: UserCreate) -> UserPublic:
         user = await self.user_repository.create(user_create)
         return await self._parse_to_public(user)
 
+    async def bulk_create_users(self, user_creates: list[UserCreate]) -> UserBulkCreateResult:
+        uuids = await self.user_repository.bulk_create(user_creates)
+
+        return UserBulkCreateResult(
+            created=[uuid for uuid in uuids if uuid is not None],
+            conflicts=[
+                UserBulkConflict(index=index, email=user.email, google_id=user.google_id)
+                for index, (uuid, user) in enumerate(zip(uuids, user_creates))
+                if uuid is None
+            ],
+        )
+
     async def get_user(self, uuid: UUID) -> UserPublic:
-        user = await self.user_repository.get(uuid)
-        return await self._parse_to_public(user)
+        cached = await get_cached(self.lookup_cache, UserPublic, user_key(uuid))
+        if cached is not None:
+            return cached
+
+        user = await self._parse_to_public(await self.user_repository.get(uuid))
+        await cache_lookup(self.lookup_cache, user_key(user.uuid), user)
+        return user
+
+    async def get_users(self, uuids: list[UUID]) -> UserBatch:
+        """Get many users in a single query, keeping the request order and listing misses."""
+        requested = list(dict.fromkeys(uuids))
+        rows = {row.uuid: row for row in await self.user_repository.get_many(requested)}
+
+        return UserBatch(
+            users=[await self._parse_to_public(rows[uuid]) for uuid in requested if uuid in rows],
+            missing=[uuid for uuid in requested if uuid not in rows],
+        )
 
     async def get_user_with_permissions(self, uuid: UUID) -> UserWithPermissions:
-        user = await self.user_repository.get(uuid)
+        user = await self.user_repository.get_row_with_permission_names(uuid)
         return await self._parse_to_public_with_permissions(user)
 
     async def get_user_by_google_id(self, google_id: str) -> UserPublic | None:
+        pointer_key = user_google_id_key(google_id)
+        cached = await get_cached_by(
+            self.lookup_cache, UserPublic, pointer_key, "google_id", google_id
+        )
+        if cached is not None:
+            return cached
+
         user = await self.user_repository.get_by_google_id(google_id)
         if user:
-            return await self._parse_to_public(user)
+            public = await self._parse_to_public(user)
+            await cache_lookup(self.lookup_cache, user_key(public.uuid), public, pointer_key)
+            return public
         return None
 
     async def get_user_by_email(self, email: str) -> UserPublic | None:
+        pointer_key = user_email_key(email)
+        cached = await get_cached_by(self.lookup_cache, UserPublic, pointer_key, "email", email)
+        if cached is not None:
+            return cached
+
         user = await self.user_repository.get_by_email(email)
         if user:
-            return await self._parse_to_public(user)
+            public = await self._parse_to_public(user)
+            await cache_lookup(self.lookup_cache, user_key(public.uuid), public, pointer_key)
+            return public
         return None
 
     async def update_user(self, uuid: UUID, user_update: UserUpdate) -> UserPublic:
-        user = await self.user_repository.get(uuid)
-        user = await self.user_repository.update(user, user_update)
+        user = await self.user_repository.update_by_uuid(uuid, user_update)
+        invalidate_permissions(
+            self.user_permission_repository.session,
+            self.permission_cache,
+            self.invalidation_bus,
+            uuid,
+            bitsets_cache=self.bitsets_cache,
+        )
+        await invalidate_lookup(
+            self.user_repository.session, self.lookup_cache, self.invalidation_bus, user_key(uuid)
+        )
         return await self._parse_to_public(user)
 
     async def delete_user(self, uuid: UUID) -> None:
-        user = await self.user_repository.get(uuid)
-        await self.user_repository.delete(user)
+        await self.user_repository.delete_by_uuid(uuid)
+        invalidate_permissions(
+            self.user_permission_repository.session,
+            self.permission_cache,
+            self.invalidation_bus,
+            uuid,
+            bitsets_cache=self.bitsets_cache,
+        )
+        await invalidate_lookup(
+            self.user_repository.session, self.lookup_cache, self.invalidation_bus, user_key(uuid)
+        )
 
     async def list_users(self, skip: int = 0, limit: int = 100) -> list[UserPublic]:
-        users = await self.user_repository.list_all(skip, limit)
+        users = await self.user_repository.list_all_rows(skip, limit)
         return [await self._parse_to_public(user) for user in users]
 
+    async def list_users_after(
+        self, after: str | None = None, limit: int = 100
+    ) -> tuple[list[UserPublic], str | None]:
+        """List a page of users after the cursor, returns the users and the next cursor."""
+        after_id = decode_cursor(after) if after else None
+        users = await self.user_repository.list_after_rows(after_id, limit)
+
+        next_cursor = encode_cursor(users[-1].id) if len(users) == limit else None
+        return [await self._parse_to_public(user) for user in users], next_cursor
+
+    async def export_users(self) -> AsyncIterator[bytes]:
+        """Every public user as newline delimited JSON, one chunk per batch of rows."""
+        fields = list(UserPublic.model_fields)
+
+        async for rows in self.user_repository.stream_rows():
+            yield b"".join(
+                orjson.dumps(
+                    {field: getattr(row, field) for field in fields},
+                    option=orjson.OPT_APPEND_NEWLINE,
+                )
+                for row in rows
+            )
+
     async def get_admins(self) -> list[UserPublic]:
-        admins = await self.user_repository.get_admins()
+        return await self.read_flights.do(("admins", None), self._get_admins)
+
+    async def _get_admins(self) -> list[UserPublic]:
+        admins = await self.user_repository.get_admin_rows()
         return [await self._parse_to_public(admin) for admin in admins]
 
     async def check_user_has_permission(self, user_uuid: UUID, permission_name: str) -> bool:
-        user = await self.user_repository.get(user_uuid)
+        checked = self.permission_cache.get(user_uuid)
+        if checked is not None and permission_name in checked:
+            return checked[permission_name]
+
+        bitsets = self._loaded_bitsets()
+        if bitsets is not None and user_uuid in bitsets:
+            return bitsets.has_permission(user_uuid, permission_name)
+
+        has_permission = await self.user_permission_repository.has_permission(
+            user_uuid, permission_name
+        )
 
-        # Admin users have all permissions
-        if user.is_admin:
-            return True
+        if checked is None:
+            checked = {}
+            self.permission_cache.set(user_uuid, checked)
+        # Names come from the request path, so only remember a bounded number of them
+        if len(checked) < MAX_CACHED_CHECKS_PER_USER:
+            checked[permission_name] = has_permission
 
-        permissions = await self.user_permission_repository.get_user_permissions(user)
-        return any(p.name == permission_name for p in permissions)
+        return has_permission
+
+    async def check_user_permissions(
+        self, checks: list[UserPermissionCheck]
+    ) -> list[UserPermissionCheckResult]:
+        """Check many (user, permission) pairs, unknown users do not hold any permission."""
+        answers: list[bool | None] = []
+        for check in checks:
+            checked = self.permission_cache.get(check.user_uuid)
+            answers.append(checked.get(check.permission_name) if checked is not None else None)
+
+        bitsets = self._loaded_bitsets()
+        if bitsets is not None:
+            for index, check in enumerate(checks):
+                if answers[index] is None and check.user_uuid in bitsets:
+                    answers[index] = bitsets.has_permission(check.user_uuid, check.permission_name)
+
+        # Only the pairs not answered by the cache go to the database, in a single query
+        missing = [index for index, answer in enumerate(answers) if answer is None]
+        if missing:
+            queried = await self.user_permission_repository.has_permissions(
+                [(checks[index].user_uuid, checks[index].permission_name) for index in missing]
+            )
+            for index, answer in zip(missing, queried):
+                answers[index] = answer
+
+        return [
+            UserPermissionCheckResult(
+                user_uuid=check.user_uuid,
+                permission_name=check.permission_name,
+                has_permission=bool(answer),
+            )
+            for check, answer in zip(checks, answers)
+        ]
+
+    def _loaded_bitsets(self) -> PermissionBitsets | None:
+        # Loading every grant only pays off for the scans of PermissionService, a check uses the
+        # snapshot once it is loaded. Users not in it, without any grant, go to the database.
+        return self.bitsets_cache.get(PERMISSION_BITSETS_KEY)
 
     async def get_user_permissions(self, user_uuid: UUID) -> list[str]:
-        user = await self.user_repository.get(user_uuid)
-        permissions = await self.user_permission_repository.get_user_permissions(user)
-        return [p.name for p in permissions]
+        return await self.read_flights.do(
+            ("user_permissions", user_uuid), lambda: self._get_user_permissions(user_uuid)
+        )
+
+    async def _get_user_permissions(self, user_uuid: UUID) -> list[str]:
+        return await self.user_permission_repository.get_user_permission_names_by_uuid(user_uuid)
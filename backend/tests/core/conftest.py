@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from src.core.cache_backends import read_reply
+
+
+class FakeRespServer:
+    """In-process stand-in of a RESP key value server, answering GET, MGET, SET PX [NX] and DEL."""
+
+    def __init__(self):
+        self.values: dict[bytes, bytes] = {}
+        self.ttls: dict[bytes, int] = {}
+        self.commands: list[list[bytes]] = []
+        self.connections: list[asyncio.StreamWriter] = []
+        # Sent instead of the reply to every command when set, like a garbled one
+        self.raw_reply: bytes | None = None
+        self.server: asyncio.Server | None = None
+        self._port = 0
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", self._port)
+        self._port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()  # type: ignore
+        for writer in self.connections:
+            writer.close()
+        await self.server.wait_closed()  # type: ignore
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections.append(writer)
+        try:
+            while True:
+                command = await read_reply(reader)
+                self.commands.append(command)
+                writer.write(self.reply(command))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def reply(self, command: list[bytes]) -> bytes:
+        if self.raw_reply is not None:
+            return self.raw_reply
+
+        name, *args = command
+        if name == b"GET":
+            return self.bulk(self.values.get(args[0]))
+        if name == b"MGET":
+            return b"*%d\r\n" % len(args) + b"".join(
+                self.bulk(self.values.get(key)) for key in args
+            )
+        if name == b"SET":
+            if b"NX" in args and args[0] in self.values:
+                return b"$-1\r\n"
+            self.values[args[0]] = args[1]
+            self.ttls[args[0]] = int(args[3])
+            return b"+OK\r\n"
+        if name == b"DEL":
+            deleted = [key for key in args if self.values.pop(key, None) is not None]
+            return b":%d\r\n" % len(deleted)
+        return b"-ERR unknown command\r\n"
+
+    @staticmethod
+    def bulk(value: bytes | None) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%b\r\n" % (len(value), value)
+
+
+@pytest.fixture()
+async def resp_server():
+    server = FakeRespServer()
+    await server.start()
+    yield server
+    await server.stop()
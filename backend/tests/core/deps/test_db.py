@@ -4,7 +4,7 @@ import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio.engine import AsyncEngine
 
-from src.core.deps.db import get_db_session
+from src.core.deps.db import get_db_read_session, get_db_session
 
 
 async def test_get_db_session(db_url: str):
@@ -47,3 +47,23 @@ async def test_get_db_session_rollback(mocker):
         await failing_usage()
 
     mock_session.rollback.assert_awaited_once()
+
+
+async def test_get_db_read_session():
+    async for session in get_db_read_session():
+        assert isinstance(session, AsyncSession)
+        assert session.bind.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+
+
+async def test_get_db_read_session_does_not_commit(mocker):
+    mock_session = mocker.AsyncMock()
+    mocker.patch("src.core.deps.db.AsyncReadSessionLocal", return_value=mock_session)
+
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    async for _ in get_db_read_session():
+        pass
+
+    mock_session.commit.assert_not_awaited()
+    mock_session.__aexit__.assert_awaited_once()
@@ -0,0 +1,128 @@
+from sqlalchemy.orm import Session
+
+from src.core.cache import TTLCache, delete_on_commit
+
+
+def test_get_missing_key():
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+
+    assert cache.get("missing") is None
+
+
+def test_set_and_get():
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert len(cache) == 1
+
+
+def test_expired_entry(mocker):
+    monotonic = mocker.patch("src.core.cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+    cache.set("key", "value")
+
+    monotonic.return_value = 160.0
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_entry_with_own_ttl(mocker):
+    monotonic = mocker.patch("src.core.cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+    cache.set("short", "value", ttl=5)
+    cache.set("default", "value")
+
+    monotonic.return_value = 106.0
+
+    assert cache.get("short") is None
+    assert cache.get("default") == "value"
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(name="test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Touch "a" so "b" becomes the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_disabled_cache():
+    cache = TTLCache(name="test", maxsize=0, ttl=60)
+    cache.set("key", "value")
+
+    assert cache.get("key") is None
+
+
+def test_delete_and_clear():
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.delete("a")
+    cache.delete("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_counters():
+    cache = TTLCache(name="test_counters", maxsize=1, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.set("b", 2)
+
+    assert cache._hits._value.get() == 1
+    assert cache._misses._value.get() == 1
+    assert cache._evicted._value.get() == 1
+
+
+def test_delete_on_commit():
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+    session = Session()
+    cache.set("a", 1)
+
+    delete_on_commit(session, cache, "a")
+    assert cache.get("a") is None
+
+    # Cached again by a read that ran before the commit
+    cache.set("a", 1)
+    cache.set("b", 2)
+    session.commit()
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+
+def test_delete_on_commit_clears_the_cache():
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+    session = Session()
+    delete_on_commit(session, cache)
+
+    cache.set("a", 1)
+    session.commit()
+
+    assert len(cache) == 0
+
+
+def test_delete_on_commit_dropped_on_rollback():
+    cache = TTLCache(name="test", maxsize=10, ttl=60)
+    session = Session()
+    session.begin()
+    delete_on_commit(session, cache, "a")
+
+    cache.set("a", 1)
+    session.rollback()
+    session.commit()
+
+    assert cache.get("a") == 1
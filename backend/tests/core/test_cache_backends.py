@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.core.cache_backends import (
+    MemoryBackend,
+    RespBackend,
+    delete_keys_on_commit,
+    encode_command,
+)
+
+
+@pytest.fixture()
+async def resp_backend(resp_server):
+    backend = RespBackend(
+        name="test", host="127.0.0.1", port=resp_server.port, timeout=1, prefix="app:"
+    )
+    yield backend
+    await backend.close()
+
+
+def test_encode_command():
+    assert encode_command(["SET", "key", b"value", "PX", 500]) == (
+        b"*5\r\n$3\r\nSET\r\n$3\r\nkey\r\n$5\r\nvalue\r\n$2\r\nPX\r\n$3\r\n500\r\n"
+    )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_memory_backend():
+    backend = MemoryBackend(name="test", maxsize=10)
+    await backend.set("a", b"1", ttl=60)
+    await backend.set("b", b"2", ttl=60)
+
+    assert await backend.get("a") == b"1"
+    assert await backend.mget(["a", "missing", "b"]) == [b"1", None, b"2"]
+
+    await backend.delete("a", "missing")
+
+    assert await backend.get("a") is None
+    assert await backend.get("b") == b"2"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_memory_backend_ttl(mocker):
+    monotonic = mocker.patch("src.core.cache.time.monotonic", return_value=100.0)
+    backend = MemoryBackend(name="test", maxsize=10)
+    await backend.set("short", b"1", ttl=5)
+    await backend.set("long", b"2", ttl=60)
+
+    monotonic.return_value = 110.0
+
+    assert await backend.mget(["short", "long"]) == [None, b"2"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_backend(resp_backend, resp_server):
+    await resp_backend.set("a", b"1", ttl=1.5)
+    await resp_backend.set("b", b"2", ttl=60)
+
+    assert resp_server.values == {b"app:a": b"1", b"app:b": b"2"}
+    assert resp_server.ttls == {b"app:a": 1500, b"app:b": 60000}
+    assert await resp_backend.get("a") == b"1"
+    assert await resp_backend.get("missing") is None
+    assert await resp_backend.mget(["a", "missing", "b"]) == [b"1", None, b"2"]
+
+    await resp_backend.delete("a", "missing")
+
+    assert await resp_backend.get("a") is None
+    assert await resp_backend.get("b") == b"2"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_backend_reuses_connection(resp_backend, resp_server):
+    await resp_backend.set("a", b"1", ttl=60)
+    replies = await asyncio.gather(*(resp_backend.get("a") for _ in range(10)))
+
+    assert replies == [b"1"] * 10
+    assert len(resp_server.connections) == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_backend_skips_empty_commands(resp_backend, resp_server):
+    assert await resp_backend.mget([]) == []
+    await resp_backend.delete()
+
+    assert resp_server.commands == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_backend_error_reply(resp_backend):
+    with pytest.raises(Exception, match="unknown command"):
+        await resp_backend.execute("FLUSHALL")
+
+    # The connection is still usable after an error reply
+    await resp_backend.set("a", b"1", ttl=60)
+    assert await resp_backend.get("a") == b"1"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_backend_unreachable():
+    backend = RespBackend(name="test", host="127.0.0.1", port=1, timeout=0.5)
+
+    assert await backend.get("a") is None
+    assert await backend.mget(["a", "b"]) == [None, None]
+    await backend.set("a", b"1", ttl=60)
+    await backend.delete("a")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_backend_reconnects(resp_backend, resp_server):
+    await resp_backend.set("a", b"1", ttl=60)
+    await resp_server.stop()
+
+    assert await resp_backend.get("a") is None
+
+    await resp_server.start()
+
+    assert await resp_backend.get("a") == b"1"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_backend_invalid_reply(resp_backend, resp_server):
+    await resp_backend.set("a", b"1", ttl=60)
+
+    resp_server.raw_reply = b"$abc\r\n"
+    assert await resp_backend.get("a") is None
+    resp_server.raw_reply = b"*1\r\n:1.5\r\n"
+    assert await resp_backend.mget(["a"]) == [None]
+
+    # The connection is dropped, the next command opens a new one
+    resp_server.raw_reply = None
+    assert await resp_backend.get("a") == b"1"
+    assert len(resp_server.connections) == 3
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_keys_on_commit():
+    backend = MemoryBackend(name="test", maxsize=10)
+    session = Session()
+    await backend.set("a", b"1", ttl=60)
+
+    await delete_keys_on_commit(session, backend, "a")
+    assert await backend.get("a") is None
+
+    # Cached again by a read that ran before the commit
+    await backend.set("a", b"1", ttl=60)
+    await backend.set("b", b"2", ttl=60)
+    session.commit()
+    await asyncio.sleep(0)
+
+    assert await backend.get("a") is None
+    assert await backend.get("b") == b"2"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_keys_on_commit_dropped_on_rollback():
+    backend = MemoryBackend(name="test", maxsize=10)
+    session = Session()
+    session.begin()
+    await delete_keys_on_commit(session, backend, "a")
+
+    await backend.set("a", b"1", ttl=60)
+    session.rollback()
+    session.commit()
+    await asyncio.sleep(0)
+
+    assert await backend.get("a") == b"1"
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from src.core.loader import DataLoader
+
+
+def make_loader(values: dict):
+    batches = []
+
+    async def batch_load(keys):
+        batches.append(list(keys))
+        return {key: values[key] for key in keys if key in values}
+
+    return DataLoader(batch_load), batches
+
+
+async def test_loads_of_the_same_tick_are_batched():
+    loader, batches = make_loader({1: "one", 2: "two"})
+
+    results = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1))
+
+    assert results == ["one", "two", "one"]
+    assert batches == [[1, 2]]
+
+
+async def test_loaded_values_are_memoized():
+    loader, batches = make_loader({1: "one"})
+
+    assert await loader.load(1) == "one"
+    assert await loader.load(1) == "one"
+    assert batches == [[1]]
+
+
+async def test_extra_values_are_memoized():
+    async def batch_load(keys):
+        return {key: "row" for key in keys} | {"alias": "row"}
+
+    loader = DataLoader(batch_load)
+    await loader.load(1)
+
+    loader.batch_load = None
+    assert await loader.load("alias") == "row"
+
+
+async def test_missing_keys_are_not_memoized():
+    values = {}
+    loader, batches = make_loader(values)
+
+    assert await loader.load(1) is None
+
+    values[1] = "one"
+    assert await loader.load(1) == "one"
+    assert batches == [[1], [1]]
+
+
+async def test_batch_errors_reach_every_load():
+    calls = 0
+
+    async def batch_load(keys):
+        nonlocal calls
+        calls += 1
+        raise ValueError("batch failed")
+
+    loader = DataLoader(batch_load)
+
+    results = await asyncio.gather(loader.load(1), loader.load(2), return_exceptions=True)
+    assert [str(result) for result in results] == ["batch failed"] * 2
+
+    with pytest.raises(ValueError):
+        await loader.load(1)
+    assert calls == 2
+
+
+async def test_prime_and_clear():
+    loader, batches = make_loader({1: "one"})
+
+    loader.prime(1, "primed")
+    assert await loader.load(1) == "primed"
+    assert batches == []
+
+    loader.clear()
+    assert await loader.load(1) == "one"
+    assert batches == [[1]]
+
+
+async def test_close_cancels_the_loads_in_flight():
+    started = asyncio.Event()
+
+    async def batch_load(keys):
+        started.set()
+        await asyncio.Event().wait()
+
+    loader = DataLoader(batch_load)
+    load = asyncio.ensure_future(loader.load(1))
+    await started.wait()
+
+    loader.close()
+    with pytest.raises(asyncio.CancelledError):
+        await load
+    await asyncio.sleep(0)
+    assert not loader._tasks
+
+
+async def test_close_cancels_the_loads_not_dispatched_yet():
+    loader, batches = make_loader({1: "one"})
+    load = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0)
+
+    loader.close()
+    with pytest.raises(asyncio.CancelledError):
+        await load
+    await asyncio.sleep(0)
+    assert batches == []
+
+
+async def test_cancelled_batch_cancels_its_loads():
+    async def batch_load(keys):
+        raise asyncio.CancelledError
+
+    loader = DataLoader(batch_load)
+
+    with pytest.raises(asyncio.CancelledError):
+        await loader.load(1)
+    await asyncio.sleep(0)
+    assert not loader._tasks
@@ -0,0 +1,118 @@
+import pytest
+
+from src.core.cache_backends import RespBackend
+from src.core.replay import LocalNonceStore, ReplayGuard, RespNonceStore
+
+WINDOW = 1000
+SIGNATURE = "ab" * 32
+OTHER_SIGNATURE = "cd" * 32
+REQUEST = "GET /api/users/a"
+
+
+async def test_rejects_replayed_signature():
+    guard = ReplayGuard(LocalNonceStore(name="test", maxsize=10), window=WINDOW)
+
+    assert await guard.check(REQUEST, SIGNATURE, "10500", now=10600)
+    assert await guard.check(REQUEST, OTHER_SIGNATURE, "10500", now=10600)
+    assert not await guard.check(REQUEST, SIGNATURE, "10500", now=10700)
+
+
+async def test_same_signature_on_other_request():
+    guard = ReplayGuard(LocalNonceStore(name="test", maxsize=10), window=WINDOW)
+
+    # Bodyless requests signed in the same millisecond have the same signature
+    assert await guard.check("GET /api/users/a", SIGNATURE, "10500", now=10600)
+    assert await guard.check("GET /api/permissions/b", SIGNATURE, "10500", now=10600)
+    assert await guard.check("GET /api/users/a?limit=1", SIGNATURE, "10500", now=10600)
+    assert not await guard.check("GET /api/users/a", SIGNATURE, "10500", now=10600)
+
+
+async def test_drops_expired_buckets():
+    store = LocalNonceStore(name="test", maxsize=10)
+    guard = ReplayGuard(store, window=WINDOW)
+
+    await guard.check(REQUEST, SIGNATURE, "10500", now=10600)
+    await guard.check(REQUEST, OTHER_SIGNATURE, "11500", now=11600)
+    assert len(store) == 2
+
+    # Timestamps of the 10000 bucket are all older than the window from here
+    await guard.check(REQUEST, "ef" * 32, "12500", now=12000)
+    assert len(store) == 2
+    assert store._expired._value.get() == 1
+
+
+async def test_keeps_buckets_inside_window():
+    store = LocalNonceStore(name="test", maxsize=10)
+    guard = ReplayGuard(store, window=WINDOW)
+
+    await guard.check(REQUEST, SIGNATURE, "10999", now=11000)
+
+    # 10999 is still accepted by the timestamp check at 11999
+    assert not await guard.check(REQUEST, SIGNATURE, "10999", now=11999)
+
+
+async def test_store_is_bounded():
+    store = LocalNonceStore(name="test_bounded", maxsize=2)
+
+    assert await store.add(1, b"a")
+    assert await store.add(2, b"b")
+    assert await store.add(2, b"c")
+
+    assert len(store) == 2
+    assert store._evicted._value.get() == 1
+    assert await store.add(1, b"a")
+
+
+async def test_memory_usage():
+    store = LocalNonceStore(name="test", maxsize=10)
+    assert store.memory_usage() == 0
+
+    await store.add(1, bytes.fromhex(SIGNATURE))
+    assert store.memory_usage() > 32
+
+    store.clear()
+    assert len(store) == 0
+
+
+@pytest.fixture()
+async def resp_nonces(resp_server):
+    backend = RespBackend(
+        name="test", host="127.0.0.1", port=resp_server.port, timeout=1, prefix="app:"
+    )
+    store = RespNonceStore(backend, ttl=3, fallback=LocalNonceStore(name="test", maxsize=10))
+    yield store
+    await store.close()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_store_is_shared(resp_server, resp_nonces):
+    guard = ReplayGuard(resp_nonces, window=WINDOW)
+    other_worker = ReplayGuard(
+        RespNonceStore(
+            RespBackend(
+                name="test", host="127.0.0.1", port=resp_server.port, timeout=1, prefix="app:"
+            ),
+            ttl=3,
+            fallback=LocalNonceStore(name="test", maxsize=10),
+        ),
+        window=WINDOW,
+    )
+
+    assert await guard.check(REQUEST, SIGNATURE, "10500", now=10600)
+    assert not await other_worker.check(REQUEST, SIGNATURE, "10500", now=10600)
+    assert await other_worker.check(REQUEST, OTHER_SIGNATURE, "10500", now=10600)
+    await other_worker.store.close()
+
+    nonce, ttl = next(iter(resp_server.ttls.items()))
+    assert nonce.startswith(b"app:nonce:10:")
+    assert ttl == 3000
+    assert len(resp_nonces.fallback) == 0
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_resp_store_falls_back_to_local(resp_server, resp_nonces):
+    await resp_server.stop()
+
+    assert await resp_nonces.add(10, b"a")
+    assert not await resp_nonces.add(10, b"a")
+    assert len(resp_nonces.fallback) == 1
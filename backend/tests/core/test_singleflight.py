@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from src.core.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_run():
+    flight = SingleFlight(name="test")
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["value"]
+
+    results = await asyncio.gather(*(flight.do("key", load) for _ in range(500)))
+
+    assert calls == 1
+    assert results == [["value"]] * 500
+    assert len(flight) == 0
+
+
+async def test_different_keys_run_separately():
+    flight = SingleFlight(name="test")
+
+    async def load(key):
+        await asyncio.sleep(0)
+        return key
+
+    assert await asyncio.gather(
+        flight.do("a", lambda: load("a")), flight.do("b", lambda: load("b"))
+    ) == [
+        "a",
+        "b",
+    ]
+
+
+async def test_completed_calls_are_not_kept():
+    flight = SingleFlight(name="test")
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("key", load) == 1
+    assert await flight.do("key", load) == 2
+
+
+async def test_error_is_shared_and_forgotten():
+    flight = SingleFlight(name="test")
+    calls = 0
+
+    async def fail():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+    )
+
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    with pytest.raises(ValueError):
+        await flight.do("key", fail)
+    assert calls == 2
+
+
+async def test_waiting_caller_takes_over_when_the_runner_is_cancelled():
+    flight = SingleFlight(name="test")
+    started = asyncio.Event()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.01)
+        return calls
+
+    runner = asyncio.create_task(flight.do("key", load))
+    await started.wait()
+    waiter = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+
+    runner.cancel()
+
+    assert await waiter == 2
+    assert runner.cancelled()
+
+
+async def test_cancelled_waiter_does_not_cancel_the_run():
+    flight = SingleFlight(name="test")
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "value"
+
+    runner = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(flight.do("key", load))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+
+    assert await runner == "value"
+    assert waiter.cancelled()
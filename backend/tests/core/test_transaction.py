@@ -0,0 +1,57 @@
+from sqlalchemy.orm import Session
+
+from src.core.transaction import queue_on_commit
+
+
+def make_run(calls: list):
+    def run(session, items):
+        calls.append(list(items))
+
+    return run
+
+
+def test_queued_items_run_on_commit():
+    before, after = [], []
+    run_before, run_after = make_run(before), make_run(after)
+    session = Session()
+
+    queue_on_commit(session, "before_commit", run_before, 1)
+    queue_on_commit(session, "before_commit", run_before, 2)
+    queue_on_commit(session, "after_commit", run_after, 3)
+    assert before == after == []
+
+    session.commit()
+    assert before == [[1, 2]]
+    assert after == [[3]]
+
+    # Run once, the next commit starts from an empty queue
+    session.commit()
+    assert before == [[1, 2]]
+
+
+def test_queued_items_dropped_on_rollback():
+    calls = []
+    run = make_run(calls)
+    session = Session()
+    session.begin()
+    queue_on_commit(session, "after_commit", run, 1)
+
+    session.rollback()
+    session.commit()
+
+    assert calls == []
+
+
+def test_queued_items_kept_on_savepoint_rollback(mocker):
+    calls = []
+    run = make_run(calls)
+    session = Session()
+    session.begin()
+    queue_on_commit(session, "after_commit", run, 1)
+
+    # The savepoint isn't emitted without a connection, its rollback event is what matters
+    savepoint = mocker.Mock(parent=object())
+    session.dispatch.after_soft_rollback(session, savepoint)
+    session.commit()
+
+    assert calls == [[1]]
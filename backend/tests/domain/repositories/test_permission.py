@@ -1,5 +1,6 @@
 import pytest
 from sqlalchemy.exc import IntegrityError
+from uuid6 import uuid7
 
 from src.domain.models.permission import PermissionUpdate
 from src.domain.repositories.exceptions import NoPermissionFound
@@ -48,6 +49,28 @@ async def test_update_permission(db_session, permission):
     assert updated_permission.description == "New description"
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_many_permissions(db_session, permission):
+    repository = PermissionRepository(session=db_session)
+
+    rows = await repository.get_many([uuid7(), permission.uuid])
+    assert [(row.uuid, row.name) for row in rows] == [(permission.uuid, permission.name)]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_permission_by_uuid(db_session, permission):
+    repository = PermissionRepository(session=db_session)
+
+    updated_permission = await repository.update_by_uuid(
+        permission.uuid, PermissionUpdate(description="New description")
+    )
+    assert updated_permission.description == "New description"
+    assert updated_permission.name == permission.name
+
+    with pytest.raises(NoPermissionFound):
+        await repository.update_by_uuid(uuid7(), PermissionUpdate(name="new_name"))
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_delete_permission(db_session, permission):
     repository = PermissionRepository(session=db_session)
@@ -57,6 +80,21 @@ async def test_delete_permission(db_session, permission):
         await repository.get(permission_id=permission.id)
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_permission_by_uuid(db_session, user, permission, user_permission_repository):
+    repository = PermissionRepository(session=db_session)
+    await user_permission_repository.assign(user.uuid, permission.uuid)
+
+    await repository.delete_by_uuid(permission.uuid)
+
+    with pytest.raises(NoPermissionFound):
+        await repository.get(permission.uuid)
+    assert await user_permission_repository.get_user_permission_names_by_uuid(user.uuid) == []
+
+    with pytest.raises(NoPermissionFound):
+        await repository.delete_by_uuid(permission.uuid)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_create_permission_unique_name(db_session, permission_create):
     repository = PermissionRepository(session=db_session)
@@ -86,6 +124,40 @@ async def test_list_all_permissions(db_session, permission_repository, permissio
     assert "permission_3" in permission_names
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_permissions_after(db_session, permission_repository, permission_create):
+    permission = await permission_repository.create(permission_create)
+
+    permission2_create = permission_create.model_copy()
+    permission2_create.name = "permission_2"
+    permission2 = await permission_repository.create(permission2_create)
+
+    rows = await permission_repository.list_after_rows(after_id=permission.id - 1, limit=1)
+    assert [(row.id, row.uuid, row.name) for row in rows] == [
+        (permission.id, permission.uuid, permission.name)
+    ]
+
+    rows = await permission_repository.list_after_rows(after_id=permission.id, limit=10)
+    assert [row.uuid for row in rows] == [permission2.uuid]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_permission_rows(db_session, permission_repository, permission_create):
+    permission = await permission_repository.create(permission_create)
+
+    rows = await permission_repository.list_all_rows(skip=0, limit=10)
+    assert (permission.id, permission.name) in [(row.id, row.name) for row in rows]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_permission_id(db_session, permission_repository, permission_create):
+    permission = await permission_repository.create(permission_create)
+    assert await permission_repository.get_id(permission.uuid) == permission.id
+
+    with pytest.raises(NoPermissionFound):
+        await permission_repository.get_id(uuid7())
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_permission_not_found(db_session):
     repository = PermissionRepository(session=db_session)
@@ -0,0 +1,141 @@
+import pytest
+from uuid6 import uuid7
+
+from src.domain.models.permission import PermissionCreate
+from src.domain.repositories.permission import PermissionRepository
+from src.domain.repositories.permission_bitset import (
+    PermissionBitsetRepository,
+    PermissionBitsets,
+    decode_bitset,
+    encode_bitset,
+    iter_bits,
+)
+from src.domain.repositories.user import UserRepository
+from src.domain.repositories.user_permission import UserPermissionRepository
+
+
+@pytest.fixture()
+def uuids():
+    return [uuid7() for _ in range(3)]
+
+
+@pytest.fixture()
+def bitsets(uuids):
+    return PermissionBitsets(
+        ["read", "write", "delete"], {uuids[0]: [0, 1], uuids[1]: [0], uuids[2]: [0, 1, 2]}
+    )
+
+
+def test_encode_and_decode_bitset():
+    for bits in (0, 1, 0b1010, 1 << 300 | 1):
+        assert decode_bitset(encode_bitset(bits)) == bits
+
+    assert encode_bitset(0) == b""
+    assert len(encode_bitset(1 << 299)) == 38
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b100101)) == [0, 2, 5]
+    assert list(iter_bits(1 << 1000 | 1 << 7)) == [7, 1000]
+
+
+def test_user_bitsets(bitsets, uuids):
+    assert bitsets.user_bits == [0b011, 0b001, 0b111]
+    assert bitsets.user_bitset(uuid7()) == 0
+    assert bitsets.user_permission_names(uuids[0]) == ["read", "write"]
+    assert bitsets.mask(["read", "delete"]) == 0b101
+    assert bitsets.mask(["read", "unknown"]) is None
+
+
+def test_has_permission(bitsets, uuids):
+    assert bitsets.has_permission(uuids[0], "write") is True
+    assert bitsets.has_permission(uuids[1], "write") is False
+    assert bitsets.has_permission(uuids[1], "unknown") is False
+    assert bitsets.has_permission(uuid7(), "read") is False
+
+    assert bitsets.has_permissions(uuids[2], ["write", "delete"]) is True
+    assert bitsets.has_permissions(uuids[0], ["write", "delete"]) is False
+    assert bitsets.has_permissions(uuids[0], ["unknown"]) is False
+
+
+def test_users_with(bitsets, uuids):
+    assert bitsets.permission_bits == [0b111, 0b101, 0b100]
+    assert bitsets.users_with("read") == uuids
+    assert bitsets.users_with("read", "write") == [uuids[0], uuids[2]]
+    assert bitsets.users_with("delete") == [uuids[2]]
+    assert bitsets.users_with("unknown") == []
+    assert bitsets.count_users_with("write") == 2
+
+
+def test_users_with_no_permission(bitsets):
+    assert bitsets.holders([]) == 0
+    assert bitsets.users_with() == []
+    assert bitsets.count_users_with() == 0
+
+
+def test_admins(uuids):
+    admin = uuid7()
+    permission_uuids = [uuid7(), uuid7()]
+    bitsets = PermissionBitsets(
+        ["read", "write"],
+        {uuids[0]: [0], admin: []},
+        permission_uuids=permission_uuids,
+        admins=[admin],
+    )
+
+    assert admin in bitsets and uuids[1] not in bitsets
+    assert bitsets.has_permission(admin, "write") is True
+    assert bitsets.has_permission(admin, "unknown") is True
+    assert bitsets.has_permissions(admin, ["read", "write"]) is True
+    # Only the grants make a holder
+    assert bitsets.users_with("read") == [uuids[0]]
+    assert bitsets.users_with("write") == []
+
+    assert bitsets.permission_name(permission_uuids[1]) == "write"
+    assert bitsets.permission_name(uuid7()) is None
+
+
+def test_many_users():
+    uuids = [uuid7() for _ in range(10_000)]
+    bitsets = PermissionBitsets(
+        ["even", "all"], {uuid: [1] if index % 2 else [0, 1] for index, uuid in enumerate(uuids)}
+    )
+
+    assert len(bitsets) == 10_000
+    assert bitsets.users_with("even", "all") == uuids[::2]
+    assert bitsets.count_users_with("all") == 10_000
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_load(db_session, user, admin_user, permission, user_create):
+    other = await PermissionRepository(db_session).create(
+        PermissionCreate(name="other_permission", description="Other permission")
+    )
+    await UserPermissionRepository(db_session).bulk_assign(
+        [(user.uuid, permission.uuid), (user.uuid, other.uuid), (admin_user.uuid, other.uuid)]
+    )
+
+    admin_create = user_create.model_copy(
+        update={"email": "admin2@example.com", "google_id": "admin2_google_id", "is_admin": True}
+    )
+    admin_without_grants = await UserRepository(db_session).create(admin_create)
+
+    bitsets = await PermissionBitsetRepository(db_session).load()
+
+    assert bitsets.permission_names == [permission.name, other.name]
+    assert bitsets.permission_name(other.uuid) == other.name
+    assert bitsets.admins == {admin_user.uuid, admin_without_grants.uuid}
+    assert bitsets.user_bitset(admin_without_grants.uuid) == 0
+    assert bitsets.user_bitset(user.uuid) == 0b11
+    assert bitsets.user_bitset(admin_user.uuid) == 0b10
+    assert bitsets.users_with(other.name) == [user.uuid, admin_user.uuid]
+    assert bitsets.users_with(permission.name, other.name) == [user.uuid]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_load_empty(db_session):
+    bitsets = await PermissionBitsetRepository(db_session).load()
+
+    assert len(bitsets) == 0
+    assert bitsets.users_with("anything") == []
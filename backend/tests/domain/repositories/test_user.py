@@ -1,8 +1,13 @@
+import asyncio
+
 import pytest
 from sqlalchemy.exc import IntegrityError
+from uuid6 import uuid7
 
-from src.domain.models.user import UserUpdate
+from src.domain.models.user import UserCreate, UserUpdate
+from src.domain.models import User
 from src.domain.repositories.exceptions import NoUserFound
+from src.domain.repositories.statements import update_by_uuid_statement
 from src.domain.repositories.user import UserRepository
 
 
@@ -58,6 +63,30 @@ async def test_update_user(db_session, user):
     assert updated_user.is_admin is True
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_user_by_uuid(db_session, user):
+    repository = UserRepository(session=db_session)
+
+    updated_user = await repository.update_by_uuid(user.uuid, UserUpdate(name="New Name"))
+    assert updated_user.name == "New Name"
+    assert updated_user.email == user.email
+    assert (await repository.get(user.uuid)).name == "New Name"
+
+    # Nothing to set, the user is returned as is
+    assert (await repository.update_by_uuid(user.uuid, UserUpdate())).name == "New Name"
+
+    with pytest.raises(NoUserFound):
+        await repository.update_by_uuid(uuid7(), UserUpdate(name="New Name"))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_by_uuid_statement_is_cached(db_session):
+    statement = update_by_uuid_statement(User, ("is_admin", "name"))
+
+    assert update_by_uuid_statement(User, ("is_admin", "name")) is statement
+    assert update_by_uuid_statement(User, ("name",)) is not statement
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_delete_user(db_session, user):
     repository = UserRepository(session=db_session)
@@ -67,6 +96,21 @@ async def test_delete_user(db_session, user):
         await repository.get(user_id=user.id)
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_user_by_uuid(db_session, user, permission, user_permission_repository):
+    repository = UserRepository(session=db_session)
+    await user_permission_repository.assign(user.uuid, permission.uuid)
+
+    await repository.delete_by_uuid(user.uuid)
+
+    with pytest.raises(NoUserFound):
+        await repository.get(user.uuid)
+    assert await user_permission_repository.get_permission_user_uuids(permission.id) == []
+
+    with pytest.raises(NoUserFound):
+        await repository.delete_by_uuid(user.uuid)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_create_user_unique_email(db_session, user_create):
     repository = UserRepository(session=db_session)
@@ -112,6 +156,20 @@ async def test_list_all_users(db_session, user_repository, user_create):
     assert "user3@example.com" in user_emails
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_users_after(db_session, user_repository, user_create, user):
+    user2_create = user_create.model_copy()
+    user2_create.email = "user2@example.com"
+    user2_create.google_id = "google_id_2"
+    user2 = await user_repository.create(user2_create)
+
+    rows = await user_repository.list_after_rows(after_id=user.id - 1, limit=1)
+    assert [(row.id, row.uuid, row.email) for row in rows] == [(user.id, user.uuid, user.email)]
+
+    rows = await user_repository.list_after_rows(after_id=user.id, limit=10)
+    assert [row.uuid for row in rows] == [user2.uuid]
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_admins(db_session, user_repository, admin_user):
     admins = await user_repository.get_admins()
@@ -120,6 +178,86 @@ async def test_get_admins(db_session, user_repository, admin_user):
     assert admin_user in admins
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_user_rows(db_session, user_repository, user, admin_user):
+    rows = await user_repository.list_all_rows(skip=0, limit=10)
+    assert (user.id, user.uuid, user.email) in [(row.id, row.uuid, row.email) for row in rows]
+
+    rows = await user_repository.get_admin_rows()
+    assert admin_user.uuid in [row.uuid for row in rows]
+    assert user.uuid not in [row.uuid for row in rows]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_stream_user_rows(db_session, user_repository, user, admin_user):
+    batches = [batch async for batch in user_repository.stream_rows(batch_size=1)]
+
+    assert all(len(batch) == 1 for batch in batches)
+    uuids = [row.uuid for batch in batches for row in batch]
+    assert uuids.index(user.uuid) < uuids.index(admin_user.uuid)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_users_is_batched(db_session, user, admin_user, mocker):
+    repository = UserRepository(session=db_session)
+    execute = mocker.spy(db_session, "execute")
+
+    found = await asyncio.gather(
+        repository.get(user.uuid), repository.get(admin_user.id), repository.get(user.id)
+    )
+    assert found == [user, admin_user, user]
+    assert execute.call_count == 1
+
+    # Memoized for the lifetime of the repository
+    assert await repository.get(admin_user.uuid) is admin_user
+    assert execute.call_count == 1
+
+    with pytest.raises(NoUserFound):
+        await asyncio.gather(repository.get(user.uuid), repository.get(uuid7()))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_many_users(db_session, user_repository, user, admin_user):
+    rows = await user_repository.get_many([admin_user.uuid, uuid7(), user.uuid])
+    assert {row.uuid for row in rows} == {user.uuid, admin_user.uuid}
+
+    assert await user_repository.get_many([]) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize(
+    "chunk_size, copy_threshold",
+    [(10000, 50000), (2, 50000), (10000, 1)],
+    ids=["unnest", "chunked", "copy"],
+)
+async def test_bulk_create(
+    db_session, user_repository, user_create, user, mocker, chunk_size, copy_threshold
+):
+    mocker.patch("src.domain.repositories.user.BULK_CHUNK_SIZE", chunk_size)
+    mocker.patch("src.domain.repositories.user.BULK_COPY_THRESHOLD", copy_threshold)
+    user_creates = [
+        UserCreate(email="bulk1@example.com", name="Bulk 1", google_id="bulk_google_1"),
+        # Taken by the existing user
+        user_create,
+        UserCreate(email="bulk2@example.com", name="Bulk 2", google_id="bulk_google_2"),
+        # Taken by an earlier row
+        UserCreate(email="bulk1@example.com", name="Bulk 3", google_id="bulk_google_3"),
+    ]
+
+    uuids = await user_repository.bulk_create(user_creates)
+
+    assert uuids[1] is None
+    assert uuids[3] is None
+    for uuid, expected in ((uuids[0], user_creates[0]), (uuids[2], user_creates[2])):
+        created = await user_repository.get(uuid)
+        assert (created.email, created.name) == (expected.email, expected.name)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_create_empty(db_session, user_repository):
+    assert await user_repository.bulk_create([]) == []
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_user_not_found(db_session):
     repository = UserRepository(session=db_session)
@@ -1,7 +1,16 @@
 import pytest
-
-from src.domain.models.user_permission import UserPermissionCreate
-from src.domain.repositories.exceptions import NoUserPermissionFound
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from uuid6 import uuid7
+
+from src.domain.models.permission import PermissionCreate, PermissionUpdate
+from src.domain.models.user_permission import UserPermissionCreate, UserPermissionOutcome
+from src.domain.repositories.exceptions import (
+    NoPermissionFound,
+    NoUserFound,
+    NoUserPermissionFound,
+)
+from src.domain.repositories.permission import PermissionRepository
 from src.domain.repositories.user_permission import UserPermissionRepository
 
 
@@ -91,6 +100,22 @@ async def test_get_permission_users(db_session, user, permission):
     assert users[0] == user
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_user_permission_names(db_session, user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+    assert await repository.get_user_permission_names_by_uuid(user.uuid) == [permission.name]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_permission_user_uuids(db_session, user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+    assert await repository.get_permission_user_uuids(permission.id) == [user.uuid]
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_delete_user_permission_by_user_and_permission(db_session, user, permission):
     repository = UserPermissionRepository(session=db_session)
@@ -148,3 +173,211 @@ async def test_multiple_permissions_for_user(
     assert "test_permission" in permission_names
     assert "permission_2" in permission_names
     assert "permission_3" in permission_names
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_has_permission(db_session, user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    assert await repository.has_permission(user.uuid, permission.name) is False
+
+    await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+    assert await repository.has_permission(user.uuid, permission.name) is True
+    assert await repository.has_permission(user.uuid, "other_permission") is False
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_has_permission_admin(db_session, admin_user):
+    repository = UserPermissionRepository(session=db_session)
+
+    assert await repository.has_permission(admin_user.uuid, "nonexistent_permission") is True
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_has_permission_user_not_found(db_session):
+    repository = UserPermissionRepository(session=db_session)
+
+    with pytest.raises(NoUserFound):
+        await repository.has_permission(uuid7(), "test_permission")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_has_permissions(db_session, user, admin_user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+    answers = await repository.has_permissions(
+        [
+            (user.uuid, permission.name),
+            (user.uuid, "other_permission"),
+            (admin_user.uuid, "other_permission"),
+            (uuid7(), permission.name),
+        ]
+    )
+    assert answers == [True, False, True, False]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_has_permissions_empty(db_session):
+    repository = UserPermissionRepository(session=db_session)
+
+    assert await repository.has_permissions([]) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_assign_and_revoke(db_session, user, permission):
+    repository = UserPermissionRepository(session=db_session)
+
+    assert await repository.assign(user.uuid, permission.uuid) is True
+    assert await repository.assign(user.uuid, permission.uuid) is False
+    assert await repository.get_user_permission_names_by_uuid(user.uuid) == [permission.name]
+
+    assert await repository.revoke(user.uuid, permission.uuid) is True
+    assert await repository.revoke(user.uuid, permission.uuid) is False
+    assert await repository.get_user_permission_names_by_uuid(user.uuid) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+@pytest.mark.parametrize("method", ["assign", "revoke"])
+async def test_assign_and_revoke_not_found(db_session, user, permission, method):
+    repository = UserPermissionRepository(session=db_session)
+
+    with pytest.raises(NoUserFound):
+        await getattr(repository, method)(uuid7(), permission.uuid)
+
+    with pytest.raises(NoPermissionFound):
+        await getattr(repository, method)(user.uuid, uuid7())
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_assign(db_session, user, admin_user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+    outcomes = await repository.bulk_assign(
+        [
+            (user.uuid, permission.uuid),
+            (admin_user.uuid, permission.uuid),
+            (admin_user.uuid, permission.uuid),
+            (uuid7(), permission.uuid),
+            (user.uuid, uuid7()),
+        ]
+    )
+
+    assert outcomes == [
+        UserPermissionOutcome.ALREADY_ASSIGNED,
+        UserPermissionOutcome.ASSIGNED,
+        UserPermissionOutcome.ALREADY_ASSIGNED,
+        UserPermissionOutcome.USER_NOT_FOUND,
+        UserPermissionOutcome.PERMISSION_NOT_FOUND,
+    ]
+    granted = await repository.get_user_permissions(admin_user)
+    assert [granted_permission.uuid for granted_permission in granted] == [permission.uuid]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_revoke(db_session, user, admin_user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+    outcomes = await repository.bulk_revoke(
+        [
+            (user.uuid, permission.uuid),
+            (admin_user.uuid, permission.uuid),
+            (uuid7(), permission.uuid),
+            (user.uuid, uuid7()),
+        ]
+    )
+
+    assert outcomes == [
+        UserPermissionOutcome.REVOKED,
+        UserPermissionOutcome.NOT_ASSIGNED,
+        UserPermissionOutcome.USER_NOT_FOUND,
+        UserPermissionOutcome.PERMISSION_NOT_FOUND,
+    ]
+    assert await repository.get_user_permissions(user) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_assign_and_revoke_empty(db_session):
+    repository = UserPermissionRepository(session=db_session)
+
+    assert await repository.bulk_assign([]) == []
+    assert await repository.bulk_revoke([]) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_create_duplicated_user_permission(db_session, user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+    with pytest.raises(IntegrityError):
+        await repository.create(UserPermissionCreate(user_id=user.id, permission_id=permission.id))
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_permission_names_follow_the_assignments(db_session, user, admin_user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    other = await PermissionRepository(db_session).create(
+        PermissionCreate(name="a_permission", description="Sorted first")
+    )
+
+    await repository.bulk_assign(
+        [(user.uuid, permission.uuid), (user.uuid, other.uuid), (admin_user.uuid, other.uuid)]
+    )
+
+    assert await repository.get_user_permission_names_by_uuid(user.uuid) == [
+        other.name,
+        permission.name,
+    ]
+    assert await repository.get_user_permission_names_by_uuid(admin_user.uuid) == [other.name]
+
+    await repository.bulk_revoke([(user.uuid, other.uuid), (admin_user.uuid, other.uuid)])
+
+    assert await repository.get_user_permission_names_by_uuid(user.uuid) == [permission.name]
+    assert await repository.get_user_permission_names_by_uuid(admin_user.uuid) == []
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_permission_names_follow_the_permissions(db_session, user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    permission_repository = PermissionRepository(db_session)
+    await repository.assign(user.uuid, permission.uuid)
+
+    await permission_repository.update_by_uuid(permission.uuid, PermissionUpdate(name="renamed"))
+
+    assert await repository.get_user_permission_names_by_uuid(user.uuid) == ["renamed"]
+    assert await repository.has_permission(user.uuid, "renamed") is True
+
+    await permission_repository.delete_by_uuid(permission.uuid)
+
+    assert await repository.get_user_permission_names_by_uuid(user.uuid) == []
+    assert await repository.has_permission(user.uuid, "renamed") is False
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_permission_names_ignore_other_permission_changes(db_session, user, permission):
+    repository = UserPermissionRepository(session=db_session)
+    await repository.assign(user.uuid, permission.uuid)
+
+    async def user_row_version():
+        result = await db_session.execute(
+            text('SELECT ctid::text FROM "user" WHERE id = :id'), {"id": user.id}
+        )
+        return result.scalar_one()
+
+    version = await user_row_version()
+    await PermissionRepository(db_session).update_by_uuid(
+        permission.uuid, PermissionUpdate(description="Only the description")
+    )
+
+    # The user row wasn't rewritten
+    assert await user_row_version() == version
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_user_permission_names_by_uuid_not_found(db_session):
+    repository = UserPermissionRepository(session=db_session)
+
+    with pytest.raises(NoUserFound):
+        await repository.get_user_permission_names_by_uuid(uuid7())
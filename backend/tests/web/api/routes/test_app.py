@@ -1,7 +1,7 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 
-from src.web.deps import get_db_session
+from src.web.deps import get_db_read_session
 from src.web.main import app
 
 
@@ -31,7 +31,7 @@ async def test_health_check_error(mocker, auth_headers):
     async def _override():
         yield mock_session
 
-    app.dependency_overrides[get_db_session] = _override
+    app.dependency_overrides[get_db_read_session] = _override
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         response = await client.get("/api/healthz", headers=auth_headers("GET", {}))
@@ -58,7 +58,7 @@ async def test_health_check_with_valid_session(mocker, auth_headers):
     async def _override():
         yield mock_session
 
-    app.dependency_overrides[get_db_session] = _override
+    app.dependency_overrides[get_db_read_session] = _override
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
         response = await client.get("/api/healthz", headers=auth_headers("GET", {}))
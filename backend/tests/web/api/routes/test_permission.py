@@ -4,7 +4,7 @@ from uuid6 import uuid7
 
 from src.domain.models.permission import PermissionPublic, PermissionUpdate
 from src.domain.repositories.exceptions import NoPermissionFound, NoUserFound
-from src.web.deps.services import get_permission_service
+from src.web.deps.services import get_permission_read_service, get_permission_service
 from src.web.main import app
 from src.web.services import PermissionService
 
@@ -129,6 +129,44 @@ async def test_assign_permission_to_user(client, user, permission, auth_headers)
     assert response.json() == {"message": "Permission already assigned to user"}
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_permissions_batch(client, permission, auth_headers):
+    missing = str(uuid7())
+    uuids = [missing, str(permission.uuid)]
+
+    response = await client.get(
+        "/api/permissions/batch", params={"uuids": uuids}, headers=auth_headers("GET", {})
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [found["name"] for found in response.json()["permissions"]] == [permission.name]
+    assert response.json()["missing"] == [missing]
+
+    response = await client.post(
+        "/api/permissions/batch", json=uuids, headers=auth_headers("POST", uuids)
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["permissions"][0]["uuid"] == str(permission.uuid)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_assign_and_revoke_permissions(client, user, permission, auth_headers):
+    body = [
+        {"user_uuid": str(user.uuid), "permission_uuid": str(permission.uuid)},
+        {"user_uuid": str(uuid7()), "permission_uuid": str(permission.uuid)},
+    ]
+    response = await client.post(
+        "/api/permissions/assign/bulk", json=body, headers=auth_headers("POST", body)
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [result["outcome"] for result in response.json()] == ["assigned", "user_not_found"]
+
+    response = await client.request(
+        "DELETE", "/api/permissions/revoke/bulk", json=body, headers=auth_headers("DELETE", body)
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0] == {**body[0], "outcome": "revoked"}
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_revoke_permission_from_user(client, user, permission, auth_headers):
     # First assign permission
@@ -182,7 +220,7 @@ async def test_get_permission_not_found(client, auth_headers, mocker):
     def _override():
         return service_mock
 
-    app.dependency_overrides[get_permission_service] = _override
+    app.dependency_overrides[get_permission_read_service] = _override
 
     response = await client.get(f"/api/permissions/{uuid7()}", headers=auth_headers("GET", {}))
     assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -295,7 +333,7 @@ async def test_get_permission_users_not_found(client, auth_headers, mocker):
     def _override():
         return service_mock
 
-    app.dependency_overrides[get_permission_service] = _override
+    app.dependency_overrides[get_permission_read_service] = _override
 
     response = await client.get(
         f"/api/permissions/{uuid7()}/users", headers=auth_headers("GET", {})
@@ -1,12 +1,15 @@
+import json
+
 import pytest
 from fastapi import status
 from uuid6 import uuid7
 
 from src.domain.models.user import UserPublic, UserUpdate
 from src.domain.repositories.exceptions import NoUserFound
-from src.web.deps.services import get_user_service
+from src.web.deps.services import get_user_read_service, get_user_service
 from src.web.main import app
 from src.web.services import UserService
+from src.web.services.cache import user_permissions_cache
 
 
 @pytest.mark.asyncio(loop_scope="session")
@@ -25,6 +28,56 @@ async def test_create_user(client, user_create, auth_headers):
     assert user.is_active == user_create.is_active
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_create_users(client, user_create, user, auth_headers):
+    new_user = {"email": "bulk@example.com", "name": "Bulk", "google_id": "bulk_google"}
+    body = [new_user, user_create.model_dump(mode="json")]
+    response = await client.post("/api/users/bulk", json=body, headers=auth_headers("POST", body))
+    assert response.status_code == status.HTTP_200_OK
+
+    result = response.json()
+    assert len(result["created"]) == 1
+    assert result["conflicts"] == [
+        {"index": 1, "email": user_create.email, "google_id": user_create.google_id}
+    ]
+
+    response = await client.get(
+        f"/api/users/{result['created'][0]}", headers=auth_headers("GET", {})
+    )
+    assert response.json()["email"] == new_user["email"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_export_users(client, user, admin_user, auth_headers):
+    response = await client.get("/api/users/export", headers=auth_headers("GET", {}))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    users = [json.loads(line) for line in response.text.splitlines()]
+    uuids = [exported["uuid"] for exported in users]
+    assert uuids.index(str(user.uuid)) < uuids.index(str(admin_user.uuid))
+    assert users[uuids.index(str(user.uuid))]["email"] == user.email
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_users_batch(client, user, admin_user, auth_headers):
+    missing = str(uuid7())
+    uuids = [str(admin_user.uuid), missing, str(user.uuid)]
+
+    response = await client.get(
+        "/api/users/batch", params={"uuids": uuids}, headers=auth_headers("GET", {})
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [found["uuid"] for found in response.json()["users"]] == [uuids[0], uuids[2]]
+    assert response.json()["missing"] == [missing]
+
+    response = await client.post(
+        "/api/users/batch", json=uuids, headers=auth_headers("POST", uuids)
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["missing"] == [missing]
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_user(client, user, auth_headers):
     response = await client.get(f"/api/users/{user.uuid}", headers=auth_headers("GET", {}))
@@ -151,6 +204,37 @@ async def test_list_users(client, user_repository, user_create, auth_headers):
     assert "user3@example.com" in user_emails
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_users_with_cursor(client, user_repository, user_create, user, auth_headers):
+    user2_create = user_create.model_copy()
+    user2_create.email = "user2@example.com"
+    user2_create.google_id = "google_id_2"
+    await user_repository.create(user2_create)
+
+    response = await client.get("/api/users/?after=&limit=1", headers=auth_headers("GET", {}))
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
+
+    emails = [user["email"] for user in response.json()]
+    next_cursor = response.headers.get("X-Next-Cursor")
+    while next_cursor:
+        response = await client.get(
+            f"/api/users/?after={next_cursor}&limit=1", headers=auth_headers("GET", {})
+        )
+        assert response.status_code == status.HTTP_200_OK
+        emails += [user["email"] for user in response.json()]
+        next_cursor = response.headers.get("X-Next-Cursor")
+
+    assert emails[-2:] == [user.email, "user2@example.com"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_users_invalid_cursor(client, auth_headers):
+    response = await client.get("/api/users/?after=invalid", headers=auth_headers("GET", {}))
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_list_admin_users(client, admin_user, auth_headers):
     response = await client.get("/api/users/admins/all", headers=auth_headers("GET", {}))
@@ -179,6 +263,9 @@ async def test_check_user_permission(
         UserPermissionCreate(user_id=user.id, permission_id=permission.id)
     )
 
+    # The assignment bypasses the services, so the cached permission set is stale
+    user_permissions_cache.delete(user.uuid)
+
     # Now user should have permission
     response = await client.get(
         f"/api/users/{user.uuid}/has-permission/{permission.name}", headers=auth_headers("GET", {})
@@ -229,6 +316,32 @@ async def test_get_user_permissions_list(
     assert user_data["permissions"] == [permission.name]
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_check_user_permissions(client, user, admin_user, permission, auth_headers):
+    body = [
+        {"user_uuid": str(user.uuid), "permission_name": permission.name},
+        {"user_uuid": str(admin_user.uuid), "permission_name": permission.name},
+        {"user_uuid": str(uuid7()), "permission_name": permission.name},
+    ]
+    response = await client.post(
+        "/api/users/permissions/check", json=body, headers=auth_headers("POST", body)
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    results = response.json()["results"]
+    assert [result["has_permission"] for result in results] == [False, True, False]
+    assert [result["user_uuid"] for result in results] == [check["user_uuid"] for check in body]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_check_user_permissions_too_many(client, user, auth_headers):
+    body = [{"user_uuid": str(user.uuid), "permission_name": "test_permission"}] * 1001
+    response = await client.post(
+        "/api/users/permissions/check", json=body, headers=auth_headers("POST", body)
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 # Error handling tests
 
 
@@ -240,7 +353,7 @@ async def test_get_user_not_found(client, auth_headers, mocker):
     def _override():
         return service_mock
 
-    app.dependency_overrides[get_user_service] = _override
+    app.dependency_overrides[get_user_read_service] = _override
 
     response = await client.get(f"/api/users/{uuid7()}", headers=auth_headers("GET", {}))
     assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -309,7 +422,7 @@ async def test_check_user_permission_not_found(client, auth_headers, mocker):
     def _override():
         return service_mock
 
-    app.dependency_overrides[get_user_service] = _override
+    app.dependency_overrides[get_user_read_service] = _override
 
     response = await client.get(
         f"/api/users/{uuid7()}/has-permission/test_permission", headers=auth_headers("GET", {})
@@ -0,0 +1,16 @@
+import json
+
+from uuid6 import uuid7
+
+from src.domain.models.user import UserPublic
+from src.web.api.responses import ModelResponse
+
+
+def test_model_response_renders_models():
+    user = UserPublic(email="test@example.com", name="Test", google_id="google", uuid=uuid7())
+
+    response = ModelResponse([user], headers={"X-Next-Cursor": "cursor"})
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["x-next-cursor"] == "cursor"
+    assert json.loads(response.body) == [user.model_dump(mode="json")]
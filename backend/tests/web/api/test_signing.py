@@ -5,10 +5,12 @@ from fastapi import HTTPException
 from starlette.requests import Request
 
 from src.core.settings import settings
-from src.web.api.signing import generate_signature, signing
+from src.web.api.signing import SignatureVerifier, generate_signature, signing
 
 
-async def create_request(method, body, timestamp: str, signature, content_type="application/json"):
+async def create_request(
+    method, body, timestamp: str, signature, content_type="application/json", path="/"
+):
     headers = {
         "x-signature": signature,
         "x-timestamp": timestamp,
@@ -17,6 +19,8 @@ async def create_request(method, body, timestamp: str, signature, content_type="
     scope = {
         "method": method,
         "type": "http",
+        "path": path,
+        "query_string": b"",
         "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
     }
     request = Request(scope)
@@ -77,3 +81,51 @@ async def test_multipart_form_data():
     signature = generate_signature("POST", "formData", timestamp, settings.secret_key)
     request = await create_request("POST", "formData", timestamp, signature, "multipart/form-data")
     await signing(request)
+
+
+def test_signature_verifier_matches_generate_signature():
+    timestamp = str(time.time() * 1000)
+    body = '{"name": "ação", "description": "' + "x" * 5000 + '"}'
+    signature = generate_signature("POST", body, timestamp, settings.secret_key)
+
+    verifier = SignatureVerifier("POST", timestamp, settings.secret_key)
+    raw_body = body.encode()
+    # Chunk boundaries may split multibyte characters
+    for start in range(0, len(raw_body), 7):
+        verifier.update(raw_body[start : start + 7])
+    verifier.verify(signature)
+
+
+def test_signature_verifier_invalid_signature():
+    timestamp = str(time.time() * 1000)
+    verifier = SignatureVerifier("POST", timestamp, settings.secret_key)
+    verifier.update(b"test_body")
+
+    with pytest.raises(HTTPException) as exc:
+        verifier.verify("invalid_signature")
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Invalid signature"
+
+
+async def test_replayed_request():
+    timestamp = str(time.time() * 1000)
+    signature = generate_signature("POST", "test_body", timestamp, settings.secret_key)
+    await signing(await create_request("POST", "test_body", timestamp, signature))
+
+    request = await create_request("POST", "test_body", timestamp, signature)
+    with pytest.raises(HTTPException) as exc:
+        await signing(request)
+    assert exc.value.status_code == 401
+    assert exc.value.detail == "Replayed request"
+
+
+async def test_same_signature_on_other_paths():
+    timestamp = str(time.time() * 1000)
+    signature = generate_signature("GET", "", timestamp, settings.secret_key)
+
+    await signing(await create_request("GET", "", timestamp, signature, path="/users/a"))
+    await signing(await create_request("GET", "", timestamp, signature, path="/permissions/b"))
+
+    with pytest.raises(HTTPException) as exc:
+        await signing(await create_request("GET", "", timestamp, signature, path="/users/a"))
+    assert exc.value.detail == "Replayed request"
@@ -1,13 +1,17 @@
 import json
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from src.core.deps.db import get_db_stream_session_factory
 from src.core.settings import settings
 from src.web.api.signing import generate_signature
-from src.web.deps import get_db_session
+from src.web.deps import get_db_primary_read_session, get_db_read_session, get_db_session
 from src.web.main import app
+from src.core.cache_backends import MemoryBackend
+from src.web.services.cache import lookup_cache, permission_bitsets_cache, user_permissions_cache
 
 # Setup fixtures
 
@@ -25,10 +29,31 @@ async def override_db_session(db_session):
         yield db_session
 
     app.dependency_overrides[get_db_session] = _override
+    app.dependency_overrides[get_db_read_session] = _override
+    app.dependency_overrides[get_db_primary_read_session] = _override
+
+    @asynccontextmanager
+    async def _stream_override():
+        yield db_session
+
+    app.dependency_overrides[get_db_stream_session_factory] = lambda: _stream_override
     yield
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    user_permissions_cache.clear()
+    permission_bitsets_cache.clear()
+    if isinstance(lookup_cache, MemoryBackend):
+        lookup_cache.cache.clear()
+    yield
+    user_permissions_cache.clear()
+    permission_bitsets_cache.clear()
+    if isinstance(lookup_cache, MemoryBackend):
+        lookup_cache.cache.clear()
+
+
 @pytest.fixture()
 def auth_headers():
     def _auth_headers(method: str, body: dict):
@@ -0,0 +1,39 @@
+import base64
+
+import pytest
+
+from src.web.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(12345)
+
+    assert "12345" not in cursor
+    assert decode_cursor(cursor) == 12345
+
+
+def raw_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not a cursor",
+        encode_cursor(-1),
+        encode_cursor(0),
+        encode_cursor(2**31),
+        raw_cursor("1_0"),
+        raw_cursor(" 10 "),
+        raw_cursor("+10"),
+        raw_cursor("١٠"),
+    ],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_largest_cursor():
+    assert decode_cursor(encode_cursor(2**31 - 1)) == 2**31 - 1
@@ -1,8 +1,14 @@
+import asyncio
+
 import pytest
 
+from src.core.cache_backends import MemoryBackend
 from src.domain.models.permission import PermissionPublic, PermissionUpdate
+from src.domain.models.user_permission import UserPermissionOutcome, UserPermissionPair
 from src.domain.repositories.exceptions import NoPermissionFound, NoUserFound
+from src.web.services.cache import PERMISSION_BITSETS_KEY
 from src.web.services.permission import PermissionService
+from src.web.services.user import UserService
 
 
 @pytest.fixture()
@@ -23,6 +29,18 @@ async def test_create_permission(permission_service, permission_create):
     assert permission.description == permission_create.description
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_permissions(permission_service, permission):
+    from uuid6 import uuid7
+
+    missing = uuid7()
+
+    batch = await permission_service.get_permissions([missing, permission.uuid])
+
+    assert [found.name for found in batch.permissions] == [permission.name]
+    assert batch.missing == [missing]
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_permission(permission_service, permission):
     found_permission = await permission_service.get_permission(permission.uuid)
@@ -46,6 +64,29 @@ async def test_get_permission_by_name_not_found(permission_service):
     assert found_permission is None
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_permission_by_name_reads_through_lookup_cache(
+    permission_repository, user_repository, user_permission_repository, permission, mocker
+):
+    permission_service = PermissionService(
+        permission_repository=permission_repository,
+        user_repository=user_repository,
+        user_permission_repository=user_permission_repository,
+        lookup_cache=MemoryBackend(name="test_lookups", maxsize=100),
+    )
+    first = await permission_service.get_permission_by_name(permission.name)
+
+    get_by_name = mocker.spy(permission_repository, "get_by_name")
+    assert await permission_service.get_permission_by_name(permission.name) == first
+    get_by_name.assert_not_called()
+
+    await permission_service.update_permission(permission.uuid, PermissionUpdate(name="renamed"))
+
+    assert await permission_service.get_permission_by_name(permission.name) is None
+    renamed = await permission_service.get_permission_by_name("renamed")
+    assert renamed is not None and renamed.uuid == permission.uuid
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_update_permission(permission_service, permission):
     update_data = PermissionUpdate(name="updated_permission", description="Updated description")
@@ -109,6 +150,48 @@ async def test_revoke_permission_from_user(permission_service, user, permission)
     assert revoked is False
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_assign_and_revoke_permissions(
+    permission_service, user, admin_user, permission
+):
+    pairs = [
+        UserPermissionPair(user_uuid=user.uuid, permission_uuid=permission.uuid),
+        UserPermissionPair(user_uuid=admin_user.uuid, permission_uuid=permission.uuid),
+    ]
+    permission_service.permission_cache.set(user.uuid, {permission.name: False})
+
+    results = await permission_service.bulk_assign_permissions(pairs)
+    assert [result.outcome for result in results] == [UserPermissionOutcome.ASSIGNED] * 2
+    assert [result.user_uuid for result in results] == [user.uuid, admin_user.uuid]
+    assert permission_service.permission_cache.get(user.uuid) is None
+
+    results = await permission_service.bulk_revoke_permissions(pairs[:1])
+    assert [result.outcome for result in results] == [UserPermissionOutcome.REVOKED]
+    assert await permission_service.get_permission_users(permission.uuid) == [str(admin_user.uuid)]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_assign_permission_publishes_invalidation(
+    permission_repository, user_repository, user_permission_repository, user, permission, mocker
+):
+    bus = mocker.Mock()
+    permission_service = PermissionService(
+        permission_repository=permission_repository,
+        user_repository=user_repository,
+        user_permission_repository=user_permission_repository,
+        invalidation_bus=bus,
+    )
+
+    await permission_service.assign_permission_to_user(user.uuid, permission.uuid)
+    assert bus.publish.call_args_list == [
+        mocker.call(user_permission_repository.session, "user_permissions", user.uuid),
+        mocker.call(user_permission_repository.session, "permission_bitsets"),
+    ]
+
+    await permission_service.delete_permission(permission.uuid)
+    bus.publish.assert_any_call(user_permission_repository.session, "user_permissions", None)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_permission_users(permission_service, user, permission):
     # Assign permission to user
@@ -120,6 +203,47 @@ async def test_get_permission_users(permission_service, user, permission):
     assert str(user.uuid) in user_uuids
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_concurrent_get_permission_users_query_once(
+    permission_service, user, permission, mocker
+):
+    await permission_service.assign_permission_to_user(user.uuid, permission.uuid)
+    load = mocker.spy(permission_service.permission_bitset_repository, "load")
+
+    results = await asyncio.gather(
+        *(permission_service.get_permission_users(permission.uuid) for _ in range(500))
+    )
+
+    assert results == [[str(user.uuid)]] * 500
+    assert load.call_count == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_permission_users_from_bitsets(
+    permission_service, permission_repository, permission_create, user, permission, mocker
+):
+    await permission_service.assign_permission_to_user(user.uuid, permission.uuid)
+    assert await permission_service.get_permission_users(permission.uuid) == [str(user.uuid)]
+
+    # Answered by the snapshot, until a change of the grants drops it
+    get_user_uuids = mocker.spy(
+        permission_service.user_permission_repository, "get_permission_user_uuids"
+    )
+    assert await permission_service.get_permission_users(permission.uuid) == [str(user.uuid)]
+    get_user_uuids.assert_not_called()
+
+    await permission_service.revoke_permission_from_user(user.uuid, permission.uuid)
+    assert permission_service.bitsets_cache.get(PERMISSION_BITSETS_KEY) is None
+    assert await permission_service.get_permission_users(permission.uuid) == []
+
+    # Created after the snapshot was loaded, it is looked up in the database
+    later = await permission_repository.create(
+        permission_create.model_copy(update={"name": "created_later"})
+    )
+    assert await permission_service.get_permission_users(later.uuid) == []
+    get_user_uuids.assert_awaited_once()
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_assign_permission_to_nonexistent_user(permission_service, permission):
     from uuid6 import uuid7
@@ -179,3 +303,19 @@ async def test_multiple_users_with_same_permission(
     assert len(user_uuids) == 2
     assert str(user.uuid) in user_uuids
     assert str(user2.uuid) in user_uuids
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_assign_and_revoke_invalidate_permission_cache(
+    permission_service, user_repository, user_permission_repository, user, permission
+):
+    user_service = UserService(
+        user_repository=user_repository, user_permission_repository=user_permission_repository
+    )
+    assert await user_service.check_user_has_permission(user.uuid, permission.name) is False
+
+    await permission_service.assign_permission_to_user(user.uuid, permission.uuid)
+    assert await user_service.check_user_has_permission(user.uuid, permission.name) is True
+
+    await permission_service.revoke_permission_from_user(user.uuid, permission.uuid)
+    assert await user_service.check_user_has_permission(user.uuid, permission.name) is False
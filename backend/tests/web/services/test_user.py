@@ -1,7 +1,19 @@
-import pytest
+import asyncio
 
-from src.domain.models.user import UserPublic, UserUpdate, UserWithPermissions
+import orjson
+import pytest
+from uuid6 import uuid7
+
+from src.core.cache_backends import MemoryBackend
+from src.domain.models.user import (
+    UserBulkConflict,
+    UserCreate,
+    UserPublic,
+    UserUpdate,
+    UserWithPermissions,
+)
 from src.domain.repositories.exceptions import NoUserFound
+from src.web.services.cache import PERMISSION_BITSETS_KEY, user_permissions_cache
 from src.web.services.user import UserService
 
 
@@ -24,6 +36,39 @@ async def test_create_user(user_service, user_create):
     assert user.is_active == user_create.is_active
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_bulk_create_users(user_service, user_create, user):
+    new_user = UserCreate(email="bulk@example.com", name="Bulk", google_id="bulk_google")
+
+    result = await user_service.bulk_create_users([new_user, user_create])
+
+    assert len(result.created) == 1
+    assert (await user_service.get_user(result.created[0])).email == new_user.email
+    assert result.conflicts == [
+        UserBulkConflict(index=1, email=user_create.email, google_id=user_create.google_id)
+    ]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_export_users(user_service, user, admin_user):
+    chunks = [chunk async for chunk in user_service.export_users()]
+
+    lines = b"".join(chunks).splitlines()
+    users = {UserPublic.model_validate_json(line).uuid: orjson.loads(line) for line in lines}
+    assert users[user.uuid] == UserPublic.model_validate(user).model_dump(mode="json")
+    assert admin_user.uuid in users
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_users(user_service, user, admin_user):
+    missing = uuid7()
+
+    batch = await user_service.get_users([admin_user.uuid, missing, user.uuid, admin_user.uuid])
+
+    assert [found.uuid for found in batch.users] == [admin_user.uuid, user.uuid]
+    assert batch.missing == [missing]
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_get_user(user_service, user):
     found_user = await user_service.get_user(user.uuid)
@@ -81,6 +126,56 @@ async def test_get_user_by_email_not_found(user_service):
     assert found_user is None
 
 
+@pytest.fixture()
+def cached_user_service(user_repository, user_permission_repository):
+    return UserService(
+        user_repository=user_repository,
+        user_permission_repository=user_permission_repository,
+        lookup_cache=MemoryBackend(name="test_lookups", maxsize=100),
+    )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_user_reads_through_lookup_cache(cached_user_service, user, mocker):
+    first = await cached_user_service.get_user(user.uuid)
+
+    get = mocker.spy(cached_user_service.user_repository, "get")
+    get_by_email = mocker.spy(cached_user_service.user_repository, "get_by_email")
+    get_by_google_id = mocker.spy(cached_user_service.user_repository, "get_by_google_id")
+    await cached_user_service.get_user_by_email(user.email)
+    await cached_user_service.get_user_by_google_id(user.google_id)
+
+    assert await cached_user_service.get_user(user.uuid) == first
+    assert await cached_user_service.get_user_by_email(user.email) == first
+    assert await cached_user_service.get_user_by_google_id(user.google_id) == first
+    get.assert_not_called()
+    assert get_by_email.call_count == 1
+    assert get_by_google_id.call_count == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_user_invalidates_lookup_cache(cached_user_service, user):
+    old_email = user.email
+    await cached_user_service.get_user_by_email(old_email)
+
+    await cached_user_service.update_user(user.uuid, UserUpdate(email="renamed@example.com"))
+
+    # The pointer from the old email is left behind but no longer matches the user
+    assert await cached_user_service.get_user_by_email(old_email) is None
+    renamed = await cached_user_service.get_user_by_email("renamed@example.com")
+    assert renamed is not None and renamed.uuid == user.uuid
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_user_invalidates_lookup_cache(cached_user_service, user):
+    await cached_user_service.get_user(user.uuid)
+
+    await cached_user_service.delete_user(user.uuid)
+
+    with pytest.raises(NoUserFound):
+        await cached_user_service.get_user(user.uuid)
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_update_user(user_service, user):
     update_data = UserUpdate(name="Updated Name", is_admin=True)
@@ -100,6 +195,24 @@ async def test_delete_user(user_service, user):
         await user_service.get_user(user.uuid)
 
 
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_user_with_permissions(
+    user_service, user_permission_repository, user, permission
+):
+    await user_permission_repository.assign(user.uuid, permission.uuid)
+
+    await user_service.delete_user(user.uuid)
+
+    with pytest.raises(NoUserFound):
+        await user_service.get_user(user.uuid)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_nonexistent_user(user_service):
+    with pytest.raises(NoUserFound):
+        await user_service.delete_user(uuid7())
+
+
 @pytest.mark.asyncio(loop_scope="session")
 async def test_list_users(user_service, user_repository, user_create):
     # Create additional users
@@ -158,6 +271,9 @@ async def test_check_user_has_permission_regular_user(
         UserPermissionCreate(user_id=user.id, permission_id=permission.id)
     )
 
+    # The assignment bypasses the services, so the cached permission set is stale
+    user_permissions_cache.delete(user.uuid)
+
     # Now user should have permission
     has_permission = await user_service.check_user_has_permission(user.uuid, permission.name)
     assert has_permission is True
@@ -180,3 +296,141 @@ async def test_get_user_permissions(user_service, user, permission, user_permiss
     permissions = await user_service.get_user_permissions(user.uuid)
     assert len(permissions) == 1
     assert permission.name in permissions
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_check_user_has_permission_cached(user_service, user, mocker):
+    await user_service.check_user_has_permission(user.uuid, "test_permission")
+
+    has_permission_query = mocker.spy(user_service.user_permission_repository, "has_permission")
+    has_permission = await user_service.check_user_has_permission(user.uuid, "test_permission")
+
+    assert has_permission is False
+    has_permission_query.assert_not_called()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_update_user_invalidates_permission_cache(user_service, user):
+    await user_service.check_user_has_permission(user.uuid, "test_permission")
+    assert user_permissions_cache.get(user.uuid) is not None
+
+    await user_service.update_user(user.uuid, UserUpdate(is_admin=True))
+
+    assert user_permissions_cache.get(user.uuid) is None
+    assert await user_service.check_user_has_permission(user.uuid, "test_permission") is True
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_delete_user_invalidates_permission_cache(user_service, user):
+    await user_service.check_user_has_permission(user.uuid, "test_permission")
+
+    await user_service.delete_user(user.uuid)
+
+    with pytest.raises(NoUserFound):
+        await user_service.check_user_has_permission(user.uuid, "test_permission")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_check_user_permissions(user_service, user, admin_user, permission, mocker):
+    from src.domain.models.user_permission import UserPermissionCheck
+
+    # Answered by the cache, the database would say otherwise
+    user_permissions_cache.set(user.uuid, {"cached_permission": True})
+    has_permissions = mocker.spy(user_service.user_permission_repository, "has_permissions")
+
+    results = await user_service.check_user_permissions(
+        [
+            UserPermissionCheck(user_uuid=user.uuid, permission_name="cached_permission"),
+            UserPermissionCheck(user_uuid=user.uuid, permission_name=permission.name),
+            UserPermissionCheck(user_uuid=admin_user.uuid, permission_name=permission.name),
+        ]
+    )
+
+    assert [result.has_permission for result in results] == [True, False, True]
+    assert [result.user_uuid for result in results] == [user.uuid, user.uuid, admin_user.uuid]
+    has_permissions.assert_awaited_once_with(
+        [(user.uuid, permission.name), (admin_user.uuid, permission.name)]
+    )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_check_user_permissions_from_bitsets(user_service, user, admin_user, mocker):
+    from src.domain.models.user_permission import UserPermissionCheck
+    from src.domain.repositories.permission_bitset import PermissionBitsets
+
+    user_service.bitsets_cache.set(
+        PERMISSION_BITSETS_KEY,
+        PermissionBitsets(
+            ["read"], {user.uuid: [0], admin_user.uuid: []}, admins=[admin_user.uuid]
+        ),
+    )
+    has_permission = mocker.spy(user_service.user_permission_repository, "has_permission")
+    has_permissions = mocker.spy(user_service.user_permission_repository, "has_permissions")
+
+    # The database knows nothing of "read", the snapshot answers
+    assert await user_service.check_user_has_permission(user.uuid, "read") is True
+    assert await user_service.check_user_has_permission(admin_user.uuid, "write") is True
+    has_permission.assert_not_called()
+
+    # Users without any grant aren't in the snapshot, they are still found missing
+    with pytest.raises(NoUserFound):
+        await user_service.check_user_has_permission(uuid7(), "read")
+
+    missing = uuid7()
+    results = await user_service.check_user_permissions(
+        [
+            UserPermissionCheck(user_uuid=user.uuid, permission_name="write"),
+            UserPermissionCheck(user_uuid=missing, permission_name="read"),
+        ]
+    )
+    assert [result.has_permission for result in results] == [False, False]
+    has_permissions.assert_awaited_once_with([(missing, "read")])
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_concurrent_get_user_permissions_query_once(
+    user_service, user, permission, user_permission_repository, mocker
+):
+    await user_permission_repository.assign(user.uuid, permission.uuid)
+    get_names = mocker.spy(
+        user_service.user_permission_repository, "get_user_permission_names_by_uuid"
+    )
+
+    results = await asyncio.gather(
+        *(user_service.get_user_permissions(user.uuid) for _ in range(500))
+    )
+
+    assert results == [[permission.name]] * 500
+    assert get_names.call_count == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_concurrent_get_admins_query_once(user_service, admin_user, mocker):
+    get_admin_rows = mocker.spy(user_service.user_repository, "get_admin_rows")
+
+    results = await asyncio.gather(*(user_service.get_admins() for _ in range(500)))
+
+    assert all(admins == results[0] for admins in results)
+    assert admin_user.uuid in [admin.uuid for admin in results[0]]
+    assert get_admin_rows.call_count == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_list_users_after(user_service, user_repository, user_create, user):
+    user2_create = user_create.model_copy()
+    user2_create.email = "user2@example.com"
+    user2_create.google_id = "google_id_2"
+    user2 = await user_repository.create(user2_create)
+
+    users, next_cursor = await user_service.list_users_after(None, limit=1)
+    assert len(users) == 1
+    assert next_cursor is not None
+
+    # Page through everything, the users created by this test come last
+    seen = [user.uuid for user in users]
+    while next_cursor:
+        users, next_cursor = await user_service.list_users_after(next_cursor, limit=1)
+        seen += [user.uuid for user in users]
+
+    assert seen[-2:] == [user.uuid, user2.uuid]
+    assert len(seen) == len(set(seen))
@@ -1,7 +1,11 @@
+import json
+
 from fastapi import status
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 
-from src.web.main import app
+from src.core.settings import settings
+from src.web.main import SignatureMiddleware, SignedBody, app
 
 
 def test_api_router_included(auth_headers):
@@ -38,3 +42,96 @@ def test_signature_middleware_http_exception():
         assert response.json() == {
             "detail": "Missing signature or timestamp",
         }
+
+
+async def echo_app(scope, receive, send):
+    message = await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": message["body"]})
+
+
+async def test_signature_middleware_replays_body(auth_headers):
+    body = {"name": "test", "description": "x" * 1000}
+    raw_body = json.dumps(body, separators=(",", ":")).encode()
+
+    async def chunks():
+        # Split the body across several ASGI messages
+        for start in range(0, len(raw_body), 100):
+            yield raw_body[start : start + 100]
+
+    transport = ASGITransport(app=SignatureMiddleware(echo_app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/", content=chunks(), headers=auth_headers("POST", body))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == raw_body
+
+
+async def test_signature_middleware_invalid_signature(auth_headers):
+    headers = auth_headers("POST", {"name": "test"})
+
+    transport = ASGITransport(app=SignatureMiddleware(echo_app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/", json={"name": "other"}, headers=headers)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Invalid signature"}
+
+
+async def test_signature_middleware_spools_large_body(auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "signature_spool_size", 256)
+    monkeypatch.setattr(SignedBody, "CHUNK_SIZE", 300)
+    body = {"name": "test", "description": "x" * 1000}
+    raw_body = json.dumps(body, separators=(",", ":")).encode()
+    received = []
+
+    async def collect_app(scope, receive, send):
+        more_body = True
+        while more_body:
+            message = await receive()
+            received.append(message["body"])
+            more_body = message["more_body"]
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"".join(received)})
+
+    async def chunks():
+        for start in range(0, len(raw_body), 100):
+            yield raw_body[start : start + 100]
+
+    transport = ASGITransport(app=SignatureMiddleware(collect_app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/", content=chunks(), headers=auth_headers("POST", body))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == raw_body
+    assert len(received) == 4
+
+
+async def test_signature_middleware_same_signature_on_other_paths(auth_headers):
+    headers = auth_headers("GET", {})
+
+    transport = ASGITransport(app=SignatureMiddleware(echo_app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/users/a", headers=headers)
+        second = await client.get("/permissions/b", headers=headers)
+        query = await client.get("/users/a", params={"limit": 1}, headers=headers)
+        replayed = await client.get("/users/a", headers=headers)
+
+    assert first.status_code == status.HTTP_200_OK
+    assert second.status_code == status.HTTP_200_OK
+    assert query.status_code == status.HTTP_200_OK
+    assert replayed.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+async def test_signature_middleware_replayed_request(auth_headers):
+    headers = auth_headers("POST", {"name": "test"})
+
+    transport = ASGITransport(app=SignatureMiddleware(echo_app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/", json={"name": "test"}, headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await client.post("/", json={"name": "test"}, headers=headers)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json() == {"detail": "Replayed request"}